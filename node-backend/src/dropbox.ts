@@ -7,16 +7,50 @@ export async function uploadToDropbox(
   localPath: string,
   dropboxPath: string
 ): Promise<void> {
+  const fileContent = fs.readFileSync(localPath);
+  await uploadBufferToDropbox(fileContent, dropboxPath);
+}
+
+// メモリ上のデータをそのままアップロードする（ローカルにファイルを作らない）
+export async function uploadBufferToDropbox(
+  contents: Buffer,
+  dropboxPath: string
+): Promise<void> {
+  // 負荷試験やローカル確認では DROPBOX_LOCAL_DIR 配下に保存し、Dropbox には送らない
+  const localDir = process.env.DROPBOX_LOCAL_DIR;
+  if (localDir) {
+    await saveToLocalDropbox(localDir, contents, dropboxPath);
+    return;
+  }
+
   const accessToken = await getAccessToken();
   const dbx = new Dropbox({accessToken});
 
-  const fileContent = fs.readFileSync(localPath);
-
   await dbx.filesUpload({
     path: dropboxPath,
-    contents: fileContent,
+    contents,
     mode: {".tag": "overwrite"},
   });
 
   console.log(`📦 Dropboxへアップロード完了: ${dropboxPath}`);
 }
+
+// Dropbox の代わりにローカルのフォルダへ保存する（DROPBOX_LOCAL_LATENCY_MS でアップロードの待ち時間を再現）
+async function saveToLocalDropbox(
+  localDir: string,
+  contents: Buffer,
+  dropboxPath: string
+): Promise<void> {
+  const latencyMs = Number(process.env.DROPBOX_LOCAL_LATENCY_MS || 0);
+  if (latencyMs > 0) {
+    await new Promise((resolve) => setTimeout(resolve, latencyMs));
+  }
+
+  // 先頭に "/" を付けて正規化し、".." で保存先のフォルダの外を指さないようにする
+  const destination = path.join(
+    path.resolve(localDir),
+    path.posix.normalize(`/${dropboxPath}`)
+  );
+  await fs.promises.mkdir(path.dirname(destination), {recursive: true});
+  await fs.promises.writeFile(destination, contents);
+}
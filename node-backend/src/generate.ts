@@ -1,9 +1,7 @@
 import {Router, Request, Response} from "express";
-import fs from "fs";
 import path from "path";
-import {exec} from "child_process";
-import {uploadToDropbox} from "./dropbox";
-import archiver from "archiver";
+import {execFile} from "child_process";
+import {uploadBufferToDropbox} from "./dropbox";
 
 interface RequestBody {
   employeeNumber: string;
@@ -16,11 +14,132 @@ interface RequestBody {
   email: string;
 }
 
+// 段階ごとの処理時間（ミリ秒）。レスポンスの Server-Timing ヘッダで返し、負荷試験で集計する
+type StageTimings = Record<string, number>;
+
+function formatServerTiming(timings: StageTimings): string {
+  return Object.entries(timings)
+    .map(([name, ms]) => `${name};dur=${ms.toFixed(1)}`)
+    .join(", ");
+}
+
+// main.py --metrics が標準エラー出力に書き出す計測結果から、描画とZIP生成の時間を取り出す
+function collectPythonTimings(stderr: string, timings: StageTimings): void {
+  for (const line of stderr.split("\n")) {
+    if (!line.startsWith("{")) {
+      continue;
+    }
+    try {
+      const record = JSON.parse(line);
+      if (record.event === "render" || record.event === "render_front") {
+        timings.render = (timings.render || 0) + record.total_ms;
+      } else if (record.event === "bundle") {
+        timings.zip = record.total_ms;
+      }
+    } catch {
+      // 計測結果以外の行は無視する
+    }
+  }
+}
+
+// 入稿用ZIPの生成に失敗したときのエラー（statusはレンダリングサービスのHTTPステータス）
+class RenderError extends Error {
+  constructor(message: string, public status?: number) {
+    super(message);
+  }
+}
+
+// 裏面・表面のPDFとテンプレート一式をまとめた入稿用ZIPを生成する。
+// RENDER_SERVICE_URL が設定されていれば常駐のレンダリングサービス（python-generator/server.py）を使い、
+// 未設定の場合はリクエストごとに main.py を起動する（どちらもディスクにフォルダを作らない）。
+// RENDER_METRICS=1 の場合は main.py の計測結果から描画（render）とZIP生成（zip）の時間を timings に記録する
+async function renderBundle(
+  data: RequestBody,
+  folderName: string,
+  timings: StageTimings
+): Promise<Buffer> {
+  const renderServiceUrl = process.env.RENDER_SERVICE_URL;
+  if (renderServiceUrl) {
+    const name = encodeURIComponent(folderName);
+    const response = await fetch(
+      `${renderServiceUrl}/render?format=zip&name=${name}`,
+      {
+        method: "POST",
+        headers: {"Content-Type": "application/json"},
+        body: JSON.stringify(data),
+      }
+    );
+    if (!response.ok) {
+      throw new RenderError(
+        `レンダリングサービスがエラーを返しました (${response.status}): ${await response.text()}`,
+        response.status
+      );
+    }
+    return Buffer.from(await response.arrayBuffer());
+  }
+
+  const pythonScriptPath = path.join(
+    __dirname,
+    "../..",
+    "python-generator",
+    "main.py"
+  );
+
+  const args = [
+    pythonScriptPath,
+    "--json",
+    "-",
+    "--bundle",
+    "-",
+    "--bundle-name",
+    folderName,
+  ];
+  const collectMetrics = process.env.RENDER_METRICS === "1";
+  if (collectMetrics) {
+    args.push("--metrics");
+  }
+
+  // 名刺データは標準入力で渡し、ZIPは標準出力で受け取る（エラーはstderrにJSONで返る）
+  return new Promise((resolve, reject) => {
+    const child = execFile(
+      "python3",
+      args,
+      {encoding: "buffer", maxBuffer: 64 * 1024 * 1024},
+      (error, stdout, stderr) => {
+        if (error) {
+          reject(
+            new RenderError(
+              `Python実行エラー (exit ${error.code}):\n${stderr.toString("utf8")}`
+            )
+          );
+          return;
+        }
+        if (collectMetrics) {
+          collectPythonTimings(stderr.toString("utf8"), timings);
+        }
+        resolve(stdout);
+      }
+    );
+    child.stdin?.end(JSON.stringify(data));
+  });
+}
+
+// 以前のレスポンスの folderPath（サーバー上の保存先フォルダ）の基準のディレクトリ
+const legacyBaseDir = path.join(__dirname, "../..", "dropbox-storage");
+
 export const generateRoute = Router();
 
+// POST /generate のレスポンス（200）
+//   folderName:  ZIP内のフォルダ名（{yymmdd}_{社員番号}_{名前}_{オフィス}）
+//   dropboxPath: アップロードしたZIPのDropbox上のパス
+//   folderPath:  以前のクライアントとの互換のために残している項目（値の形式は以前と同じ）。
+//                フォルダはサーバー上に作らずZIPとしてDropboxに直接アップロードするようになったため、
+//                このパスには何も保存されない。新しいクライアントは folderName と dropboxPath を使うこと
 generateRoute.post<{}, {}, RequestBody>(
   "/",
   async (req, res): Promise<void> => {
+    const startedAt = performance.now();
+    const timings: StageTimings = {};
     const data = req.body;
     const {employeeNumber, name, office} = data;
 
@@ -28,180 +147,62 @@ generateRoute.post<{}, {}, RequestBody>(
     const now = new Date();
     const yymmdd = now.toISOString().slice(2, 10).replace(/-/g, "");
 
-    // ✅ 保存パスの生成
-    const baseDir = path.join(__dirname, "../..", "dropbox-storage");
+    // ✅ フォルダ名の生成（ZIP内のフォルダ名になる）
     const safeName = name.toLowerCase().replace(/\s+/g, "_");
     const folderName = `${yymmdd}_${employeeNumber}_${safeName}_${office}`;
-    const folderPath = path.join(baseDir, folderName);
-
-    // サブディレクトリの作成
-    const aiDir = path.join(folderPath, "ai");
-    const pdfDir = path.join(folderPath, "pdf");
-    const scriptsDir = path.join(aiDir, "scripts");
-    const linksDir = path.join(aiDir, "links");
-    const variablesDir = path.join(aiDir, "variables");
+    const zipFilename = `${folderName}.zip`;
+    timings.setup = performance.now() - startedAt;
 
+    // ✅ 裏面・表面のPDFとテンプレート一式をZIPで生成
+    let bundle: Buffer;
+    const renderStartedAt = performance.now();
     try {
-      // フォルダがなければ作成
-      if (!fs.existsSync(folderPath)) {
-        fs.mkdirSync(folderPath, {recursive: true});
-      }
-      fs.mkdirSync(aiDir, {recursive: true});
-      fs.mkdirSync(pdfDir, {recursive: true});
-      fs.mkdirSync(scriptsDir, {recursive: true});
-      fs.mkdirSync(linksDir, {recursive: true});
-      fs.mkdirSync(variablesDir, {recursive: true});
-
-      // ファイルの複製
-      const assetsDir = path.join(__dirname, "../../node-backend/assets");
-      const templateAiPath = path.join(assetsDir, "front_template.ai");
-      const generateJsxPath = path.join(assetsDir, "generate_front.jsx");
-
-      console.log("📁 アセットディレクトリ:", assetsDir);
-      console.log("📄 AIテンプレートパス:", templateAiPath);
-      console.log("📄 JSXスクリプトパス:", generateJsxPath);
-
-      if (!fs.existsSync(templateAiPath)) {
-        throw new Error(`front_template.aiが見つかりません: ${templateAiPath}`);
-      }
-      if (!fs.existsSync(generateJsxPath)) {
-        throw new Error(
-          `generate_front.jsxが見つかりません: ${generateJsxPath}`
-        );
+      bundle = await renderBundle(data, folderName, timings);
+      timings.python = performance.now() - renderStartedAt;
+    } catch (err) {
+      if (err instanceof RenderError && err.status === 429) {
+        // レンダリングサービスの待ち行列が埋まっている
+        console.warn("⚠️ レンダリングサービスが混雑しています:", zipFilename);
+        res
+          .status(503)
+          .set("Retry-After", "1")
+          .json({error: "混雑しています。しばらくしてから再試行してください"});
+        return;
       }
+      console.error("❌ PDF生成エラー:", err);
+      res.status(500).json({error: "Pythonスクリプトの実行に失敗しました"});
+      return;
+    }
 
-      // ファイルを非同期でコピー
-      await Promise.all([
-        fs.promises.copyFile(
-          templateAiPath,
-          path.join(aiDir, "front_template.ai")
-        ),
-        fs.promises.copyFile(
-          generateJsxPath,
-          path.join(scriptsDir, "generate_front.jsx")
-        ),
-      ]);
-
-      console.log("✅ テンプレートファイルの複製が完了しました");
-
-      // JSONファイルとして保存
-      const jsonFilename = `${employeeNumber}_${safeName}.json`;
-      const jsonPath = path.join(folderPath, jsonFilename);
-      fs.writeFileSync(jsonPath, JSON.stringify(data, null, 2), "utf8");
-      console.log(`✅ JSONファイルを保存しました: ${jsonPath}`);
-
-      // CSVファイルの生成
-      const csvFilename = "data.csv";
-      const csvPath = path.join(variablesDir, csvFilename);
-
-      // businessTitleの生成
-      const roll = data.roll || "";
-      const secondRoll = data.secondRoll || "";
-      const businessTitle = secondRoll ? `${roll} / ${secondRoll}` : roll;
-
-      // CSVヘッダーとデータの準備
-      const csvData = [
-        "employeeNumber,nameJa,name,businessTitle,tel,email,office",
-        [
-          data.employeeNumber,
-          data.nameJa,
-          data.name,
-          businessTitle,
-          data.tel,
-          data.email,
-          data.office,
-        ].join(","),
-      ].join("\n");
-
-      fs.writeFileSync(csvPath, csvData, "utf8");
-      console.log(`✅ CSVファイルを生成しました: ${csvPath}`);
-
-      // ✅ Pythonスクリプトを実行してPDFを生成
-      const pythonScriptPath = path.join(
-        __dirname,
-        "../..",
-        "python-generator",
-        "main.py"
-      );
-      const command = `python3 "${pythonScriptPath}" --json "${jsonPath}"`;
-
-      exec(command, async (error, stdout, stderr) => {
-        if (error) {
-          console.error(`❌ Python実行エラー:\n${stderr}`);
-          res.status(500).json({error: "Pythonスクリプトの実行に失敗しました"});
-          return;
-        }
-
-        console.log(`✅ Python実行完了:\n${stdout}`);
-
-        // PDFファイルのパスを確認
-        const pdfFilename = `${employeeNumber}_${safeName}_back.pdf`;
-        const pdfPath = path.join(pdfDir, pdfFilename);
+    if (bundle.length === 0) {
+      console.error("❌ ZIPデータが空です:", zipFilename);
+      res.status(500).json({error: "ZIPファイルの生成結果が空でした"});
+      return;
+    }
 
-        if (!fs.existsSync(pdfPath)) {
-          console.error("❌ PDFファイルが見つかりません:", pdfPath);
-          res
-            .status(500)
-            .json({error: "PDF生成後にファイルが見つかりませんでした"});
-          return;
-        }
+    console.log(
+      `✅ ZIPファイル作成完了: ${zipFilename} (${bundle.length} bytes)`
+    );
 
-        try {
-          // ZIPファイルの作成
-          const zipFilename = `${folderName}.zip`;
-          const zipPath = path.join(baseDir, zipFilename);
-          const output = fs.createWriteStream(zipPath);
-          const archive = archiver("zip", {
-            zlib: {level: 9}, // 最高圧縮率
-          });
-
-          output.on("close", async () => {
-            console.log(
-              `✅ ZIPファイル作成完了: ${zipPath} (${archive.pointer()} bytes)`
-            );
-
-            // ZIPファイルをDropboxにアップロード
-            const dropboxPath = `/dlt-meishi-data/${zipFilename}`;
-            try {
-              await uploadToDropbox(zipPath, dropboxPath);
-              console.log("📦 Dropboxへのアップロード完了");
-
-              // ローカルのZIPファイルを削除
-              fs.unlinkSync(zipPath);
-              console.log("🗑️ ローカルのZIPファイルを削除しました");
-
-              res.status(200).json({
-                message: "PDF生成＆Dropboxアップロード完了 🎉",
-                folderPath,
-              });
-            } catch (err) {
-              console.error("❌ Dropboxアップロード失敗:", err);
-              res
-                .status(500)
-                .json({error: "Dropboxへのアップロードに失敗しました"});
-            }
-          });
-
-          archive.on("error", (err: Error) => {
-            throw err;
-          });
-
-          archive.pipe(output);
-
-          // フォルダ内のすべてのファイルをZIPに追加
-          archive.directory(folderPath, folderName);
-
-          await archive.finalize();
-        } catch (err) {
-          console.error("❌ ZIPファイル作成失敗:", err);
-          res.status(500).json({error: "ZIPファイルの作成に失敗しました"});
-        }
+    // ZIPファイルをDropboxにアップロード
+    const dropboxPath = `/dlt-meishi-data/${zipFilename}`;
+    const uploadStartedAt = performance.now();
+    try {
+      await uploadBufferToDropbox(bundle, dropboxPath);
+      console.log("📦 Dropboxへのアップロード完了");
+      timings.upload = performance.now() - uploadStartedAt;
+      timings.total = performance.now() - startedAt;
+
+      res.set("Server-Timing", formatServerTiming(timings));
+      res.status(200).json({
+        message: "PDF生成＆Dropboxアップロード完了 🎉",
+        folderName,
+        dropboxPath,
+        folderPath: path.join(legacyBaseDir, folderName),
       });
     } catch (err) {
-      console.error("❌ ディレクトリ構造のセットアップに失敗:", err);
-      res
-        .status(500)
-        .json({error: "ディレクトリ構造のセットアップに失敗しました"});
+      console.error("❌ Dropboxアップロード失敗:", err);
+      res.status(500).json({error: "Dropboxへのアップロードに失敗しました"});
     }
   }
 );
@@ -22,9 +22,12 @@ console.log(
   "DROPBOX_REFRESH_TOKEN:",
   process.env.DROPBOX_REFRESH_TOKEN ? "設定済み" : "未設定"
 );
+if (process.env.DROPBOX_LOCAL_DIR) {
+  console.log("DROPBOX_LOCAL_DIR:", process.env.DROPBOX_LOCAL_DIR, "（Dropboxには送信しません）");
+}
 
 const app = express();
-const PORT = 4000;
+const PORT = Number(process.env.PORT) || 4000;
 
 // 💡 CORS設定はここで！
 app.use(cors());
@@ -0,0 +1,281 @@
+"""名刺裏面の一括生成
+
+JSON Lines、または Node 側が書き出す variables/data.csv と同じ列構成の CSV を
+1件ずつストリーミングで読み込み、レコードごとに裏面PDFを生成する。
+入力全体をメモリに載せないため、件数によらずメモリ使用量は一定になる。
+
+    python batch.py members.jsonl --out-dir out/ --report report.jsonl
+    python batch.py members.jsonl --out-dir out/ --workers 16   # 複数コアで並列生成
+    python batch.py members.jsonl --out-dir out/ --manifest out/manifest.json   # 変わった人だけ生成
+"""
+import argparse
+import csv
+import itertools
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, List, Optional, TextIO, Tuple, Union
+
+from daemon import init_worker
+from main import build_pdf_filename, render_meishi_back
+from meishi_back.manifest import Manifest
+
+
+class InvalidRecord(ValueError):
+    """読み込めなかったレコード（バッチ全体は止めずに失敗として報告する）"""
+
+
+class UpToDate:
+    """前回の生成から入力が変わっていないレコード（生成を飛ばして報告だけする）"""
+
+    def __init__(self, record: dict, output: str):
+        self.record = record
+        self.output = output
+
+
+class IncrementalBuild:
+    """マニフェストと照合して、前回から入力が変わっていないレコードを UpToDate に置き換える
+
+    生成し直すレコードはエントリを覚えておき、成功した結果を受け取ったときにマニフェストへ記録する。
+    """
+
+    def __init__(self, manifest: Manifest, out_dir: str):
+        self.manifest = manifest
+        self.out_dir = out_dir
+        self._pending = {}
+
+    def filter(self, records: Iterator[Union[dict, InvalidRecord]]) -> Iterator[Union[dict, InvalidRecord, UpToDate]]:
+        for record in records:
+            if isinstance(record, InvalidRecord):
+                yield record
+                continue
+            try:
+                output = os.path.join(self.out_dir, build_pdf_filename(record))
+                entry = self.manifest.entry(record)
+            except Exception:
+                # 不正なレコードはそのまま生成に回し、失敗として報告させる
+                yield record
+                continue
+            reason = self.manifest.stale_reason(output, entry)
+            if reason is None:
+                yield UpToDate(record, output)
+                continue
+            self._pending[output] = (entry, reason)
+            yield record
+
+    def finish(self, result: dict):
+        """生成の結果を受け取り、成功していればマニフェストに記録（結果には生成し直した理由を付ける）"""
+        pending = self._pending.pop(result.get("output"), None)
+        if pending is None:
+            return
+        entry, result["reason"] = pending
+        if result["ok"]:
+            self.manifest.record(result["output"], entry)
+
+
+def detect_format(path: str) -> str:
+    """拡張子から入力形式を判定"""
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".csv":
+        return "csv"
+    return "jsonl"
+
+
+def iter_jsonl(f: TextIO) -> Iterator[Union[dict, InvalidRecord]]:
+    """JSON Linesを1行ずつレコードとして返す"""
+    for line_no, line in enumerate(f, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            yield InvalidRecord(f"{line_no}行目のJSONが不正です: {e}")
+            continue
+        if not isinstance(record, dict):
+            yield InvalidRecord(f"{line_no}行目がJSONオブジェクトではありません")
+            continue
+        yield record
+
+
+def iter_csv(f: TextIO) -> Iterator[dict]:
+    """CSVを1行ずつレコードとして返す"""
+    reader = csv.DictReader(f)
+    for row in reader:
+        record = {key: value for key, value in row.items() if key is not None}
+        # businessTitle（"roll / secondRoll"）を元の項目に戻す
+        if "businessTitle" in record and "roll" not in record:
+            roll, _, second_roll = (record.get("businessTitle") or "").partition(" / ")
+            record["roll"] = roll
+            if second_roll:
+                record["secondRoll"] = second_roll
+        yield record
+
+
+def iter_records(path: str, fmt: Optional[str] = None) -> Iterator[Union[dict, InvalidRecord]]:
+    """入力ファイルからレコードをストリーミングで読み込む（"-" は標準入力）"""
+    fmt = fmt or ("jsonl" if path == "-" else detect_format(path))
+    if path == "-":
+        f = sys.stdin
+        close = False
+    else:
+        f = open(path, 'r', encoding='utf-8', newline='')
+        close = True
+    try:
+        if fmt == "csv":
+            yield from iter_csv(f)
+        else:
+            yield from iter_jsonl(f)
+    finally:
+        if close:
+            f.close()
+
+
+def render_record(index: int, record: Union[dict, InvalidRecord], out_dir: str) -> dict:
+    """1レコード分の裏面PDFを生成し、結果を返す"""
+    if isinstance(record, InvalidRecord):
+        return {"index": index, "ok": False, "error": str(record)}
+    if isinstance(record, UpToDate):
+        return {"index": index, "employeeNumber": record.record.get("employeeNumber"), "output": record.output,
+                "ok": True, "skipped": True}
+
+    result = {"index": index, "employeeNumber": record.get("employeeNumber")}
+    try:
+        output_path = os.path.join(out_dir, build_pdf_filename(record))
+        result["output"] = output_path
+        render_meishi_back(record, output_path)
+        result["ok"] = True
+    except Exception as e:
+        result["ok"] = False
+        result["error"] = f"{type(e).__name__}: {e}"
+    return result
+
+
+def render_chunk(chunk: List[Tuple[int, Union[dict, InvalidRecord]]], out_dir: str) -> List[dict]:
+    """ワーカープロセスでチャンク単位にレコードを処理"""
+    return [render_record(index, record, out_dir) for index, record in chunk]
+
+
+class BatchReporter:
+    """結果レポートの書き出しと集計（入力順に呼び出される）"""
+
+    def __init__(self, report: TextIO, progress: Optional[TextIO] = None, progress_every: int = 100,
+                 incremental: Optional[IncrementalBuild] = None):
+        self.report = report
+        self.progress = progress
+        self.progress_every = progress_every
+        self.incremental = incremental
+        self.summary = {"total": 0, "succeeded": 0, "failed": 0, "skipped": 0}
+
+    def add(self, result: dict):
+        if self.incremental:
+            self.incremental.finish(result)
+        self.summary["total"] += 1
+        self.summary["succeeded" if result["ok"] else "failed"] += 1
+        if result.get("skipped"):
+            self.summary["skipped"] += 1
+        self.report.write(json.dumps(result, ensure_ascii=False) + "\n")
+        if self.progress and self.summary["total"] % self.progress_every == 0:
+            print(f"⏳ 進捗: {self.summary['total']} 件（失敗 {self.summary['failed']} 件）", file=self.progress)
+
+    def flush(self):
+        self.report.flush()
+
+
+def run_batch(records: Iterator[Union[dict, InvalidRecord]], out_dir: str, report: TextIO,
+              progress: Optional[TextIO] = None, incremental: Optional[IncrementalBuild] = None) -> dict:
+    """レコードを順に処理し、1件ごとの結果をreportに書き出す"""
+    reporter = BatchReporter(report, progress, incremental=incremental)
+    for index, record in enumerate(records):
+        reporter.add(render_record(index, record, out_dir))
+        reporter.flush()
+    return reporter.summary
+
+
+def run_batch_parallel(records: Iterator[Union[dict, InvalidRecord]], out_dir: str, report: TextIO,
+                       workers: int, chunk_size: int = 32, progress: Optional[TextIO] = None,
+                       incremental: Optional[IncrementalBuild] = None) -> dict:
+    """レコードをチャンクに分けてプロセスプールで並列処理する
+
+    処理中のチャンク数をワーカー数の2倍までに抑えるため、入力を先読みしすぎず
+    メモリ使用量は一定に保たれる。結果は入力順にreportへ書き出す。
+    """
+    reporter = BatchReporter(report, progress, progress_every=max(chunk_size, 100), incremental=incremental)
+    max_in_flight = workers * 2
+    indexed = enumerate(records)
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker) as executor:
+        pending = deque()
+
+        def drain_one():
+            for result in pending.popleft().result():
+                reporter.add(result)
+            reporter.flush()
+
+        while True:
+            chunk = list(itertools.islice(indexed, chunk_size))
+            if not chunk:
+                break
+            pending.append(executor.submit(render_chunk, chunk, out_dir))
+            if len(pending) >= max_in_flight:
+                drain_one()
+
+        while pending:
+            drain_one()
+
+    return reporter.summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="名刺裏面の一括生成")
+    parser.add_argument("input", help="入力ファイル（JSON Lines または CSV、\"-\" で標準入力）")
+    parser.add_argument("--format", choices=["jsonl", "csv"], help="入力形式（省略時は拡張子から判定）")
+    parser.add_argument("--out-dir", required=True, help="PDFの出力先ディレクトリ")
+    parser.add_argument("--report", help="結果レポート（JSON Lines）の出力先（省略時は標準出力）")
+    parser.add_argument("--workers", type=int, default=1, help="並列に生成するワーカープロセス数（0でCPU数）")
+    parser.add_argument("--chunk-size", type=int, default=32, help="ワーカーに一度に渡すレコード数")
+    parser.add_argument("--manifest", help="差分生成用のマニフェスト（前回から入力が変わっていないPDFは生成しない）")
+    args = parser.parse_args()
+
+    if args.input != "-" and not os.path.exists(args.input):
+        print(f"❌ 入力ファイルが見つかりません: {args.input}", file=sys.stderr)
+        sys.exit(1)
+
+    os.makedirs(args.out_dir, exist_ok=True)
+    report = open(args.report, 'w', encoding='utf-8') if args.report else sys.stdout
+
+    workers = args.workers if args.workers > 0 else (os.cpu_count() or 1)
+    records = iter_records(args.input, args.format)
+    incremental = IncrementalBuild(Manifest(args.manifest), args.out_dir) if args.manifest else None
+    if incremental:
+        records = incremental.filter(records)
+
+    started = time.perf_counter()
+    try:
+        if workers > 1:
+            summary = run_batch_parallel(records, args.out_dir, report, workers,
+                                         max(1, args.chunk_size), progress=sys.stderr, incremental=incremental)
+        else:
+            summary = run_batch(records, args.out_dir, report, progress=sys.stderr, incremental=incremental)
+    finally:
+        # 途中で止まっても、それまでに生成した分は記録する
+        if incremental:
+            incremental.manifest.save()
+        if report is not sys.stdout:
+            report.close()
+
+    elapsed = time.perf_counter() - started
+    print(f"✅ 一括生成完了: 成功 {summary['succeeded']} 件 / 失敗 {summary['failed']} 件 "
+          f"（{summary['total']} 件, {elapsed:.1f}秒）", file=sys.stderr)
+    if incremental:
+        print(f"📄 差分生成: 変更なしで飛ばした {summary['skipped']} 件 / 生成対象 {summary['total'] - summary['skipped']} 件",
+              file=sys.stderr)
+    if summary["failed"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,228 @@
+"""裏面デザインのベンチマーク
+
+3種類のデザイン × size_list のキー × 位置の端点 × detailedness を総当たりで描画し、
+1回あたりの描画時間（パーセンタイル）、ピークメモリ（tracemalloc）、PDFのバイト数を計測する。
+キャッシュは通さず、毎回実際に描画する。
+
+    python benchmarks/bench_back.py                    # 計測して表示
+    python benchmarks/bench_back.py --save-baseline    # 基準値を更新
+    python benchmarks/bench_back.py --check            # 基準値と比較（劣化があれば終了コード1）
+
+基準値は2つのファイルに分けて保存する。
+- baseline.json: ピークメモリとPDFのバイト数（マシンにほぼ依存しないためリポジトリに含める）
+- baseline.local.json: 描画時間（マシンごとに異なるためリポジトリに含めず、各自の環境で作る）
+--check は描画時間を baseline.local.json がある場合のみ比較する。
+"""
+import argparse
+import itertools
+import json
+import math
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from main import _render_back_pdf  # noqa: E402
+
+
+GRID_TYPES = ["isolation", "perspective", "hybrid"]
+SIZES = ["l", "m", "s", "xs"]
+POSITIONS = [(0, 0), (100, 0), (50, 50), (0, 100), (100, 100)]
+DETAILEDNESS = [0.5, 1.0, 2.0]
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+DEFAULT_LOCAL_BASELINE = os.path.join(os.path.dirname(__file__), "baseline.local.json")
+
+# 基準値に対して許容する悪化の割合
+# 描画時間は揺らぎが大きい（同じマシンでも実行ごとに3割ほど変わる）ため、デザインごとの集計値を広い幅で比較する
+SUMMARY_THRESHOLDS = {
+    "p50_ms": 0.50,
+    "p95_ms": 1.00,
+}
+# メモリとPDFサイズはほぼ決定的なため、パターンごとに比較する
+CASE_THRESHOLDS = {
+    "peak_kb": 0.25,
+    "pdf_bytes": 0.05,
+}
+
+
+def build_cases():
+    """計測するパターンの一覧を生成"""
+    for grid_type, size, (x, y), detailedness in itertools.product(GRID_TYPES, SIZES, POSITIONS, DETAILEDNESS):
+        case_id = f"{grid_type}/{size}/x{x}y{y}/d{detailedness:g}"
+        data = {
+            "employeeNumber": "000000",
+            "name": "Bench Mark",
+            "pattern": {
+                "grid": {"type": grid_type, "detailedness": detailedness},
+                "size": size,
+                "position": {"x": x, "y": y},
+            },
+        }
+        yield case_id, data
+
+
+def percentile(values, q: float) -> float:
+    """最近傍法でパーセンタイルを求める"""
+    ordered = sorted(values)
+    index = max(0, math.ceil(q / 100 * len(ordered)) - 1)
+    return ordered[index]
+
+
+def measure_case(data: dict, iterations: int) -> dict:
+    """1パターン分を計測"""
+    timings = []
+    pdf = b""
+    for _ in range(iterations):
+        started = time.perf_counter()
+        pdf = _render_back_pdf(data)
+        timings.append((time.perf_counter() - started) * 1000)
+
+    # ピークメモリは計測のオーバーヘッドが大きいため、時間計測とは別に1回だけ測る
+    tracemalloc.start()
+    _render_back_pdf(data)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "p50_ms": round(percentile(timings, 50), 3),
+        "p95_ms": round(percentile(timings, 95), 3),
+        "p99_ms": round(percentile(timings, 99), 3),
+        "mean_ms": round(statistics.fmean(timings), 3),
+        "peak_kb": round(peak / 1024, 1),
+        "pdf_bytes": len(pdf),
+    }
+
+
+def summarize(results: dict) -> dict:
+    """デザインごとに集計"""
+    summary = {}
+    for grid_type in GRID_TYPES:
+        rows = [r for case_id, r in results.items() if case_id.startswith(grid_type + "/")]
+        if not rows:
+            continue
+        summary[grid_type] = {
+            "p50_ms": round(statistics.median(r["p50_ms"] for r in rows), 3),
+            "p95_ms": round(statistics.median(r["p95_ms"] for r in rows), 3),
+            "peak_kb": round(max(r["peak_kb"] for r in rows), 1),
+            "pdf_bytes_max": max(r["pdf_bytes"] for r in rows),
+        }
+    return summary
+
+
+def _regressions(label: str, current: dict, base: dict, thresholds: dict) -> list:
+    lines = []
+    for metric, tolerance in thresholds.items():
+        if not base.get(metric) or metric not in current:
+            continue
+        ratio = current[metric] / base[metric]
+        if ratio > 1 + tolerance:
+            lines.append(f"{label} {metric}: {base[metric]} → {current[metric]} (+{(ratio - 1) * 100:.0f}%)")
+    return lines
+
+
+def split_baseline(report: dict):
+    """計測結果を (サイズとメモリの基準値, 描画時間の基準値) に分ける"""
+    def pick(rows: dict, metrics) -> dict:
+        return {name: {metric: row[metric] for metric in metrics if metric in row} for name, row in rows.items()}
+
+    sizes = {
+        "summary": pick(report["summary"], ("peak_kb", "pdf_bytes_max")),
+        "cases": pick(report["cases"], CASE_THRESHOLDS),
+    }
+    latency = {
+        "iterations": report["iterations"],
+        "summary": pick(report["summary"], SUMMARY_THRESHOLDS),
+    }
+    return sizes, latency
+
+
+def _load_baseline(path: str) -> dict:
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _save_baseline(path: str, baseline: dict):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(baseline, f, ensure_ascii=False, indent=2)
+        f.write("\n")
+
+
+def compare(report: dict, baseline: dict) -> list:
+    """基準値と比較して、閾値を超えて悪化した項目を返す（基準値に無い項目は比較しない）"""
+    regressions = []
+    for grid_type, current in report["summary"].items():
+        base = baseline.get("summary", {}).get(grid_type)
+        if base:
+            regressions += _regressions(grid_type, current, base, SUMMARY_THRESHOLDS)
+    for case_id, current in report["cases"].items():
+        base = baseline.get("cases", {}).get(case_id)
+        if base:
+            regressions += _regressions(case_id, current, base, CASE_THRESHOLDS)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="裏面デザインのベンチマーク")
+    parser.add_argument("--iterations", type=int, default=20, help="1パターンあたりの描画回数")
+    parser.add_argument("--filter", help="対象のパターンIDに含まれる文字列（例: hybrid/m）")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="サイズとメモリの基準値ファイルのパス")
+    parser.add_argument("--local-baseline", default=DEFAULT_LOCAL_BASELINE,
+                        help="描画時間の基準値ファイルのパス（マシンごと）")
+    parser.add_argument("--save-baseline", action="store_true", help="計測結果を基準値として保存")
+    parser.add_argument("--check", action="store_true", help="基準値と比較し、劣化があれば終了コード1")
+    parser.add_argument("--json", help="計測結果をJSONで書き出すパス")
+    args = parser.parse_args()
+
+    # ウォームアップ（インポートやロゴの解析を計測から外す）
+    for _, data in itertools.islice(build_cases(), 0, None, len(SIZES) * len(POSITIONS) * len(DETAILEDNESS)):
+        _render_back_pdf(data)
+
+    results = {}
+    for case_id, data in build_cases():
+        if args.filter and args.filter not in case_id:
+            continue
+        results[case_id] = measure_case(data, args.iterations)
+        r = results[case_id]
+        print(f"{case_id:<32} p50 {r['p50_ms']:7.2f}ms  p95 {r['p95_ms']:7.2f}ms  p99 {r['p99_ms']:7.2f}ms  "
+              f"peak {r['peak_kb']:8.1f}KB  pdf {r['pdf_bytes']:6d}B")
+
+    summary = summarize(results)
+    print()
+    for grid_type, s in summary.items():
+        print(f"{grid_type:<12} p50(中央値) {s['p50_ms']:.2f}ms  p95(中央値) {s['p95_ms']:.2f}ms  "
+              f"peak(最大) {s['peak_kb']:.1f}KB  pdf(最大) {s['pdf_bytes_max']}B")
+
+    report = {"iterations": args.iterations, "summary": summary, "cases": results}
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+    if args.save_baseline:
+        sizes, latency = split_baseline(report)
+        _save_baseline(args.baseline, sizes)
+        _save_baseline(args.local_baseline, latency)
+        print(f"✅ 基準値を保存しました: {args.baseline}（サイズとメモリ）, {args.local_baseline}（描画時間）")
+
+    if args.check:
+        if not os.path.exists(args.baseline):
+            print(f"❌ 基準値ファイルが見つかりません: {args.baseline}")
+            sys.exit(2)
+        regressions = compare(report, _load_baseline(args.baseline))
+        if os.path.exists(args.local_baseline):
+            regressions += compare(report, _load_baseline(args.local_baseline))
+        else:
+            print(f"\n⚠️ 描画時間の基準値が無いため比較しません（--save-baseline で作成）: {args.local_baseline}")
+        if regressions:
+            print(f"\n❌ 基準値から劣化した項目が {len(regressions)} 件あります:")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print("\n✅ 基準値からの劣化はありません")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""起動時間（インポート時間）の計測
+
+新しいPythonプロセスで main.py を読み込むまでの時間と、1枚描画して終了するまでの時間を計測し、
+重いモジュール（reportlab / svglib / lxml / numpy）が読み込まれたかを表示する。
+
+    python benchmarks/import_time.py
+    python benchmarks/import_time.py --runs 10 --top 15
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+GENERATOR_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+HEAVY_MODULES = ["reportlab.pdfgen.canvas", "reportlab.graphics.renderPDF", "svglib.svglib", "lxml.etree", "numpy"]
+
+SAMPLE_CARD = {
+    "employeeNumber": "000000",
+    "name": "Import Time",
+    "pattern": {"grid": {"type": "hybrid", "detailedness": 1.0}, "size": "m", "position": {"x": 50, "y": 50}},
+}
+
+PROBE = """
+import sys, time
+started = time.perf_counter()
+import main
+imported = time.perf_counter()
+if {render!r}:
+    main.render_back({card!r})
+finished = time.perf_counter()
+import json
+print(json.dumps({{
+    "import_ms": (imported - started) * 1000,
+    "total_ms": (finished - started) * 1000,
+    "loaded": [m for m in {heavy!r} if m in sys.modules],
+}}))
+"""
+
+
+def run_probe(render: bool) -> dict:
+    code = PROBE.format(render=render, card=SAMPLE_CARD, heavy=HEAVY_MODULES)
+    env = dict(os.environ, MEISHI_CACHE="0")
+    started = time.perf_counter()
+    out = subprocess.run([sys.executable, "-c", code], cwd=GENERATOR_DIR, env=env,
+                         check=True, capture_output=True, text=True).stdout
+    result = json.loads(out.strip().splitlines()[-1])
+    result["process_ms"] = (time.perf_counter() - started) * 1000
+    return result
+
+
+def top_imports(top: int) -> list:
+    """-X importtime の結果から累積時間の大きいモジュールを返す"""
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", "import main"], cwd=GENERATOR_DIR,
+                          check=True, capture_output=True, text=True)
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append((int(cumulative_us), int(self_us), name.strip()))
+    rows.sort(reverse=True)
+    return rows[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="起動時間（インポート時間）の計測")
+    parser.add_argument("--runs", type=int, default=5, help="計測回数")
+    parser.add_argument("--top", type=int, default=10, help="表示する重いモジュールの件数")
+    args = parser.parse_args()
+
+    for render in (False, True):
+        results = [run_probe(render) for _ in range(args.runs)]
+        label = "import + 1枚描画" if render else "import main"
+        print(f"{label:<18} import {statistics.median(r['import_ms'] for r in results):7.1f}ms  "
+              f"total {statistics.median(r['total_ms'] for r in results):7.1f}ms  "
+              f"process {statistics.median(r['process_ms'] for r in results):7.1f}ms  "
+              f"loaded: {', '.join(results[-1]['loaded']) or '-'}")
+
+    print(f"\n`import main` の累積時間上位 {args.top} 件:")
+    for cumulative_us, self_us, name in top_imports(args.top):
+        print(f"  {cumulative_us / 1000:7.1f}ms  (self {self_us / 1000:6.1f}ms)  {name}")
+
+
+if __name__ == "__main__":
+    main()
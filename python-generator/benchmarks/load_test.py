@@ -0,0 +1,361 @@
+"""/generate のエンドツーエンド負荷試験
+
+Node の /generate ルート（main.py の起動・ZIPの生成・アップロードまで）に実際の申込みに近い名刺データを
+同時接続数を変えながら送り、レイテンシ（p50/p95/p99）、段階ごとの内訳、スループット、
+ピークRSS（Node とその子プロセスの合計）を計測する。
+Dropbox へのアップロードは DROPBOX_LOCAL_DIR でローカルのフォルダへの保存に置き換える。
+
+段階ごとの内訳はレスポンスの Server-Timing ヘッダ（setup / python / render / zip / upload）から集計する。
+render と zip は RENDER_METRICS=1 で起動した Node が main.py の計測結果から取り出したもので、
+python（main.py の起動から終了まで）の内訳になる。
+
+    # Node を起動し、1, 4, 8 並列で各 50 件
+    python benchmarks/load_test.py --start-node --concurrency 1,4,8 --requests 50
+
+    # 起動済みのサーバーを計測（DROPBOX_LOCAL_DIR と RENDER_METRICS=1 を設定して起動しておく）
+    python benchmarks/load_test.py --url http://127.0.0.1:4000/generate --pid <NodeのPID>
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import signal
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from bench_back import GRID_TYPES, SIZES, percentile
+
+
+NODE_BACKEND_DIR = os.path.join(os.path.dirname(__file__), "..", "..", "node-backend")
+DEFAULT_NODE_COMMAND = "npx ts-node src/index.ts"
+DEFAULT_PORT = 4000
+
+# Server-Timing の段階（表示順）
+STAGES = ["setup", "python", "render", "zip", "upload"]
+
+# 名刺データの生成に使う値（実際の申込みに近い長さと文字種）
+NAMES = [
+    ("山田 太郎", "Taro Yamada"), ("佐藤 花子", "Hanako Sato"), ("鈴木 一郎", "Ichiro Suzuki"),
+    ("高橋 美咲", "Misaki Takahashi"), ("渡辺 健太", "Kenta Watanabe"), ("伊藤 さくら", "Sakura Ito"),
+    ("中村 大輔", "Daisuke Nakamura"), ("小林 由美子", "Yumiko Kobayashi"),
+    ("長谷川 慎之介", "Shinnosuke Hasegawa"), ("John Smith", "John Smith"),
+]
+OFFICES = ["Tokyo", "Osaka", "Nagoya", "Fukuoka", "Sapporo"]
+ROLLS = ["Designer", "Engineer", "Producer", "Creative Director", "Strategic Planner", "Account Executive"]
+DETAILEDNESS = [0.5, 1.0, 2.0]
+
+
+def build_payload(rng: random.Random, index: int) -> dict:
+    """フロントエンドから送られるのと同じ形の名刺データを1件生成"""
+    name_ja, name = rng.choice(NAMES)
+    data = {
+        "employeeNumber": f"{100000 + index}",
+        "name": name,
+        "nameJa": name_ja,
+        "office": rng.choice(OFFICES),
+        "roll": rng.choice(ROLLS),
+        "tel": f"+81 80-{rng.randint(1000, 9999)}-{rng.randint(1000, 9999)}",
+        "email": f"{name.lower().replace(' ', '.')}{index}@example.com",
+        "pattern": {
+            "grid": {"type": rng.choice(GRID_TYPES), "detailedness": rng.choice(DETAILEDNESS)},
+            "size": rng.choice(SIZES),
+            "position": {"x": rng.randint(0, 100), "y": rng.randint(0, 100)},
+        },
+    }
+    if rng.random() < 0.3:
+        data["secondRoll"] = rng.choice(ROLLS)
+    return data
+
+
+def parse_server_timing(header: Optional[str]) -> Dict[str, float]:
+    """Server-Timing ヘッダ（"setup;dur=0.4, python;dur=812.3"）を 段階 → ミリ秒 にする"""
+    timings = {}
+    for entry in (header or "").split(","):
+        name, _, params = entry.strip().partition(";")
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "dur":
+                try:
+                    timings[name] = float(value)
+                except ValueError:
+                    pass
+    return timings
+
+
+def send(url: str, payload: dict, timeout: float) -> Tuple[int, float, Dict[str, float]]:
+    """1件送信して (ステータス, レイテンシ[ms], 段階ごとの時間) を返す（接続エラーはステータス0）"""
+    body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+    request = urllib.request.Request(url, data=body, headers={"Content-Type": "application/json"}, method="POST")
+    started = time.perf_counter()
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            response.read()
+            status, header = response.status, response.headers.get("Server-Timing")
+    except urllib.error.HTTPError as e:
+        e.read()
+        status, header = e.code, None
+    except (urllib.error.URLError, OSError):
+        status, header = 0, None
+    return status, (time.perf_counter() - started) * 1000, parse_server_timing(header)
+
+
+def _process_tree(root_pid: int) -> List[int]:
+    """root_pid とその子孫のPID（/proc を走査する）"""
+    children: Dict[int, List[int]] = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat", 'rb') as f:
+                stat = f.read()
+        except OSError:
+            continue
+        # 2番目の項目（コマンド名）は空白や括弧を含みうるため、最後の ")" の後ろから読む
+        ppid = int(stat[stat.rindex(b")") + 2:].split()[1])
+        children.setdefault(ppid, []).append(int(entry))
+
+    pids, stack = [], [root_pid]
+    while stack:
+        pid = stack.pop()
+        pids.append(pid)
+        stack.extend(children.get(pid, []))
+    return pids
+
+
+def _rss_kb(pid: int) -> int:
+    try:
+        with open(f"/proc/{pid}/status", 'r') as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return 0
+
+
+class RssSampler:
+    """プロセスツリー全体のRSSを一定間隔で合計し、ピークを記録する（/proc がある環境のみ）"""
+
+    def __init__(self, root_pid: int, interval: float = 0.05):
+        self.root_pid = root_pid
+        self.interval = interval
+        self.peak_kb = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    @staticmethod
+    def available() -> bool:
+        return os.path.isdir("/proc/self")
+
+    def _run(self):
+        while not self._stop.is_set():
+            total = sum(_rss_kb(pid) for pid in _process_tree(self.root_pid))
+            self.peak_kb = max(self.peak_kb, total)
+            self._stop.wait(self.interval)
+
+    def reset(self):
+        self.peak_kb = 0
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+
+def run_level(url: str, concurrency: int, payloads: List[dict], timeout: float) -> Tuple[list, float]:
+    """同時接続数 concurrency で payloads を送り切り、(結果の一覧, 経過時間[s]) を返す"""
+    queue = iter(payloads)
+    queue_lock = threading.Lock()
+    results = []
+
+    def worker():
+        # 1つの接続が応答を受け取ってから次を送る（クローズドループ）
+        while True:
+            with queue_lock:
+                payload = next(queue, None)
+            if payload is None:
+                return
+            results.append(send(url, payload, timeout))
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for _ in range(concurrency):
+            executor.submit(worker)
+    return results, time.perf_counter() - started
+
+
+def summarize_level(concurrency: int, results: list, elapsed: float, peak_kb: Optional[int]) -> dict:
+    """1段階分の結果を集計"""
+    ok = [(latency, timings) for status, latency, timings in results if status == 200]
+    errors = Counter(str(status) for status, _, _ in results if status != 200)
+    latencies = [latency for latency, _ in ok]
+
+    summary = {
+        "concurrency": concurrency,
+        "requests": len(results),
+        "ok": len(ok),
+        "errors": dict(errors),
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(len(ok) / elapsed, 3) if elapsed else 0,
+        "peak_rss_mb": round(peak_kb / 1024, 1) if peak_kb is not None else None,
+    }
+    if latencies:
+        summary["latency_ms"] = {
+            "p50": round(percentile(latencies, 50), 1),
+            "p95": round(percentile(latencies, 95), 1),
+            "p99": round(percentile(latencies, 99), 1),
+            "max": round(max(latencies), 1),
+            "mean": round(statistics.fmean(latencies), 1),
+        }
+    stages = {}
+    for stage in STAGES:
+        values = [timings[stage] for _, timings in ok if stage in timings]
+        if values:
+            stages[stage] = {"p50": round(percentile(values, 50), 1), "p95": round(percentile(values, 95), 1)}
+    summary["stages_ms"] = stages
+    return summary
+
+
+def print_level(summary: dict):
+    latency = summary.get("latency_ms")
+    line = f"並列 {summary['concurrency']:>3}: {summary['ok']}/{summary['requests']} 件成功  " \
+           f"{summary['throughput_rps']:6.2f} req/s"
+    if latency:
+        line += f"  p50 {latency['p50']:8.1f}ms  p95 {latency['p95']:8.1f}ms  p99 {latency['p99']:8.1f}ms"
+    if summary["peak_rss_mb"] is not None:
+        line += f"  RSS {summary['peak_rss_mb']:7.1f}MB"
+    print(line)
+    if summary["stages_ms"]:
+        stages = "  ".join(f"{name} {v['p50']:.1f}/{v['p95']:.1f}" for name, v in summary["stages_ms"].items())
+        print(f"          内訳 p50/p95 (ms): {stages}")
+    if summary["errors"]:
+        errors = ", ".join(f"{status}: {count}件" for status, count in sorted(summary["errors"].items()))
+        print(f"          ⚠️ 失敗: {errors}（0 は接続エラー・タイムアウト）")
+
+
+def wait_for_port(host: str, port: int, process: subprocess.Popen, timeout: float = 120):
+    """サーバーが接続を受け付けるまで待つ"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Node が起動中に終了しました（終了コード {process.returncode}）")
+        try:
+            with socket.create_connection((host, port), timeout=1):
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f"{timeout:.0f}秒以内に {host}:{port} で起動しませんでした")
+
+
+def start_node(command: str, port: int, dropbox_dir: str, latency_ms: int, log_path: str) -> subprocess.Popen:
+    """Dropbox の代わりにローカルのフォルダへ保存する設定で Node を起動"""
+    env = dict(os.environ, PORT=str(port), DROPBOX_LOCAL_DIR=dropbox_dir, RENDER_METRICS="1",
+               DROPBOX_LOCAL_LATENCY_MS=str(latency_ms))
+    log = open(log_path, 'w', encoding='utf-8')
+    # npx などのラッパー経由でも子プロセスごと終了できるよう、別のプロセスグループで起動する
+    return subprocess.Popen(command.split(), cwd=NODE_BACKEND_DIR, env=env, stdout=log, stderr=subprocess.STDOUT,
+                            start_new_session=True)
+
+
+def stop_node(process: subprocess.Popen):
+    """起動した Node をプロセスグループごと終了"""
+    try:
+        os.killpg(process.pid, signal.SIGTERM)
+        process.wait(timeout=10)
+    except subprocess.TimeoutExpired:
+        os.killpg(process.pid, signal.SIGKILL)
+        process.wait()
+    except ProcessLookupError:
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description="/generate のエンドツーエンド負荷試験")
+    parser.add_argument("--url", help=f"送信先（省略時は http://127.0.0.1:{{--port}}/generate）")
+    parser.add_argument("--concurrency", default="1,2,4,8", help="同時接続数（カンマ区切りで順に計測）")
+    parser.add_argument("--requests", type=int, default=40, help="同時接続数ごとの送信件数")
+    parser.add_argument("--warmup", type=int, default=2, help="計測前に送る件数（結果には含めない）")
+    parser.add_argument("--timeout", type=float, default=120, help="1件あたりのタイムアウト（秒）")
+    parser.add_argument("--seed", type=int, default=0, help="名刺データの乱数シード")
+    parser.add_argument("--pid", type=int, help="RSSを計測するプロセス（起動済みのサーバーを計測する場合）")
+    parser.add_argument("--start-node", action="store_true", help="Node のサーバーをローカルのDropbox代替で起動して計測")
+    parser.add_argument("--node-command", default=DEFAULT_NODE_COMMAND, help="Node の起動コマンド（node-backend で実行）")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="--start-node で起動するポート")
+    parser.add_argument("--dropbox-dir", help="アップロード先の代わりに保存するフォルダ（省略時は一時フォルダ）")
+    parser.add_argument("--upload-latency-ms", type=int, default=0, help="ローカル保存の前に待つ時間（アップロードの再現）")
+    parser.add_argument("--json", help="計測結果をJSONで書き出すパス")
+    args = parser.parse_args()
+
+    levels = [int(v) for v in args.concurrency.split(",") if v.strip()]
+    if not levels or min(levels) < 1:
+        parser.error("--concurrency は1以上の整数をカンマ区切りで指定してください")
+    url = args.url or f"http://127.0.0.1:{args.port}/generate"
+
+    node = None
+    dropbox_dir = args.dropbox_dir
+    temporary_dir = None
+    if args.start_node:
+        if dropbox_dir is None:
+            dropbox_dir = temporary_dir = tempfile.mkdtemp(prefix="meishi_dropbox_")
+        log_path = os.path.join(dropbox_dir, "node.log")
+        node = start_node(args.node_command, args.port, dropbox_dir, args.upload_latency_ms, log_path)
+        try:
+            wait_for_port("127.0.0.1", args.port, node)
+        except RuntimeError as e:
+            stop_node(node)
+            print(f"❌ {e}（ログ: {log_path}）", file=sys.stderr)
+            sys.exit(1)
+        print(f"✅ Node を起動しました: {url}（アップロード先: {dropbox_dir}）")
+
+    sampler = None
+    root_pid = node.pid if node else args.pid
+    if root_pid and RssSampler.available():
+        sampler = RssSampler(root_pid)
+        sampler.start()
+
+    rng = random.Random(args.seed)
+    report = {"url": url, "requests_per_level": args.requests, "seed": args.seed, "levels": []}
+    try:
+        for index in range(args.warmup):
+            send(url, build_payload(rng, index), args.timeout)
+
+        for concurrency in levels:
+            payloads = [build_payload(rng, args.warmup + i) for i in range(args.requests)]
+            if sampler:
+                sampler.reset()
+            results, elapsed = run_level(url, concurrency, payloads, args.timeout)
+            summary = summarize_level(concurrency, results, elapsed, sampler.peak_kb if sampler else None)
+            report["levels"].append(summary)
+            print_level(summary)
+    finally:
+        if sampler:
+            sampler.stop()
+        if node:
+            stop_node(node)
+        if temporary_dir:
+            shutil.rmtree(temporary_dir, ignore_errors=True)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"📄 計測結果を書き出しました: {args.json}")
+
+    if any(level["ok"] < level["requests"] for level in report["levels"]):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
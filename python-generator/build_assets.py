@@ -0,0 +1,29 @@
+"""ロゴの事前コンパイル（デプロイ時のビルドステップ）
+
+DL_LOGO_HorizontalStacked_Black_CMYK.svg を解析済みの Drawing（CMYK出力用に色を変換したものも）として書き出す。
+書き出したファイルがSVGの内容と一致する間は、描画時にsvglib（とlxml）を読み込まない。
+あわせて入稿用ZIPに入れる front_template.ai を圧縮済みのエントリとして書き出す。
+
+    python build_assets.py
+"""
+import argparse
+
+from meishi_back.assets import DEFAULT_LOGO_PATH, build_precompiled_logo
+from meishi_back.bundle import FRONT_TEMPLATE_PATH, build_precompressed_entry
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ロゴの事前コンパイル")
+    parser.add_argument("svg", nargs="*", default=[DEFAULT_LOGO_PATH], help="対象のSVGファイル")
+    args = parser.parse_args()
+
+    for svg_path in args.svg:
+        compiled_path = build_precompiled_logo(svg_path)
+        print(f"✅ ロゴを事前コンパイルしました: {compiled_path}")
+
+    compressed_path = build_precompressed_entry(FRONT_TEMPLATE_PATH)
+    print(f"✅ テンプレートを事前圧縮しました: {compressed_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""裏面PDFの事前描画パックの生成（デプロイ時のビルドステップ）
+
+ロゴの位置の格子点・サイズ・detailedness の全組み合わせを描画し、1つのパックにまとめる。
+main.py はパックにある組み合わせを描画せずに返す（MEISHI_PACK でパスを指定、0で無効）。
+描画に使うモジュール（fingerprint.RENDER_MODULES とデザインのクラス）やロゴを変更すると
+古いパックは使われなくなるため、再生成すること。
+
+    python build_pack.py                  # assets/back_lattice.pack を生成
+    python build_pack.py --if-stale       # 現在のデザインと一致するパックがあれば何もしない
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from daemon import init_worker
+from main import _render_back_pdf
+from meishi_back.pack import (DEFAULT_DETAILEDNESS, DEFAULT_PACK_PATH, LatticePack, try_render, build_pack,
+                              design_fingerprint, iter_lattice)
+
+
+def render_lattice_record(data: dict):
+    """ワーカープロセスで1件描画（描画できない位置はNone）"""
+    return data, try_render(_render_back_pdf, data)
+
+
+def is_up_to_date(path: str) -> bool:
+    """現在のデザインと一致するパックが既にあるか"""
+    if not os.path.exists(path):
+        return False
+    try:
+        pack = LatticePack(path)
+    except (OSError, ValueError):
+        return False
+    try:
+        return pack.fingerprint == design_fingerprint()
+    finally:
+        pack.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="裏面PDFの事前描画パックの生成")
+    parser.add_argument("--output", default=DEFAULT_PACK_PATH, help="パックの出力先")
+    parser.add_argument("--detailedness", type=float, nargs="+", default=list(DEFAULT_DETAILEDNESS),
+                        help="事前描画するdetailednessの値")
+    parser.add_argument("--workers", type=int, default=1, help="並列に描画するワーカープロセス数（0でCPU数）")
+    parser.add_argument("--if-stale", action="store_true", help="現在のデザインと一致するパックがあれば再生成しない")
+    args = parser.parse_args()
+
+    if args.if_stale and is_up_to_date(args.output):
+        print(f"✅ パックは最新です: {os.path.abspath(args.output)}")
+        return
+
+    workers = args.workers if args.workers > 0 else (os.cpu_count() or 1)
+    started = time.perf_counter()
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers, initializer=init_worker) as executor:
+            records = executor.map(render_lattice_record, iter_lattice(args.detailedness), chunksize=16)
+            result = build_pack(args.output, _render_back_pdf, records=records)
+    else:
+        result = build_pack(args.output, _render_back_pdf, detailedness_values=args.detailedness)
+
+    elapsed = time.perf_counter() - started
+    print(f"✅ パックを生成しました: {result['path']} "
+          f"（{result['entries']} 件, {result['bytes'] / 1024 / 1024:.1f}MB, {elapsed:.1f}秒）")
+    if result["skipped"]:
+        print(f"⚠️ 描画できない組み合わせを {result['skipped']} 件除外しました", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
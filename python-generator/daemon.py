@@ -0,0 +1,220 @@
+"""常駐型のレンダリングデーモン
+
+リクエストごとに `python3 main.py` を起動する代わりに、reportlab / svglib の
+インポートを済ませたワーカープールを常駐させ、JSON Lines でジョブを受け付ける。
+
+ジョブ（1行1JSON）:
+    {"id": "...", "data": {...名刺データ...}, "output": "/path/to/back.pdf"}
+    {"id": "...", "json": "/path/to/card.json"}   # main.py と同じ出力先規則
+    {"id": "...", "data": {...}, "output": "...", "front_output": "/path/to/front.pdf"}  # 表面も生成
+    {"id": "...", "data": {...}, "format": "svg"}  # プレビュー用SVGをレスポンスに含めて返す
+    {"id": "...", "data": {...}, "output": "...", "color_mode": "cmyk"}  # 印刷用のCMYKで出力
+
+レスポンス（1行1JSON）:
+    {"id": "...", "ok": true, "output": "/path/to/back.pdf"}
+    {"id": "...", "ok": true, "svg": "<svg ...>"}
+    {"id": "...", "ok": false, "error": "..."}
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import socketserver
+import sys
+import threading
+
+
+def init_worker(enable_metrics: bool = False):
+    """ワーカープロセスの初期化（重いインポートを一度だけ済ませる）"""
+    # ワーカー内のprintがプロトコル出力（stdout）に混ざらないようにする
+    sys.stdout = sys.stderr
+
+    if enable_metrics:
+        from meishi_back import metrics
+        metrics.enable()
+
+    import reportlab.pdfgen.canvas  # noqa: F401
+    import reportlab.graphics.renderPDF  # noqa: F401
+    import svglib.svglib  # noqa: F401
+    from meishi_back import create_back_design
+    from meishi_back.assets import get_logo_asset
+    from meishi_back.colors import get_palette
+    import meishi_back.preview  # noqa: F401
+    from meishi_front import register_fonts
+
+    for grid_type in ("isolation", "perspective", "hybrid"):
+        create_back_design(grid_type)
+    # ロゴを事前に解析してキャッシュしておく
+    get_logo_asset()
+    # パレットの色を事前に作っておく
+    get_palette()
+    # 表面のフォントを事前に登録しておく
+    register_fonts()
+
+
+def resolve_job(job: dict):
+    """ジョブから名刺データと出力パスを取り出す"""
+    if "json" in job:
+        json_path = job["json"]
+        with open(json_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        from main import build_pdf_filename
+        output_path = job.get("output") or os.path.join(
+            os.path.dirname(json_path), "pdf", build_pdf_filename(data))
+    else:
+        data = job.get("data")
+        if not isinstance(data, dict):
+            raise ValueError("ジョブに data または json が指定されていません")
+        output_path = job.get("output")
+        if not output_path:
+            raise ValueError("ジョブに output が指定されていません")
+    return data, output_path
+
+
+def run_job(job: dict) -> dict:
+    """1件のジョブを処理（generate_meishi_back と同じ挙動）"""
+    from main import generate_meishi_back
+    from meishi_back.colors import DEFAULT_COLOR_MODE
+
+    job_id = job.get("id")
+    if job.get("format") == "svg":
+        return run_preview_job(job)
+    try:
+        data, output_path = resolve_job(job)
+    except Exception as e:
+        return {"id": job_id, "ok": False, "error": str(e)}
+
+    front_output_path = job.get("front_output")
+    color_mode = job.get("color_mode", DEFAULT_COLOR_MODE)
+    if generate_meishi_back(data, output_path, front_output_path=front_output_path, color_mode=color_mode):
+        result = {"id": job_id, "ok": True, "output": output_path}
+        if front_output_path:
+            result["front_output"] = front_output_path
+        return result
+    return {"id": job_id, "ok": False, "output": output_path,
+            "error": "名刺の裏面の生成に失敗しました"}
+
+
+def run_preview_job(job: dict) -> dict:
+    """プレビュー用のSVGを描画してレスポンスに含める（ファイルには書き出さない）"""
+    from meishi_back.preview import render_back_svg
+
+    job_id = job.get("id")
+    try:
+        data = job.get("data")
+        if "json" in job:
+            with open(job["json"], 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        if not isinstance(data, dict):
+            raise ValueError("ジョブに data または json が指定されていません")
+        return {"id": job_id, "ok": True, "svg": render_back_svg(data)}
+    except Exception as e:
+        return {"id": job_id, "ok": False, "error": f"{type(e).__name__}: {e}"}
+
+
+class RenderDaemon:
+    """ワーカープールを保持してジョブを振り分ける"""
+
+    def __init__(self, workers: int = None, enable_metrics: bool = False):
+        self.workers = workers or os.cpu_count() or 1
+        self.pool = multiprocessing.Pool(processes=self.workers, initializer=init_worker,
+                                         initargs=(enable_metrics,))
+
+    def submit(self, line: str, respond):
+        """1行分のジョブを非同期で投入し、完了時にrespondを呼ぶ"""
+        line = line.strip()
+        if not line:
+            return
+        try:
+            job = json.loads(line)
+            if not isinstance(job, dict):
+                raise ValueError("ジョブはJSONオブジェクトである必要があります")
+        except ValueError as e:
+            respond({"id": None, "ok": False, "error": f"不正なジョブ: {e}"})
+            return
+
+        def on_error(e):
+            respond({"id": job.get("id"), "ok": False, "error": str(e)})
+
+        self.pool.apply_async(run_job, (job,), callback=respond, error_callback=on_error)
+
+    def close(self):
+        self.pool.close()
+        self.pool.join()
+
+
+def serve_stdio(daemon: RenderDaemon):
+    """stdin/stdout の JSON Lines でジョブを処理"""
+    out = sys.stdout
+    lock = threading.Lock()
+
+    def respond(result: dict):
+        with lock:
+            out.write(json.dumps(result, ensure_ascii=False) + "\n")
+            out.flush()
+
+    for line in sys.stdin:
+        daemon.submit(line, respond)
+    daemon.close()
+
+
+def serve_socket(daemon: RenderDaemon, socket_path: str):
+    """Unixソケットの JSON Lines でジョブを処理"""
+    if os.path.exists(socket_path):
+        os.unlink(socket_path)
+
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self):
+            lock = threading.Lock()
+            pending = threading.Semaphore(0)
+            count = 0
+
+            def respond(result: dict):
+                with lock:
+                    try:
+                        self.wfile.write((json.dumps(result, ensure_ascii=False) + "\n").encode("utf-8"))
+                        self.wfile.flush()
+                    except OSError:
+                        pass
+                pending.release()
+
+            for raw in self.rfile:
+                line = raw.decode("utf-8")
+                if not line.strip():
+                    continue
+                count += 1
+                daemon.submit(line, respond)
+
+            # クライアントが書き込みを閉じても、投入済みジョブの応答は返す
+            for _ in range(count):
+                pending.acquire()
+
+    server = socketserver.ThreadingUnixStreamServer(socket_path, Handler)
+    server.daemon_threads = True
+    print(f"✅ レンダリングデーモン起動中: {socket_path} (workers={daemon.workers})", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        os.unlink(socket_path)
+        daemon.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="名刺レンダリングデーモン")
+    parser.add_argument("--socket", help="待ち受けるUnixソケットのパス（省略時はstdin/stdout）")
+    parser.add_argument("--workers", type=int, default=None, help="ワーカープロセス数（既定: CPU数）")
+    parser.add_argument("--metrics", action="store_true", help="ワーカーの計測結果を標準エラー出力にJSONで書き出す")
+    args = parser.parse_args()
+
+    daemon = RenderDaemon(args.workers, enable_metrics=args.metrics)
+    if args.socket:
+        serve_socket(daemon, args.socket)
+    else:
+        serve_stdio(daemon)
+
+
+if __name__ == "__main__":
+    main()
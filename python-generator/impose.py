@@ -0,0 +1,76 @@
+"""裏面の面付けPDFの一括生成（印刷所への入稿用）
+
+batch.py と同じ入力（JSON Lines / CSV）を1件ずつ読み込み、SRA3/A3のシートにトンボ付きで並べる。
+sheets_per_file 枚ごとに別ファイル（{prefix}_001.pdf, {prefix}_002.pdf, ...）に分けて保存する。
+
+    python impose.py members.jsonl --output out/sheets --sheet SRA3 --report placements.jsonl
+"""
+import argparse
+import os
+import sys
+import time
+
+from batch import BatchReporter, InvalidRecord, iter_records
+from meishi_back.colors import COLOR_MODES, DEFAULT_COLOR_MODE
+from meishi_back.impose import DEFAULT_SHEETS_PER_FILE, GUTTER_MM, SHEET_SIZES, ImpositionWriter, SheetLayout
+
+
+def main():
+    parser = argparse.ArgumentParser(description="裏面の面付けPDFの一括生成")
+    parser.add_argument("input", help="入力ファイル（JSON Lines または CSV、\"-\" で標準入力）")
+    parser.add_argument("--format", choices=["jsonl", "csv"], help="入力形式（省略時は拡張子から判定）")
+    parser.add_argument("--output", required=True, help="出力PDFのパスの接頭辞（{output}_001.pdf などに保存）")
+    parser.add_argument("--sheet", choices=sorted(SHEET_SIZES), default="SRA3", help="シートの大きさ")
+    parser.add_argument("--gutter", type=float, default=GUTTER_MM,
+                        help="名刺の間の隙間（mm、0 で隙間なく並べて外周にだけトンボを付ける）")
+    parser.add_argument("--sheets-per-file", type=int, default=DEFAULT_SHEETS_PER_FILE,
+                        help="1ファイルに入れるシート数")
+    parser.add_argument("--precision", type=int, default=None, help="座標を丸める小数点以下の桁数（既定: 2）")
+    parser.add_argument("--color-mode", choices=COLOR_MODES, default=DEFAULT_COLOR_MODE,
+                        help="出力のカラースペース（cmyk は印刷用、トンボはレジストレーション）")
+    parser.add_argument("--report", help="配置レポート（JSON Lines）の出力先（省略時は標準出力）")
+    args = parser.parse_args()
+
+    if args.input != "-" and not os.path.exists(args.input):
+        print(f"❌ 入力ファイルが見つかりません: {args.input}", file=sys.stderr)
+        sys.exit(1)
+
+    layout = SheetLayout(args.sheet, gutter_mm=args.gutter)
+    options = {"precision": args.precision} if args.precision is not None else {}
+    writer = ImpositionWriter(args.output, layout, args.sheets_per_file, color_mode=args.color_mode, **options)
+    print(f"📐 {args.sheet}: {layout.columns}列 × {layout.rows}行 = {layout.per_sheet} 枚/シート", file=sys.stderr)
+
+    report = open(args.report, 'w', encoding='utf-8') if args.report else sys.stdout
+    reporter = BatchReporter(report, progress=sys.stderr)
+    started = time.perf_counter()
+    try:
+        for index, record in enumerate(iter_records(args.input, args.format)):
+            if isinstance(record, InvalidRecord):
+                reporter.add({"index": index, "ok": False, "error": str(record)})
+                continue
+            result = {"index": index, "employeeNumber": record.get("employeeNumber")}
+            try:
+                result.update(writer.add(record))
+                result["ok"] = True
+            except Exception as e:
+                result["ok"] = False
+                result["error"] = f"{type(e).__name__}: {e}"
+            reporter.add(result)
+        files = writer.close()
+        reporter.flush()
+    finally:
+        if report is not sys.stdout:
+            report.close()
+
+    elapsed = time.perf_counter() - started
+    summary = reporter.summary
+    print(f"✅ 面付け完了: {summary['succeeded']} 枚を {len(files)} ファイルに出力 / 失敗 {summary['failed']} 件 "
+          f"（{elapsed:.1f}秒）", file=sys.stderr)
+    for path in files:
+        print(f"📄 {path}", file=sys.stderr)
+    if summary["failed"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+"""SQLiteのジョブキューによる名刺の一括生成（大量注文用）
+
+batch.py と同じ入力（JSON Lines / CSV）をジョブとして登録し、複数のワーカープロセスで生成する。
+ジョブの状態はSQLiteファイルに残るため、途中で止まっても work を再実行すれば
+完了したジョブは飛ばして続きから生成する。
+
+    python jobs.py enqueue queue.sqlite members.jsonl --out-dir out/ --priority 10 --front
+    python jobs.py work queue.sqlite --workers 16
+    python jobs.py status queue.sqlite
+    python jobs.py requeue queue.sqlite        # 失敗したジョブをやり直す
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import time
+
+from batch import InvalidRecord, iter_records
+from daemon import init_worker
+from main import build_front_pdf_filename, build_pdf_filename, render_meishi_back
+from meishi_back.colors import COLOR_MODES, DEFAULT_COLOR_MODE
+from meishi_back.jobs import DEFAULT_LEASE_SECONDS, DEFAULT_MAX_ATTEMPTS, DONE, FAILED, JobQueue
+from meishi_back.spec import CardSpec
+
+
+def iter_jobs(records, out_dir: str, front: bool, options: dict, priority: int, max_attempts: int, errors: list):
+    """レコードを JobQueue.enqueue の引数に変換（不正なレコードは errors に入れて飛ばす）"""
+    for index, record in enumerate(records):
+        if isinstance(record, InvalidRecord):
+            errors.append(f"{index}: {record}")
+            continue
+        try:
+            CardSpec.from_dict(record)
+        except ValueError as e:
+            errors.append(f"{index}: {e}")
+            continue
+        yield {
+            "data": record,
+            "output": os.path.join(out_dir, build_pdf_filename(record)),
+            "front_output": os.path.join(out_dir, build_front_pdf_filename(record)) if front else None,
+            "options": options,
+            "priority": priority,
+            "max_attempts": max_attempts,
+        }
+
+
+def run_worker(db_path: str, lease_seconds: float, poll: float, forever: bool) -> int:
+    """ジョブを1件ずつリースして生成する（未完了のジョブが無くなれば終了）。処理した件数を返す"""
+    init_worker()
+    queue = JobQueue(db_path, lease_seconds)
+    processed = 0
+    try:
+        while True:
+            job = queue.claim()
+            if job is None:
+                # 他のワーカーが実行中のジョブは、そのワーカーが落ちた場合に備えてリースの期限まで待つ
+                if not forever and queue.pending() == 0:
+                    return processed
+                wait = queue.next_available_in()
+                time.sleep(poll if wait is None else min(poll, max(wait, 0.01)))
+                continue
+
+            try:
+                os.makedirs(os.path.dirname(job.output) or ".", exist_ok=True)
+                render_meishi_back(job.data, job.output, front_output_path=job.front_output, **job.options)
+            except KeyboardInterrupt:
+                queue.release(job)
+                raise
+            except Exception as e:
+                queue.fail(job, f"{type(e).__name__}: {e}")
+            else:
+                queue.complete(job)
+            processed += 1
+    except KeyboardInterrupt:
+        return processed
+    finally:
+        queue.close()
+
+
+def print_status(queue: JobQueue):
+    counts = queue.counts()
+    print("📊 " + " / ".join(f"{state} {count} 件" for state, count in counts.items()), file=sys.stderr)
+    for failure in queue.failures():
+        print(f"❌ {failure['output']}（{failure['attempts']} 回）: {failure['last_error']}", file=sys.stderr)
+    return counts
+
+
+def cmd_enqueue(args):
+    if args.input != "-" and not os.path.exists(args.input):
+        print(f"❌ 入力ファイルが見つかりません: {args.input}", file=sys.stderr)
+        sys.exit(1)
+
+    options = {}
+    if args.compact:
+        options["compact"] = True
+    if args.precision is not None:
+        options["precision"] = args.precision
+    if args.color_mode != DEFAULT_COLOR_MODE:
+        options["color_mode"] = args.color_mode
+
+    queue = JobQueue(args.db)
+    errors = []
+    try:
+        counts = queue.enqueue_many(iter_jobs(iter_records(args.input, args.format), args.out_dir, args.front,
+                                              options, args.priority, args.max_attempts, errors))
+    finally:
+        queue.close()
+
+    for error in errors:
+        print(f"⚠️ 登録できないレコード {error}", file=sys.stderr)
+    print(f"✅ ジョブを登録しました: {counts['added']} 件（内容を更新 {counts['updated']} 件、"
+          f"登録済みで飛ばした {counts['skipped']} 件、"
+          f"不正 {len(errors)} 件）", file=sys.stderr)
+    if errors:
+        sys.exit(1)
+
+
+def cmd_work(args):
+    workers = args.workers if args.workers > 0 else (os.cpu_count() or 1)
+    queue = JobQueue(args.db)
+    before = queue.counts()
+    print(f"⏳ {workers} ワーカーで生成を開始: 未完了 {queue.pending()} 件（完了済み {before[DONE]} 件は飛ばします）",
+          file=sys.stderr)
+
+    started = time.perf_counter()
+    processes = [multiprocessing.Process(target=run_worker, args=(args.db, args.lease, args.poll, args.forever))
+                 for _ in range(workers)]
+    for process in processes:
+        process.start()
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        # ワーカーは実行中のジョブを待ち状態に戻してから終了する
+        for process in processes:
+            process.join()
+        print("⚠️ 中断しました（work を再実行すると続きから生成します）", file=sys.stderr)
+
+    elapsed = time.perf_counter() - started
+    counts = print_status(queue)
+    queue.close()
+    print(f"✅ 生成完了: {counts[DONE] - before[DONE]} 件（{elapsed:.1f}秒）", file=sys.stderr)
+    if counts[FAILED]:
+        sys.exit(1)
+
+
+def cmd_status(args):
+    queue = JobQueue(args.db)
+    try:
+        print_status(queue)
+    finally:
+        queue.close()
+
+
+def cmd_requeue(args):
+    queue = JobQueue(args.db)
+    try:
+        count = queue.requeue_failed()
+    finally:
+        queue.close()
+    print(f"✅ 失敗したジョブを待ち状態に戻しました: {count} 件", file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SQLiteのジョブキューによる名刺の一括生成")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    enqueue = subparsers.add_parser("enqueue", help="入力のレコードをジョブとして登録")
+    enqueue.add_argument("db", help="ジョブキューのSQLiteファイル")
+    enqueue.add_argument("input", help="入力ファイル（JSON Lines または CSV、\"-\" で標準入力）")
+    enqueue.add_argument("--format", choices=["jsonl", "csv"], help="入力形式（省略時は拡張子から判定）")
+    enqueue.add_argument("--out-dir", required=True, help="PDFの出力先ディレクトリ")
+    enqueue.add_argument("--front", action="store_true", help="表面のPDFも出力")
+    enqueue.add_argument("--priority", type=int, default=0, help="優先度（大きいほど先に生成）")
+    enqueue.add_argument("--max-attempts", type=int, default=DEFAULT_MAX_ATTEMPTS, help="1件あたりの最大試行回数")
+    enqueue.add_argument("--compact", action="store_true", help="ロゴを共有する軽量PDFを出力")
+    enqueue.add_argument("--precision", type=int, default=None, help="座標を丸める小数点以下の桁数（--compact用）")
+    enqueue.add_argument("--color-mode", choices=COLOR_MODES, default=DEFAULT_COLOR_MODE,
+                         help="出力のカラースペース")
+    enqueue.set_defaults(func=cmd_enqueue)
+
+    work = subparsers.add_parser("work", help="ワーカーを起動してジョブを生成")
+    work.add_argument("db", help="ジョブキューのSQLiteファイル")
+    work.add_argument("--workers", type=int, default=0, help="ワーカープロセス数（0でCPU数）")
+    work.add_argument("--lease", type=float, default=DEFAULT_LEASE_SECONDS,
+                      help="リースの秒数（これを過ぎても終わらないジョブは他のワーカーがやり直す）")
+    work.add_argument("--poll", type=float, default=1.0, help="ジョブが無いときに待つ秒数")
+    work.add_argument("--forever", action="store_true", help="ジョブが無くなっても終了せずに待ち続ける")
+    work.set_defaults(func=cmd_work)
+
+    status = subparsers.add_parser("status", help="ジョブの状態ごとの件数と失敗の内容を表示")
+    status.add_argument("db", help="ジョブキューのSQLiteファイル")
+    status.set_defaults(func=cmd_status)
+
+    requeue = subparsers.add_parser("requeue", help="失敗したジョブを待ち状態に戻す")
+    requeue.add_argument("db", help="ジョブキューのSQLiteファイル")
+    requeue.set_defaults(func=cmd_requeue)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
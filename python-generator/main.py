@@ -1,68 +1,386 @@
 import argparse
+import io
 import os
 import json
-from reportlab.lib.pagesizes import mm
-from reportlab.pdfgen import canvas
+import sys
+from functools import partial
+from typing import Optional, Tuple, Union
+from reportlab.lib.units import mm
 from meishi_back import create_back_design
+from meishi_back import metrics
+from meishi_back.cache import get_render_cache, pattern_key
+from meishi_back.colors import COLOR_MODES, DEFAULT_COLOR_MODE, get_palette
+from meishi_back.pack import get_lattice_pack
+from meishi_back.spec import CardSpec, as_card_spec
 
 
-def generate_meishi_back(data: dict, output_path: str):
-    """名刺の裏面を生成"""
-    try:
-        # 名刺サイズ（91mm × 55mm）
-        width_mm = 91
-        height_mm = 55
-        width_pt, height_pt = width_mm * mm, height_mm * mm
-
-        # 出力ディレクトリが存在しない場合は作成
-        os.makedirs(os.path.dirname(output_path), exist_ok=True)
-
-        # PDFの設定
-        c = canvas.Canvas(
-            output_path,
-            pagesize=(width_pt + 6 * mm, height_pt + 6 * mm),
-            pageCompression=1,  # 圧縮を有効化
-            invariant=True,  # 再現性を確保
-            enforceColorSpace='rgb',  # カラースペースをRGBに固定
-            pdfVersion=(1, 4)  # PDFバージョンを1.4に固定（タプル形式で指定）
-        )
-
-        # 裏面を生成
-        grid_type = data.get("pattern", {}).get("grid", {}).get("type", "isolation")
-        back_design = create_back_design(grid_type)
-        back_design._generate_design(c, data)
-
-        # PDFを保存
+def _create_canvas(buffer: io.BytesIO, compact: bool = False, precision: Optional[int] = None,
+                   color_mode: str = DEFAULT_COLOR_MODE):
+    """名刺1枚分のCanvasを生成（compact=Trueでコンテンツストリームを小さくする、color_mode="cmyk"で印刷用のCMYK出力）"""
+    if color_mode not in COLOR_MODES:
+        raise ValueError(f"Unknown color mode: {color_mode}")
+    if compact:
+        from meishi_back.compact import CompactCanvas, DEFAULT_PRECISION
+        canvas_class = partial(CompactCanvas, precision=DEFAULT_PRECISION if precision is None else precision)
+    else:
+        from reportlab.pdfgen.canvas import Canvas as canvas_class
+
+    # 名刺サイズ（91mm × 55mm）
+    width_mm = 91
+    height_mm = 55
+    width_pt, height_pt = width_mm * mm, height_mm * mm
+
+    # PDFの設定（変更した場合は事前描画パックの PACK_VERSION を上げる）
+    return canvas_class(
+        buffer,
+        pagesize=(width_pt + 6 * mm, height_pt + 6 * mm),
+        pageCompression=1,  # 圧縮を有効化
+        invariant=True,  # 再現性を確保
+        enforceColorSpace=color_mode,  # カラースペースを固定（既定はRGB）
+        pdfVersion=(1, 4)  # PDFバージョンを1.4に固定（タプル形式で指定）
+    )
+
+
+def _render_back_pdf(card: Union[dict, CardSpec], compact: bool = False, precision: Optional[int] = None,
+                     color_mode: str = DEFAULT_COLOR_MODE) -> bytes:
+    """裏面PDFをメモリ上に描画してバイト列を返す（compact=Trueでコンテンツストリームを小さくする）"""
+    spec = as_card_spec(card)
+    buffer = io.BytesIO()
+    c = _create_canvas(buffer, compact, precision, color_mode)
+
+    # 裏面を生成
+    back_design = create_back_design(spec.grid_type)
+    back_design._generate_design(c, spec)
+
+    # PDFを保存
+    with metrics.stage("save"):
         c.save()
+    return buffer.getvalue()
+
+
+def _render_front_pdf(card: Union[dict, CardSpec], compact: bool = False, precision: Optional[int] = None,
+                      color_mode: str = DEFAULT_COLOR_MODE) -> bytes:
+    """表面PDFをメモリ上に描画してバイト列を返す"""
+    from meishi_front import create_front_design
+
+    spec = as_card_spec(card)
+    buffer = io.BytesIO()
+    c = _create_canvas(buffer, compact, precision, color_mode)
+
+    # 表面を生成
+    create_front_design()._generate_design(c, spec)
+
+    # PDFを保存
+    with metrics.stage("save"):
+        c.save()
+    return buffer.getvalue()
+
+
+def render_options(compact: bool = False, precision: Optional[int] = None,
+                   color_mode: str = DEFAULT_COLOR_MODE) -> dict:
+    """キャッシュのキーに含める出力オプション（通常の出力では空）"""
+    options = {"compact": precision if precision is not None else True} if compact else {}
+    if color_mode != DEFAULT_COLOR_MODE:
+        options["color"] = color_mode
+    palette = get_palette()
+    if palette.digest is not None:
+        options["palette"] = palette.digest
+    return options
+
+
+def render_back(card: Union[dict, CardSpec], compact: bool = False, precision: Optional[int] = None,
+                color_mode: str = DEFAULT_COLOR_MODE) -> bytes:
+    """名刺の裏面PDFをバイト列で返す（失敗時は例外を送出）"""
+    metrics.incr("renders")
+    try:
+        spec = as_card_spec(card)
+        with metrics.trace("render", grid_type=spec.grid_type, compact=compact, color=color_mode) as trace:
+            options = render_options(compact, precision, color_mode)
+            # 事前描画済みのパックにあれば、描画せずにそのまま返す（パックは通常の出力のみ）
+            pack = get_lattice_pack() if not options else None
+            if pack is not None:
+                with metrics.stage("pack_lookup"):
+                    pdf = pack.lookup(spec)
+                if pdf is not None:
+                    metrics.incr("pack_hits")
+                    if trace is not None:
+                        trace.fields.update(pack_hit=True, bytes=len(pdf))
+                    return pdf
+
+            # 裏面はパターンだけで決まるため、同じパターンはキャッシュ済みのPDFを使う
+            cache = get_render_cache()
+            with metrics.stage("cache_lookup"):
+                key = pattern_key(spec, **options) if cache else None
+                pdf = cache.get(key) if cache else None
+            cache_hit = pdf is not None
+            if cache_hit:
+                metrics.incr("cache_hits")
+            else:
+                pdf = _render_back_pdf(spec, compact, precision, color_mode)
+                if cache:
+                    cache.put(key, pdf)
+            if trace is not None:
+                trace.fields.update(cache_hit=cache_hit, bytes=len(pdf))
+        return pdf
+    except Exception:
+        metrics.incr("failures")
+        raise
+
+
+def render_front(card: Union[dict, CardSpec], compact: bool = False, precision: Optional[int] = None,
+                 color_mode: str = DEFAULT_COLOR_MODE) -> bytes:
+    """名刺の表面PDFをバイト列で返す（失敗時は例外を送出）"""
+    metrics.incr("front_renders")
+    try:
+        with metrics.trace("render_front", compact=compact, color=color_mode) as trace:
+            pdf = _render_front_pdf(card, compact, precision, color_mode)
+            if trace is not None:
+                trace.fields.update(bytes=len(pdf))
+        return pdf
+    except Exception:
+        metrics.incr("failures")
+        raise
+
+
+def render_card(card: Union[dict, CardSpec], compact: bool = False, precision: Optional[int] = None,
+                color_mode: str = DEFAULT_COLOR_MODE) -> Tuple[bytes, bytes]:
+    """名刺の裏面と表面のPDFを1回の呼び出しで生成して (裏面, 表面) を返す"""
+    spec = as_card_spec(card)
+    return (render_back(spec, compact, precision, color_mode),
+            render_front(spec, compact, precision, color_mode))
+
+
+def write_card_bundle(out, data: dict, compact: bool = False, precision: Optional[int] = None,
+                      folder_name: Optional[str] = None, color_mode: str = DEFAULT_COLOR_MODE) -> int:
+    """裏面と表面を生成し、入稿用フォルダのZIPを out に書き出す（書き出したバイト数を返す）"""
+    from meishi_back.bundle import write_bundle
+
+    back_pdf, front_pdf = render_card(data, compact, precision, color_mode)
+    with metrics.trace("bundle") as trace:
+        size = write_bundle(out, data, back_pdf, front_pdf, folder_name)
+        if trace is not None:
+            trace.fields.update(bytes=size)
+    return size
+
+
+def write_pdf(pdf: bytes, output_path: str):
+    """PDFをファイルに書き出す（出力ディレクトリが存在しない場合は作成）"""
+    os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+    with metrics.stage("write"):
+        with open(output_path, 'wb') as f:
+            f.write(pdf)
+    metrics.incr("bytes_written", len(pdf))
+
+
+def write_svg(svg: str, output_path: str):
+    """SVGをファイルに書き出す（出力ディレクトリが存在しない場合は作成）"""
+    os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+    with metrics.stage("write"):
+        with open(output_path, 'w', encoding='utf-8') as f:
+            f.write(svg)
+
+
+def render_meishi_back(data: Union[dict, CardSpec], output_path: str, compact: bool = False, precision: Optional[int] = None,
+                       front_output_path: Optional[str] = None, color_mode: str = DEFAULT_COLOR_MODE):
+    """名刺の裏面を生成（front_output_pathを指定すると表面も生成、失敗時は例外を送出）"""
+    if front_output_path:
+        pdf, front_pdf = render_card(data, compact, precision, color_mode)
+        write_pdf(front_pdf, front_output_path)
+    else:
+        pdf = render_back(data, compact, precision, color_mode)
+    write_pdf(pdf, output_path)
+
+
+def generate_meishi_back(data: Union[dict, CardSpec], output_path: str, compact: bool = False, precision: Optional[int] = None,
+                         front_output_path: Optional[str] = None, color_mode: str = DEFAULT_COLOR_MODE) -> bool:
+    """名刺の裏面を生成（成功時はTrueを返す）"""
+    try:
+        render_meishi_back(data, output_path, compact, precision, front_output_path, color_mode)
         print(f"✅ 名刺の裏面を生成しました: {output_path}")
+        if front_output_path:
+            print(f"✅ 名刺の表面を生成しました: {front_output_path}")
+        return True
 
     except Exception as e:
         print(f"⚠️ 名刺の裏面の生成に失敗しました: {e}")
         import traceback
         print("詳細なエラー情報:")
         print(traceback.format_exc())
+        return False
+
+
+def build_pdf_filename(data: dict) -> str:
+    """出力PDFのファイル名を生成（{employeeNumber}_{name}_back.pdf）"""
+    # null は未指定と同じに扱う（CardSpec は null を空文字として受け付ける）
+    employee_number = data.get("employeeNumber")
+    if employee_number is None:
+        employee_number = "unknown"
+    name_safe = str(data.get("name") or "noname").lower().replace(" ", "_")
+    return f"{employee_number}_{name_safe}_back.pdf"
+
+
+def build_front_pdf_filename(data: dict) -> str:
+    """表面PDFのファイル名を生成（{employeeNumber}_{name}_front.pdf、generate_front.jsx と同じ規則）"""
+    return build_pdf_filename(data)[:-len("_back.pdf")] + "_front.pdf"
+
+
+def report_compact_delta(data: Union[dict, CardSpec], compact_size: int, color_mode: str = DEFAULT_COLOR_MODE):
+    """コンパクト出力と通常の出力のサイズ差を標準エラー出力に表示（通常のPDFを描画し直すため --report-size の時だけ）"""
+    normal_size = len(render_back(data, color_mode=color_mode))
+    delta = (compact_size - normal_size) / normal_size * 100
+    print(f"📉 コンパクト出力: {normal_size}B → {compact_size}B ({delta:+.1f}%)", file=sys.stderr)
+
+
+# 終了コード
+EXIT_OK = 0
+EXIT_RENDER_FAILED = 1
+EXIT_INPUT_ERROR = 2
+
+
+def report_error(kind: str, message: str, exit_code: int):
+    """構造化したエラーを標準エラー出力に書き出して終了"""
+    error = {"ok": False, "error": kind, "message": message}
+    print(json.dumps(error, ensure_ascii=False), file=sys.stderr)
+    sys.exit(exit_code)
+
+
+def load_json(json_path: str) -> dict:
+    """名刺データのJSONを読み込む（"-" は標準入力）"""
+    if json_path == "-":
+        data = json.load(sys.stdin)
+    else:
+        with open(json_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    if not isinstance(data, dict):
+        raise ValueError("名刺データはJSONオブジェクトである必要があります")
+    return data
 
 
 def main():
     parser = argparse.ArgumentParser()
-    parser.add_argument("--json", required=True, help="名刺データのJSONファイルパス")
+    parser.add_argument("--json", required=True, help="名刺データのJSONファイルパス（\"-\" で標準入力）")
+    parser.add_argument("--output", help="出力PDFのパス（省略時はJSONと同じフォルダの pdf/ 配下）")
+    parser.add_argument("--stdout", action="store_true", help="PDFをファイルに書き出さず標準出力へ流す")
+    parser.add_argument("--svg", action="store_true", help="PDFの代わりにプレビュー用のSVGを出力（--output 省略時は標準出力）")
+    parser.add_argument("--front", action="store_true", help="裏面と同じフォルダに表面のPDFも出力")
+    parser.add_argument("--front-output", help="表面PDFの出力パス（--stdout と併用可）")
+    parser.add_argument("--bundle", help="裏面・表面・テンプレート一式を入稿用フォルダのZIPとして出力（\"-\" で標準出力）")
+    parser.add_argument("--bundle-name", help="ZIP内のフォルダ名（省略時は {YYMMDD}_{employeeNumber}_{name}_{office}）")
+    parser.add_argument("--compact", action="store_true", help="座標の丸めや冗長な演算子の削除で小さくしたPDFを出力")
+    parser.add_argument("--precision", type=int, default=None, help="--compact で座標を丸める小数点以下の桁数（既定: 2）")
+    parser.add_argument("--report-size", action="store_true",
+                        help="--compact の出力と通常の出力のサイズ差を表示（比較のため通常のPDFも描画する）")
+    parser.add_argument("--color-mode", choices=COLOR_MODES, default=DEFAULT_COLOR_MODE,
+                        help="出力のカラースペース（cmyk は印刷用、色はパレットのCMYK値を使う）")
+    parser.add_argument("--contact-sheet", help="裏面のパターン（グリッド × サイズ × 位置）の一覧を出力（\"-\" で標準出力、--svg でSVG）")
+    parser.add_argument("--sheet-grids", nargs="+", help="一覧に含めるグリッドの種類（既定: すべて）")
+    parser.add_argument("--sheet-sizes", nargs="+", help="一覧に含めるロゴのサイズ（既定: すべて）")
+    parser.add_argument("--sheet-positions", nargs="+", help="一覧に含めるロゴの位置（\"x,y\"、既定: 0,0 50,50 100,100）")
+    parser.add_argument("--metrics", action="store_true", help="処理時間の計測結果を標準エラー出力にJSONで書き出す")
     args = parser.parse_args()
 
+    if args.metrics:
+        metrics.enable()
+
     json_path = args.json
-    if not os.path.exists(json_path):
-        print(f"❌ JSONファイルが見つかりません: {json_path}")
-        return
+    if json_path != "-" and not os.path.exists(json_path):
+        print(f"❌ JSONファイルが見つかりません: {json_path}", file=sys.stderr)
+        report_error("json_not_found", json_path, EXIT_INPUT_ERROR)
+    if json_path == "-" and not (args.stdout or args.output or args.svg or args.bundle or args.contact_sheet):
+        report_error("output_required", "標準入力を使う場合は --stdout か --output を指定してください", EXIT_INPUT_ERROR)
+
+    try:
+        with metrics.trace("load", path=json_path), metrics.stage("json_load"):
+            data = load_json(json_path)
+    except ValueError as e:
+        report_error("invalid_json", str(e), EXIT_INPUT_ERROR)
+    # 名刺データは読み込んだ時点で1回だけ検証する（以降は CardSpec を使う）
+    try:
+        spec = CardSpec.from_dict(data)
+    except ValueError as e:
+        report_error("invalid_card", str(e), EXIT_INPUT_ERROR)
+
+    if args.contact_sheet:
+        from meishi_back.contact_sheet import (DEFAULT_POSITIONS, build_variants, parse_position,
+                                               render_contact_sheet_pdf, render_contact_sheet_svg)
+        try:
+            positions = [parse_position(p) for p in args.sheet_positions] if args.sheet_positions else DEFAULT_POSITIONS
+            build_variants(spec, args.sheet_grids, args.sheet_sizes, positions)
+        except ValueError as e:
+            report_error("invalid_option", str(e), EXIT_INPUT_ERROR)
+        try:
+            if args.svg:
+                sheet = render_contact_sheet_svg(spec, args.sheet_grids, args.sheet_sizes, positions)
+            else:
+                sheet = render_contact_sheet_pdf(spec, args.sheet_grids, args.sheet_sizes, positions, args.color_mode)
+        except Exception as e:
+            report_error("render_failed", f"{type(e).__name__}: {e}", EXIT_RENDER_FAILED)
+        if args.contact_sheet == "-":
+            if args.svg:
+                sys.stdout.write(sheet)
+                sys.stdout.flush()
+            else:
+                sys.stdout.buffer.write(sheet)
+                sys.stdout.buffer.flush()
+        elif args.svg:
+            write_svg(sheet, args.contact_sheet)
+        else:
+            write_pdf(sheet, args.contact_sheet)
+        sys.exit(EXIT_OK)
+
+    if args.svg:
+        from meishi_back.preview import render_back_svg
+        try:
+            svg = render_back_svg(spec)
+        except Exception as e:
+            report_error("render_failed", f"{type(e).__name__}: {e}", EXIT_RENDER_FAILED)
+        if args.output:
+            write_svg(svg, args.output)
+        else:
+            sys.stdout.write(svg)
+            sys.stdout.flush()
+        sys.exit(EXIT_OK)
 
-    with open(json_path, 'r', encoding='utf-8') as f:
-        data = json.load(f)
+    if args.bundle:
+        try:
+            if args.bundle == "-":
+                size = write_card_bundle(sys.stdout.buffer, data, args.compact, args.precision, args.bundle_name,
+                                         args.color_mode)
+                sys.stdout.buffer.flush()
+            else:
+                os.makedirs(os.path.dirname(os.path.abspath(args.bundle)), exist_ok=True)
+                with open(args.bundle, 'wb') as f:
+                    size = write_card_bundle(f, data, args.compact, args.precision, args.bundle_name,
+                                             args.color_mode)
+        except Exception as e:
+            report_error("render_failed", f"{type(e).__name__}: {e}", EXIT_RENDER_FAILED)
+        metrics.incr("bytes_written", size)
+        sys.exit(EXIT_OK)
 
-    employee_number = data.get("employeeNumber", "unknown")
-    name_safe = data.get("name", "noname").lower().replace(" ", "_")
-    pdf_filename = f"{employee_number}_{name_safe}_back.pdf"
-    folder_path = os.path.dirname(json_path)
-    pdf_path = os.path.join(folder_path, "pdf", pdf_filename)
+    if args.stdout:
+        try:
+            if args.front_output:
+                pdf, front_pdf = render_card(spec, args.compact, args.precision, args.color_mode)
+                write_pdf(front_pdf, args.front_output)
+            else:
+                pdf = render_back(spec, args.compact, args.precision, args.color_mode)
+        except Exception as e:
+            report_error("render_failed", f"{type(e).__name__}: {e}", EXIT_RENDER_FAILED)
+        sys.stdout.buffer.write(pdf)
+        sys.stdout.buffer.flush()
+        metrics.incr("bytes_written", len(pdf))
+        if args.compact and args.report_size:
+            report_compact_delta(spec, len(pdf), args.color_mode)
+        sys.exit(EXIT_OK)
 
-    generate_meishi_back(data, pdf_path)
+    pdf_path = args.output or os.path.join(os.path.dirname(json_path), "pdf", build_pdf_filename(data))
+    front_pdf_path = args.front_output
+    if args.front and not front_pdf_path:
+        front_pdf_path = os.path.join(os.path.dirname(pdf_path), build_front_pdf_filename(data))
+    if not generate_meishi_back(spec, pdf_path, args.compact, args.precision, front_pdf_path, args.color_mode):
+        report_error("render_failed", f"名刺の裏面の生成に失敗しました: {pdf_path}", EXIT_RENDER_FAILED)
+    if args.compact and args.report_size:
+        report_compact_delta(spec, os.path.getsize(pdf_path), args.color_mode)
 
 
 if __name__ == "__main__":
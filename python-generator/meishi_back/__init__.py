@@ -1,18 +1,31 @@
-from .isolation import IsolationBackDesign
-from .perspective import PerspectiveBackDesign
-from .hybrid import HybridBackDesign
+import importlib
+
+# 裏面デザインのタイプ → (モジュール名, クラス名)
+# モジュールは初めて使うときに読み込む（起動時に numpy などを読み込まないため）
+DESIGN_CLASSES = {
+    "isolation": ("isolation", "IsolationBackDesign"),
+    "perspective": ("perspective", "PerspectiveBackDesign"),
+    "hybrid": ("hybrid", "HybridBackDesign"),
+}
+
+
+def _load_design_class(module_name: str, class_name: str):
+    module = importlib.import_module(f".{module_name}", __name__)
+    return getattr(module, class_name)
 
 
 def create_back_design(grid_type: str):
     """裏面デザインのタイプに応じたインスタンスを生成"""
-    design_map = {
-        "isolation": IsolationBackDesign,
-        "perspective": PerspectiveBackDesign,
-        "hybrid": HybridBackDesign
-    }
-    
-    design_class = design_map.get(grid_type)
-    if not design_class:
+    entry = DESIGN_CLASSES.get(grid_type)
+    if not entry:
         raise ValueError(f"Unknown grid type: {grid_type}")
     
-    return design_class()
+    return _load_design_class(*entry)()
+
+
+def __getattr__(name: str):
+    """`from meishi_back import IsolationBackDesign` などを遅延読み込みで提供"""
+    for module_name, class_name in DESIGN_CLASSES.values():
+        if class_name == name:
+            return _load_design_class(module_name, class_name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,252 @@
+import copy
+import hashlib
+import os
+import pickle
+import re
+import threading
+from collections import OrderedDict
+from typing import Optional, Tuple, TYPE_CHECKING
+from . import metrics
+from .colors import rgb_to_cmyk
+
+# reportlab / svglib は読み込みが重いため、実際に使うときまでインポートしない
+if TYPE_CHECKING:
+    from reportlab.pdfgen import canvas
+    from reportlab.graphics.shapes import Drawing
+
+
+# ロゴキャッシュに保持する最大件数（ブランドロゴが増えた場合の上限）
+MAX_CACHED_LOGOS = 8
+
+# 事前コンパイル済みロゴの形式を変えたときに上げる
+PRECOMPILED_VERSION = 2
+PRECOMPILED_SUFFIX = ".rlg.pickle"
+
+DEFAULT_LOGO_PATH = os.path.join(os.path.dirname(__file__), "..", "assets", "DL_LOGO_HorizontalStacked_Black_CMYK.svg")
+
+
+def convert_svg_colors_to_cmyk(drawing: "Drawing"):
+    """SVGのRGBカラーをCMYKに変換（同じ色は同じCMYKColorを使い回す）"""
+    from reportlab.lib.colors import CMYKColor, Color
+
+    converted = {}
+
+    def to_cmyk(color):
+        if not isinstance(color, Color) or isinstance(color, CMYKColor):
+            return color
+        key = (color.red, color.green, color.blue)
+        cmyk = converted.get(key)
+        if cmyk is None:
+            cmyk = converted[key] = CMYKColor(*rgb_to_cmyk(color.red, color.green, color.blue))
+        return cmyk
+
+    # 入れ子が深いSVGでも再帰の上限に当たらないよう、スタックで辿る
+    stack = [drawing]
+    while stack:
+        node = stack.pop()
+        for item in getattr(node, 'contents', ()):
+            if hasattr(item, 'fillColor'):
+                item.fillColor = to_cmyk(item.fillColor)
+            if hasattr(item, 'strokeColor'):
+                item.strokeColor = to_cmyk(item.strokeColor)
+            stack.append(item)
+
+
+def parse_view_box(svg_content: str) -> Optional[Tuple[float, float, float, float]]:
+    """SVGのviewBox属性を取得"""
+    viewbox_match = re.search(r'viewBox="([^"]*)"', svg_content)
+    if not viewbox_match:
+        return None
+    values = viewbox_match.group(1).replace(",", " ").split()
+    if len(values) < 4:
+        return None
+    return tuple(float(v) for v in values[:4])
+
+
+class LogoAsset:
+    """解析済みのロゴ（DrawingとviewBox情報）"""
+
+    def __init__(self, path: str, mtime: float, drawing: "Drawing", view_box: Optional[Tuple[float, float, float, float]],
+                 svg_source: Optional[str] = None, cmyk_drawing: Optional["Drawing"] = None, digest: str = ""):
+        self.path = path
+        self.mtime = mtime
+        # SVGの内容のハッシュ（更新時刻と違い、チェックアウトや touch では変わらない）
+        self.digest = digest
+        self.drawing = drawing
+        self.view_box = view_box
+        self.svg_source = svg_source  # SVGプレビューで埋め込む元のSVG
+        self._cmyk_drawing = cmyk_drawing  # 事前コンパイル時に変換済みならそれを使う
+        self._lock = threading.Lock()
+
+    @property
+    def cmyk_drawing(self) -> "Drawing":
+        """CMYKに変換したDrawing（初回のみ変換し、以降は使い回す）"""
+        if self._cmyk_drawing is None:
+            with self._lock:
+                if self._cmyk_drawing is None:
+                    drawing = copy.deepcopy(self.drawing)
+                    convert_svg_colors_to_cmyk(drawing)
+                    self._cmyk_drawing = drawing
+        return self._cmyk_drawing
+
+    def drawing_for(self, c: "canvas.Canvas") -> "Drawing":
+        """キャンバスのカラースペースに合ったDrawingを選ぶ"""
+        from reportlab.lib.colors import _enforceCMYK
+
+        # RGB固定のキャンバスにCMYKの有彩色は描けないため、CMYK固定の場合のみ変換済みを使う
+        if getattr(c, '_enforceColorSpace', None) is _enforceCMYK:
+            return self.cmyk_drawing
+        return self.drawing
+
+    @property
+    def aspect_ratio(self) -> float:
+        """viewBoxから求めたアスペクト比（viewBoxが無い場合は2.5）"""
+        if self.view_box:
+            return self.view_box[2] / self.view_box[3]
+        return 2.5  # デフォルト値
+
+    @property
+    def view_box_height(self) -> float:
+        """viewBoxの高さ（viewBoxが無い場合は100）"""
+        if self.view_box:
+            return self.view_box[3]
+        return 100  # デフォルト値
+
+    def draw(self, c: "canvas.Canvas", x: float, y: float, width: float, height: float):
+        """共有のDrawingを変更せず、キャンバスの変換行列でスケーリングして描画"""
+        if hasattr(c, "draw_logo_form"):
+            # コンパクト出力では共有のフォームXObjectとして描画する
+            with metrics.stage("logo_draw"):
+                c.draw_logo_form(self, x, y, width, height)
+            return
+
+        if hasattr(c, "draw_logo_svg"):
+            # SVGプレビューではDrawingを経由せず元のSVGを埋め込む
+            with metrics.stage("logo_draw"):
+                c.draw_logo_svg(self, x, y, width, height)
+            return
+
+        from reportlab.graphics.renderPDF import draw
+
+        drawing = self.drawing_for(c)
+        scale = min(width / drawing.width, height / drawing.height)
+        with metrics.stage("logo_draw"):
+            c.saveState()
+            c.translate(x, y)
+            c.scale(scale, scale)
+            draw(drawing, c, 0, 0)
+            c.restoreState()
+
+
+_cache: "OrderedDict[Tuple[str, float], LogoAsset]" = OrderedDict()
+_lock = threading.Lock()
+
+
+def precompiled_logo_path(path: str) -> str:
+    """事前コンパイル済みロゴのパス（SVGと同じ場所に置く）"""
+    return os.path.splitext(path)[0] + PRECOMPILED_SUFFIX
+
+
+def _reportlab_version() -> str:
+    from reportlab import Version
+    return Version
+
+
+def _load_precompiled(path: str, digest: str) -> Optional[dict]:
+    """SVGの内容と一致する事前コンパイル済みのDrawing（RGBとCMYK）があれば読み込む"""
+    compiled_path = precompiled_logo_path(path)
+    if not os.path.exists(compiled_path):
+        return None
+    try:
+        with open(compiled_path, 'rb') as f:
+            payload = pickle.load(f)
+    except Exception:
+        return None
+    if (payload.get("version") != PRECOMPILED_VERSION
+            or payload.get("source_sha256") != digest
+            or payload.get("reportlab") != _reportlab_version()):
+        return None
+    return payload
+
+
+def _parse_svg(path: str) -> "Drawing":
+    """svglibでSVGを解析"""
+    from svglib.svglib import svg2rlg
+
+    try:
+        drawing = svg2rlg(path)
+    except Exception as e:
+        raise ValueError(f"ロゴの読み込みに失敗しました: {str(e)}")
+    if drawing is None:
+        raise ValueError(f"ロゴの読み込みに失敗しました: {path}")
+    return drawing
+
+
+def _load_logo_asset(path: str, mtime: float) -> LogoAsset:
+    """ロゴを読み込んでLogoAssetを生成（事前コンパイル済みのものがあればsvglibを使わない）"""
+    with open(path, 'rb') as f:
+        svg_bytes = f.read()
+    digest = hashlib.sha256(svg_bytes).hexdigest()
+    svg_source = svg_bytes.decode('utf-8')
+    view_box = parse_view_box(svg_source)
+
+    with metrics.stage("logo_load"):
+        payload = _load_precompiled(path, digest)
+    if payload is not None:
+        return LogoAsset(path, mtime, payload["drawing"], view_box, svg_source, payload["cmyk_drawing"], digest)
+    with metrics.stage("logo_parse"):
+        drawing = _parse_svg(path)
+    return LogoAsset(path, mtime, drawing, view_box, svg_source, digest=digest)
+
+
+def build_precompiled_logo(path: str = DEFAULT_LOGO_PATH) -> str:
+    """SVGを解析したDrawing（CMYKに変換したものも）を書き出し、通常の描画でsvglibを使わずに済むようにする"""
+    path = os.path.abspath(path)
+    with open(path, 'rb') as f:
+        svg_bytes = f.read()
+    drawing = _parse_svg(path)
+    cmyk_drawing = copy.deepcopy(drawing)
+    convert_svg_colors_to_cmyk(cmyk_drawing)
+    payload = {
+        "version": PRECOMPILED_VERSION,
+        "source_sha256": hashlib.sha256(svg_bytes).hexdigest(),
+        "reportlab": _reportlab_version(),
+        "drawing": drawing,
+        "cmyk_drawing": cmyk_drawing,
+    }
+    compiled_path = precompiled_logo_path(path)
+    tmp_path = f"{compiled_path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        pickle.dump(payload, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, compiled_path)
+    return compiled_path
+
+
+def get_logo_asset(path: str = DEFAULT_LOGO_PATH) -> LogoAsset:
+    """パスと更新時刻をキーにキャッシュされたロゴを取得"""
+    path = os.path.abspath(path)
+    mtime = os.path.getmtime(path)
+    key = (path, mtime)
+
+    with _lock:
+        asset = _cache.get(key)
+        if asset is not None:
+            _cache.move_to_end(key)
+            return asset
+
+    asset = _load_logo_asset(path, mtime)
+
+    with _lock:
+        # 同じパスの古い版は破棄する
+        for stale in [k for k in _cache if k[0] == path]:
+            del _cache[stale]
+        _cache[key] = asset
+        while len(_cache) > MAX_CACHED_LOGOS:
+            _cache.popitem(last=False)
+    return asset
+
+
+def clear_logo_cache():
+    """ロゴキャッシュを空にする"""
+    with _lock:
+        _cache.clear()
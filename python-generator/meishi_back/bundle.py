@@ -0,0 +1,251 @@
+"""入稿用フォルダのZIPを直接書き出す
+
+Node 側がフォルダを作ってテンプレートを複製し、archiver で圧縮し直していた内容と同じ構成の
+ZIP を、ディスクにフォルダを作らずに1回の書き出しで生成する。
+
+    {folder}/{employeeNumber}_{name}.json
+    {folder}/ai/front_template.ai            事前に圧縮したエントリをそのまま書き出す
+    {folder}/ai/scripts/generate_front.jsx
+    {folder}/ai/variables/data.csv
+    {folder}/ai/links/
+    {folder}/pdf/{employeeNumber}_{name}_back.pdf    無圧縮（PDFは既に圧縮済み）
+    {folder}/pdf/{employeeNumber}_{name}_front.pdf
+
+各エントリは書き出す前に内容がすべて手元にあるため、CRCとサイズをローカルヘッダに書き、
+シークせずに先頭から順に出力する（標準出力やソケットにもそのまま流せる）。
+"""
+import hashlib
+import json
+import os
+import pickle
+import re
+import struct
+import threading
+import zlib
+from datetime import datetime, timezone
+from typing import BinaryIO, Dict, List, Optional, Tuple
+from . import metrics
+
+
+TEMPLATE_DIR = os.path.join(os.path.dirname(__file__), "..", "..", "node-backend", "assets")
+FRONT_TEMPLATE_PATH = os.path.join(TEMPLATE_DIR, "front_template.ai")
+FRONT_SCRIPT_PATH = os.path.join(TEMPLATE_DIR, "generate_front.jsx")
+
+# 事前圧縮したエントリの保存先（python-generator/assets 配下）
+PRECOMPRESSED_DIR = os.path.join(os.path.dirname(__file__), "..", "assets")
+PRECOMPRESSED_SUFFIX = ".deflate.pickle"
+# 事前圧縮の形式を変えたときに上げる
+PRECOMPRESSED_VERSION = 1
+
+CSV_HEADER = "employeeNumber,nameJa,name,businessTitle,tel,email,office"
+
+_LOCAL_HEADER = struct.Struct("<IHHHHHIIIHH")
+_CENTRAL_HEADER = struct.Struct("<IHHHHHHIIIHHHHHII")
+_END_OF_CENTRAL_DIRECTORY = struct.Struct("<IHHHHIIH")
+
+_STORED = 0
+_DEFLATED = 8
+# UTF-8のファイル名
+_FLAGS = 0x0800
+_VERSION = 20
+_VERSION_MADE_BY = (3 << 8) | _VERSION  # UNIX
+_FILE_ATTRIBUTES = 0o100644 << 16
+_DIRECTORY_ATTRIBUTES = (0o40755 << 16) | 0x10
+_MAX_SIZE = 0xFFFFFFFF
+
+
+class CompressedEntry:
+    """圧縮済みのエントリの中身（CRC・元のサイズ・deflate済みのバイト列）"""
+
+    def __init__(self, crc: int, size: int, data: bytes, method: int = _DEFLATED):
+        self.crc = crc
+        self.size = size
+        self.data = data
+        self.method = method
+
+    @classmethod
+    def compress(cls, data: bytes, level: int = 9) -> "CompressedEntry":
+        compressor = zlib.compressobj(level, zlib.DEFLATED, -15)
+        compressed = compressor.compress(data) + compressor.flush()
+        return cls(zlib.crc32(data), len(data), compressed)
+
+    @classmethod
+    def stored(cls, data: bytes) -> "CompressedEntry":
+        return cls(zlib.crc32(data), len(data), data, _STORED)
+
+
+class ZipStreamWriter:
+    """シークせずに先頭から順にZIPを書き出す"""
+
+    def __init__(self, out: BinaryIO, date_time: Optional[datetime] = None):
+        self.out = out
+        self.offset = 0
+        self._central: List[bytes] = []
+        self._dos_time, self._dos_date = _dos_date_time(date_time or datetime.now())
+
+    def _write(self, data: bytes):
+        self.out.write(data)
+        self.offset += len(data)
+
+    def add_entry(self, name: str, entry: CompressedEntry, directory: bool = False):
+        """圧縮済みのエントリをそのまま書き出す"""
+        if self.offset > _MAX_SIZE or len(entry.data) > _MAX_SIZE or entry.size > _MAX_SIZE:
+            raise ValueError("4GBを超えるZIPには対応していません")
+        encoded_name = name.encode("utf-8")
+        header_offset = self.offset
+        self._write(_LOCAL_HEADER.pack(
+            0x04034B50, _VERSION, _FLAGS, entry.method, self._dos_time, self._dos_date,
+            entry.crc, len(entry.data), entry.size, len(encoded_name), 0))
+        self._write(encoded_name)
+        self._write(entry.data)
+        self._central.append(_CENTRAL_HEADER.pack(
+            0x02014B50, _VERSION_MADE_BY, _VERSION, _FLAGS, entry.method, self._dos_time, self._dos_date,
+            entry.crc, len(entry.data), entry.size, len(encoded_name), 0, 0, 0, 0,
+            _DIRECTORY_ATTRIBUTES if directory else _FILE_ATTRIBUTES, header_offset) + encoded_name)
+
+    def add_bytes(self, name: str, data: bytes, compress: bool = True):
+        """メモリ上のデータを追加（compress=Falseで無圧縮）"""
+        self.add_entry(name, CompressedEntry.compress(data, 6) if compress else CompressedEntry.stored(data))
+
+    def add_directory(self, name: str):
+        self.add_entry(name.rstrip("/") + "/", CompressedEntry.stored(b""), directory=True)
+
+    def close(self) -> int:
+        """セントラルディレクトリを書き出し、ZIP全体のバイト数を返す"""
+        directory_offset = self.offset
+        for record in self._central:
+            self._write(record)
+        directory_size = self.offset - directory_offset
+        if len(self._central) > 0xFFFF or directory_offset > _MAX_SIZE:
+            raise ValueError("エントリ数または大きさがZIPの上限を超えています")
+        self._write(_END_OF_CENTRAL_DIRECTORY.pack(
+            0x06054B50, 0, 0, len(self._central), len(self._central), directory_size, directory_offset, 0))
+        return self.offset
+
+
+def _dos_date_time(date_time: datetime) -> Tuple[int, int]:
+    """ZIPのタイムスタンプ（MS-DOS形式）"""
+    year = max(date_time.year, 1980)
+    dos_time = (date_time.hour << 11) | (date_time.minute << 5) | (date_time.second // 2)
+    dos_date = ((year - 1980) << 9) | (date_time.month << 5) | date_time.day
+    return dos_time, dos_date
+
+
+_entries: Dict[Tuple[str, float], CompressedEntry] = {}
+_entries_lock = threading.Lock()
+
+
+def precompressed_path(path: str) -> str:
+    """事前圧縮したエントリの保存先"""
+    return os.path.join(PRECOMPRESSED_DIR, os.path.basename(path) + PRECOMPRESSED_SUFFIX)
+
+
+def _load_precompressed(path: str, digest: str) -> Optional[CompressedEntry]:
+    """元ファイルの内容と一致する事前圧縮済みのエントリがあれば読み込む"""
+    compressed_path = precompressed_path(path)
+    if not os.path.exists(compressed_path):
+        return None
+    try:
+        with open(compressed_path, 'rb') as f:
+            payload = pickle.load(f)
+    except Exception:
+        return None
+    if payload.get("version") != PRECOMPRESSED_VERSION or payload.get("source_sha256") != digest:
+        return None
+    return CompressedEntry(payload["crc"], payload["size"], payload["data"])
+
+
+def build_precompressed_entry(path: str = FRONT_TEMPLATE_PATH) -> str:
+    """ファイルを圧縮したエントリを書き出し、バンドルの生成時に圧縮し直さずに済むようにする"""
+    path = os.path.abspath(path)
+    with open(path, 'rb') as f:
+        source = f.read()
+    entry = CompressedEntry.compress(source)
+    payload = {
+        "version": PRECOMPRESSED_VERSION,
+        "source_sha256": hashlib.sha256(source).hexdigest(),
+        "crc": entry.crc,
+        "size": entry.size,
+        "data": entry.data,
+    }
+    compressed_path = precompressed_path(path)
+    tmp_path = f"{compressed_path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        pickle.dump(payload, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, compressed_path)
+    return compressed_path
+
+
+def get_compressed_entry(path: str) -> CompressedEntry:
+    """パスと更新時刻をキーにキャッシュされた圧縮済みのエントリを取得（プロセス内で1回だけ圧縮）"""
+    path = os.path.abspath(path)
+    key = (path, os.path.getmtime(path))
+    with _entries_lock:
+        entry = _entries.get(key)
+        if entry is not None:
+            return entry
+
+        with metrics.stage("bundle_asset_load"):
+            with open(path, 'rb') as f:
+                source = f.read()
+            entry = _load_precompressed(path, hashlib.sha256(source).hexdigest())
+            if entry is None:
+                entry = CompressedEntry.compress(source)
+        for stale in [k for k in _entries if k[0] == path]:
+            del _entries[stale]
+        _entries[key] = entry
+    return entry
+
+
+def _text(data: dict, key: str) -> str:
+    """名刺データの値の文字列（未指定と null は空文字）"""
+    value = data.get(key)
+    return "" if value is None else str(value)
+
+
+def safe_name(name: str) -> str:
+    """ファイル名に使う名前（Node 側の name.toLowerCase().replace(/\\s+/g, "_") と同じ）"""
+    return re.sub(r"\s+", "_", name.lower())
+
+
+def default_folder_name(data: dict, date_time: Optional[datetime] = None) -> str:
+    """フォルダ名（{YYMMDD}_{employeeNumber}_{name}_{office}、日付はUTC）"""
+    date_time = date_time or datetime.now(timezone.utc)
+    return f"{date_time:%y%m%d}_{_text(data, 'employeeNumber')}_{safe_name(_text(data, 'name'))}_{_text(data, 'office')}"
+
+
+def build_csv(data: dict) -> str:
+    """generate_front.jsx が読み込む variables/data.csv（Node 側と同じく値はそのまま連結する）"""
+    roll = data.get("roll") or ""
+    second_roll = data.get("secondRoll") or ""
+    business_title = f"{roll} / {second_roll}" if second_roll else roll
+    values = [data.get("employeeNumber"), data.get("nameJa"), data.get("name"), business_title,
+              data.get("tel"), data.get("email"), data.get("office")]
+    return "\n".join([CSV_HEADER, ",".join("" if v is None else str(v) for v in values)])
+
+
+def write_bundle(out: BinaryIO, data: dict, back_pdf: bytes, front_pdf: Optional[bytes] = None,
+                 folder_name: Optional[str] = None, date_time: Optional[datetime] = None) -> int:
+    """入稿用フォルダのZIPを out に書き出し、書き出したバイト数を返す"""
+    folder = folder_name or default_folder_name(data)
+    base_name = f"{_text(data, 'employeeNumber')}_{safe_name(_text(data, 'name'))}"
+
+    with metrics.stage("bundle"):
+        writer = ZipStreamWriter(out, date_time)
+        writer.add_directory(folder)
+        writer.add_bytes(f"{folder}/{base_name}.json",
+                         json.dumps(data, ensure_ascii=False, indent=2).encode("utf-8"))
+        writer.add_directory(f"{folder}/ai")
+        writer.add_entry(f"{folder}/ai/front_template.ai", get_compressed_entry(FRONT_TEMPLATE_PATH))
+        writer.add_directory(f"{folder}/ai/links")
+        writer.add_directory(f"{folder}/ai/scripts")
+        writer.add_entry(f"{folder}/ai/scripts/generate_front.jsx", get_compressed_entry(FRONT_SCRIPT_PATH))
+        writer.add_directory(f"{folder}/ai/variables")
+        writer.add_bytes(f"{folder}/ai/variables/data.csv", build_csv(data).encode("utf-8"))
+        writer.add_directory(f"{folder}/pdf")
+        writer.add_bytes(f"{folder}/pdf/{base_name}_back.pdf", back_pdf, compress=False)
+        if front_pdf is not None:
+            writer.add_bytes(f"{folder}/pdf/{base_name}_front.pdf", front_pdf, compress=False)
+        size = writer.close()
+    metrics.incr("bundle_bytes", size)
+    return size
@@ -0,0 +1,158 @@
+import os
+import threading
+from collections import OrderedDict
+from typing import Optional, Union, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .spec import CardSpec
+
+
+# 既定値（環境変数で上書きできる）
+DEFAULT_MEMORY_ENTRIES = 64
+DEFAULT_DISK_MAX_BYTES = 256 * 1024 * 1024
+
+
+def normalize_pattern(card: Union[dict, "CardSpec"]) -> dict:
+    """裏面デザインに影響する値だけを正規化して取り出す（氏名や社員番号は含めない）"""
+    from .spec import as_card_spec
+
+    return as_card_spec(card).pattern()
+
+
+def pattern_key(card: Union[dict, "CardSpec"], **options) -> str:
+    """正規化したパターン（と出力オプション）の正準ハッシュ
+
+    事前描画パックと同じデザインの指紋（描画に使うソース、ロゴとパレットの内容）を含めるため、
+    デザインやロゴを変えると古いキャッシュは使われなくなる。
+    """
+    from .pack import design_fingerprint
+    from .spec import as_card_spec
+
+    return as_card_spec(card).pattern_key(design_fingerprint().hex(), **options)
+
+
+class RenderCache:
+    """裏面PDFのキャッシュ（メモリ上のLRUとサイズ上限付きのディスク）"""
+
+    def __init__(self, memory_entries: int = DEFAULT_MEMORY_ENTRIES, disk_dir: Optional[str] = None,
+                 disk_max_bytes: int = DEFAULT_DISK_MAX_BYTES):
+        self.memory_entries = memory_entries
+        self.disk_dir = disk_dir
+        self.disk_max_bytes = disk_max_bytes
+        self._memory: "OrderedDict[str, bytes]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk_bytes = None
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self.disk_dir, key[:2], f"{key}.pdf")
+
+    def get(self, key: str) -> Optional[bytes]:
+        """キャッシュ済みのPDFを取得（無ければNone）"""
+        with self._lock:
+            pdf = self._memory.get(key)
+            if pdf is not None:
+                self._memory.move_to_end(key)
+                return pdf
+
+        if not self.disk_dir:
+            return None
+        path = self._disk_path(key)
+        try:
+            with open(path, 'rb') as f:
+                pdf = f.read()
+            # 最近使ったものを残すため、更新時刻を使用時刻として扱う
+            os.utime(path)
+        except OSError:
+            return None
+
+        self._remember(key, pdf)
+        return pdf
+
+    def put(self, key: str, pdf: bytes):
+        """PDFをキャッシュに保存"""
+        self._remember(key, pdf)
+        if self.disk_dir:
+            self._store(key, pdf)
+
+    def _remember(self, key: str, pdf: bytes):
+        if self.memory_entries <= 0:
+            return
+        with self._lock:
+            self._memory[key] = pdf
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_entries:
+                self._memory.popitem(last=False)
+
+    def _store(self, key: str, pdf: bytes):
+        path = self._disk_path(key)
+        if os.path.exists(path):
+            return
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(pdf)
+        os.replace(tmp_path, path)
+
+        with self._lock:
+            if self._disk_bytes is None:
+                self._disk_bytes = self._scan_disk_bytes()
+            else:
+                self._disk_bytes += len(pdf)
+            if self._disk_bytes > self.disk_max_bytes:
+                self._evict_disk()
+
+    def _iter_disk_entries(self):
+        for shard in os.scandir(self.disk_dir):
+            if not shard.is_dir():
+                continue
+            for entry in os.scandir(shard.path):
+                if entry.name.endswith(".pdf"):
+                    try:
+                        stat = entry.stat()
+                    except OSError:
+                        continue
+                    yield entry.path, stat.st_size, stat.st_mtime
+
+    def _scan_disk_bytes(self) -> int:
+        return sum(size for _, size, _ in self._iter_disk_entries())
+
+    def _evict_disk(self):
+        """古いものから削除して上限の9割まで減らす（他プロセスの書き込み分も数え直す）"""
+        entries = sorted(self._iter_disk_entries(), key=lambda e: e[2])
+        total = sum(size for _, size, _ in entries)
+        target = self.disk_max_bytes * 0.9
+        for path, size, _ in entries:
+            if total <= target:
+                break
+            try:
+                os.unlink(path)
+                total -= size
+            except OSError:
+                pass
+        self._disk_bytes = total
+
+    def clear(self):
+        """メモリ上のキャッシュを空にする"""
+        with self._lock:
+            self._memory.clear()
+
+
+_render_cache = None
+_render_cache_lock = threading.Lock()
+
+
+def get_render_cache() -> Optional[RenderCache]:
+    """環境変数の設定に従ってプロセス共通のキャッシュを返す（MEISHI_CACHE=0 で無効）"""
+    global _render_cache
+    if os.environ.get("MEISHI_CACHE", "1") == "0":
+        return None
+    with _render_cache_lock:
+        if _render_cache is None:
+            _render_cache = RenderCache(
+                memory_entries=int(os.environ.get("MEISHI_CACHE_MEMORY_ENTRIES", DEFAULT_MEMORY_ENTRIES)),
+                disk_dir=os.environ.get("MEISHI_CACHE_DIR") or None,
+                disk_max_bytes=int(os.environ.get("MEISHI_CACHE_MAX_BYTES", DEFAULT_DISK_MAX_BYTES)),
+            )
+        return _render_cache
@@ -0,0 +1,155 @@
+"""色の管理（ブランドパレットとRGB→CMYK変換）
+
+デザインは色を直接作らず、パレットの名前で指定する。
+各色はRGBとCMYKの両方の値を持ち、描画先のキャンバスのカラースペースに合った方を使う。
+CMYKの値を指定していない色は rgb_to_cmyk で求める（変換結果はキャッシュする）。
+
+パレットは MEISHI_PALETTE で指定したJSONで上書きできる。
+
+    {"grid": {"rgb": "#666666", "cmyk": [0, 0, 0, 0.6]}, "text": {"rgb": [0.1, 0.05, 0.04]}}
+"""
+import hashlib
+import json
+import os
+import threading
+from functools import lru_cache
+from typing import Dict, Optional, Sequence, Tuple, Union, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from reportlab.lib.colors import Color
+    from reportlab.pdfgen import canvas
+
+
+RGB = Tuple[float, float, float]
+CMYK = Tuple[float, float, float, float]
+
+# 名前 → (RGB, CMYK)。CMYKが None の色はRGBから変換する
+# RGBの値は従来の出力と同じにしてあり、RGB出力の見た目は変わらない
+DEFAULT_PALETTE: Dict[str, Tuple[RGB, Optional[CMYK]]] = {
+    # 裏面
+    "background": ((1, 1, 1), (0, 0, 0, 0)),
+    "grid": ((0.4, 0.4, 0.4), (0, 0, 0, 0.6)),
+    "hybrid_grid": ((0.3, 0.3, 0.3), (0, 0, 0, 0.7)),
+    # トンボ（CMYKではレジストレーション = 全版に出す）
+    "crop_mark": ((0, 0, 0), (1, 1, 1, 1)),
+    # 表面
+    "paper": ((1, 1, 1), (0, 0, 0, 0)),
+    "text": ((0x1a / 255, 0x0c / 255, 0x09 / 255), None),
+    "name_en": ((0x23 / 255, 0x19 / 255, 0x16 / 255), None),
+    "label": ((0x94 / 255, 0x94 / 255, 0x95 / 255), None),
+    "line": ((0.446, 0.443, 0.444), None),
+}
+
+# 出力のカラースペース
+COLOR_MODES = ("rgb", "cmyk")
+DEFAULT_COLOR_MODE = "rgb"
+
+
+@lru_cache(maxsize=1024)
+def rgb_to_cmyk(r: float, g: float, b: float) -> CMYK:
+    """RGB値をCMYK値に変換（同じ色の変換結果はキャッシュする）"""
+    if r == 0 and g == 0 and b == 0:
+        return (0, 0, 0, 1)  # 黒
+
+    c = 1 - r
+    m = 1 - g
+    y = 1 - b
+    k = min(c, m, y)
+
+    if k == 1:
+        return (0, 0, 0, 1)
+
+    c = (c - k) / (1 - k)
+    m = (m - k) / (1 - k)
+    y = (y - k) / (1 - k)
+
+    return (c, m, y, k)
+
+
+def _parse_rgb(value: Union[str, Sequence[float]], label: str) -> RGB:
+    if isinstance(value, str):
+        text = value.lstrip("#")
+        if len(text) != 6:
+            raise ValueError(f"{label}.rgb は #rrggbb 形式である必要があります: {value!r}")
+        return tuple(int(text[i:i + 2], 16) / 255 for i in (0, 2, 4))
+    return _parse_components(value, 3, f"{label}.rgb")
+
+
+def _parse_components(value: Sequence[float], count: int, label: str) -> tuple:
+    if not isinstance(value, (list, tuple)) or len(value) != count:
+        raise ValueError(f"{label} は {count} 個の数値である必要があります: {value!r}")
+    for v in value:
+        if isinstance(v, bool) or not isinstance(v, (int, float)) or not 0 <= v <= 1:
+            raise ValueError(f"{label} の値は 0〜1 の数値である必要があります: {value!r}")
+    return tuple(value)
+
+
+class Palette:
+    """名前付きの色（RGB用とCMYK用の reportlab の色を読み込み時に作っておく）"""
+
+    def __init__(self, colors: Dict[str, Tuple[RGB, Optional[CMYK]]], digest: Optional[str] = None):
+        from reportlab.lib.colors import CMYKColor, Color
+
+        self.digest = digest  # 既定のパレットなら None
+        self._rgb: Dict[str, "Color"] = {}
+        self._cmyk: Dict[str, "CMYKColor"] = {}
+        for name, (rgb, cmyk) in colors.items():
+            self._rgb[name] = Color(*rgb)
+            self._cmyk[name] = CMYKColor(*(cmyk if cmyk is not None else rgb_to_cmyk(*rgb)))
+
+    @classmethod
+    def load(cls, path: str) -> "Palette":
+        """JSONのパレットを読み込み、既定のパレットに上書きする"""
+        with open(path, 'rb') as f:
+            source = f.read()
+        try:
+            overrides = json.loads(source)
+        except ValueError as e:
+            raise ValueError(f"パレットのJSONが不正です: {e}")
+        if not isinstance(overrides, dict):
+            raise ValueError("パレットはJSONオブジェクトである必要があります")
+
+        colors = dict(DEFAULT_PALETTE)
+        for name, entry in overrides.items():
+            if not isinstance(entry, dict) or "rgb" not in entry:
+                raise ValueError(f"パレットの {name} には rgb が必要です")
+            rgb = _parse_rgb(entry["rgb"], name)
+            cmyk = _parse_components(entry["cmyk"], 4, f"{name}.cmyk") if entry.get("cmyk") is not None else None
+            colors[name] = (rgb, cmyk)
+        return cls(colors, hashlib.sha256(source).hexdigest()[:16])
+
+    def color(self, name: str, mode: str = DEFAULT_COLOR_MODE) -> "Color":
+        """名前とカラースペースに対応する色"""
+        colors = self._cmyk if mode == "cmyk" else self._rgb
+        try:
+            return colors[name]
+        except KeyError:
+            raise ValueError(f"Unknown palette color: {name}")
+
+
+_palette: Optional[Palette] = None
+_palette_path: Optional[str] = None
+_palette_lock = threading.Lock()
+
+
+def get_palette() -> Palette:
+    """プロセス共通のパレット（MEISHI_PALETTE でJSONを指定すると上書き）"""
+    global _palette, _palette_path
+    path = os.environ.get("MEISHI_PALETTE") or None
+    with _palette_lock:
+        if _palette is None or _palette_path != path:
+            _palette = Palette.load(path) if path else Palette(DEFAULT_PALETTE)
+            _palette_path = path
+        return _palette
+
+
+def color_mode_of(c: "canvas.Canvas") -> str:
+    """キャンバスのカラースペース（CMYK固定なら "cmyk"、それ以外は "rgb"）"""
+    from reportlab.lib.colors import _enforceCMYK
+
+    return "cmyk" if getattr(c, '_enforceColorSpace', None) is _enforceCMYK else "rgb"
+
+
+def palette_color(c: "canvas.Canvas", name: str) -> "Color":
+    """キャンバスのカラースペースに合ったパレットの色"""
+    return get_palette().color(name, color_mode_of(c))
@@ -0,0 +1,196 @@
+"""PDFのコンテンツストリームを小さくする出力モード
+
+通常の出力と見た目を変えずに、次の点でPDFを小さくする。
+- 座標を印刷に十分な桁数（既定は小数点以下2桁 = 0.0035mm）に丸める
+- 同じ値の色・線幅などの再設定や、何もしない q/Q・cm・空のテキストブロックを削る
+- ロゴを1つのフォームXObjectにまとめる（内容はプロセス内で1回だけ生成して使い回す）
+- コンテンツストリームをASCII85にせず、Flate圧縮のみにする
+"""
+import hashlib
+import io
+import re
+import threading
+from typing import Dict, List, Tuple, TYPE_CHECKING
+from reportlab.pdfbase import pdfdoc
+from reportlab.pdfgen import canvas
+from reportlab.pdfgen.pathobject import PDFPathObject
+
+if TYPE_CHECKING:
+    from .assets import LogoAsset
+
+
+# 座標の小数点以下の桁数（0.01pt ≈ 0.0035mm）
+DEFAULT_PRECISION = 2
+
+# 描画結果に影響しない演算子
+_NOOP_LINES = {"1 0 0 1 0 0 cm"}
+_EMPTY_TEXT = re.compile(r"^BT /F\d+ [\d.]+ Tf [\d.]+ TL ET$")
+# 同じ値なら再設定を省ける状態設定の演算子 → 状態の枠
+# 塗りと線の色はどの演算子で設定しても1つの枠を共有する（"0 g" の後の "1 0 0 rg" を削らないため）
+_STATE_SLOTS = {"w": "w", "J": "J", "j": "j", "M": "M", "d": "d",
+                "rg": "fill", "g": "fill", "k": "fill", "sc": "fill", "scn": "fill",
+                "RG": "stroke", "G": "stroke", "K": "stroke", "SC": "stroke", "SCN": "stroke"}
+# カラースペースの設定で色が初期値に戻る枠
+_RESETS_SLOT = {"cs": "fill", "CS": "stroke"}
+# 上記以外でグラフィックス状態を変える演算子（クリップ、変換行列、拡張グラフィックス状態など）
+_CHANGES_STATE = {"cm", "W", "W*", "gs", "cs", "CS", "ri", "i", "Tf", "Tc", "Tw", "Tz", "TL", "Tr", "Ts"}
+
+_logo_code: Dict[Tuple[str, float, bool], List[str]] = {}
+_logo_lock = threading.Lock()
+
+
+def minify_operators(code: List[str]) -> List[str]:
+    """冗長な演算子を取り除く
+
+    q/Qの入れ子ごとに現在の状態を追跡し、同じ値の再設定を削る。
+    中で状態を変えない q/Q は対ごと外す（塗り・線の描画だけなら保存と復元は不要）。
+    """
+    out = []
+    # 入れ子ごとの (状態, 対応するqの位置, 状態を変えたか)
+    stack = [({}, -1, True)]
+    for chunk in code:
+        for line in chunk.split("\n"):
+            line = line.strip()
+            if not line or line in _NOOP_LINES or _EMPTY_TEXT.match(line):
+                continue
+            if line == "q":
+                stack.append((dict(stack[-1][0]), len(out), False))
+                out.append(line)
+                continue
+            if line == "Q":
+                _, position, changed = stack.pop()
+                if changed:
+                    out.append(line)
+                else:
+                    del out[position]
+                continue
+
+            tokens = line.split(" ")
+            operator = tokens[-1]
+            slot = _STATE_SLOTS.get(operator)
+            if slot is not None and len(tokens) > 1:
+                # 枠の値は演算子とオペランドの組（"0 g" と "0 0 0 rg" は別の値として扱う）
+                if stack[-1][0].get(slot) == line:
+                    continue
+                stack[-1][0][slot] = line
+            elif slot is None and not _CHANGES_STATE.intersection(tokens):
+                out.append(line)
+                continue
+            elif operator in _RESETS_SLOT:
+                stack[-1][0].pop(_RESETS_SLOT[operator], None)
+            state, position, _ = stack[-1]
+            stack[-1] = (state, position, True)
+            out.append(line)
+    return out
+
+
+class RoundingPathObject(PDFPathObject):
+    """座標を丸めてから書き出すパス"""
+
+    def __init__(self, precision: int, code=None):
+        super().__init__(code)
+        self._precision = precision
+
+    def _round(self, *values):
+        return [round(v, self._precision) for v in values]
+
+    def moveTo(self, x, y):
+        super().moveTo(*self._round(x, y))
+
+    def lineTo(self, x, y):
+        super().lineTo(*self._round(x, y))
+
+    def curveTo(self, x1, y1, x2, y2, x3, y3):
+        super().curveTo(*self._round(x1, y1, x2, y2, x3, y3))
+
+    def rect(self, x, y, width, height):
+        super().rect(*self._round(x, y, width, height))
+
+
+class CompactCanvas(canvas.Canvas):
+    """コンテンツストリームを小さく書き出すCanvas"""
+
+    def __init__(self, *args, precision: int = DEFAULT_PRECISION, **kwargs):
+        self._precision = precision
+        super().__init__(*args, **kwargs)
+
+    def _make_preamble(self):
+        super()._make_preamble()
+        # 初期フォントの設定は使わないため出力しない
+        self._preamble = ""
+
+    def beginPath(self) -> RoundingPathObject:
+        return RoundingPathObject(self._precision)
+
+    def rect(self, x, y, width, height, stroke=1, fill=0):
+        p = self._precision
+        super().rect(round(x, p), round(y, p), round(width, p), round(height, p), stroke=stroke, fill=fill)
+
+    def line(self, x1, y1, x2, y2):
+        p = self._precision
+        super().line(round(x1, p), round(y1, p), round(x2, p), round(y2, p))
+
+    def translate(self, dx, dy):
+        super().translate(round(dx, self._precision), round(dy, self._precision))
+
+    def draw_logo_form(self, asset: "LogoAsset", x: float, y: float, width: float, height: float):
+        """ロゴをフォームXObjectとして1回だけ定義し、参照して描画（LogoAsset.drawから呼ばれる）"""
+        drawing = asset.drawing_for(self)
+        cmyk = drawing is not asset.drawing
+        name = "Logo" + hashlib.sha1(f"{asset.path}|{cmyk}".encode("utf-8")).hexdigest()[:8]
+        if not self.hasForm(name):
+            code = _logo_form_code(asset, cmyk)
+            self.beginForm(name, 0, 0, drawing.width, drawing.height)
+            self._code.extend(code)
+            self.endForm()
+
+        scale = min(width / drawing.width, height / drawing.height)
+        self.saveState()
+        self.translate(x, y)
+        self.scale(scale, scale)
+        self.doForm(name)
+        self.restoreState()
+
+    def showPage(self):
+        self._code[:] = minify_operators(self._code)
+        super().showPage()
+        page = self._doc.Pages.pages[-1]
+        if page.compression:
+            page.Contents = _flate_stream(page.stream, "page stream")
+
+    def endForm(self, **extra_attributes):
+        name = self._formData[0]
+        super().endForm(**extra_attributes)
+        form = self._doc.idToObject[pdfdoc.xObjectName(name)]
+        if form.compression:
+            form.Contents = _flate_stream(form.stream, "xobject form stream")
+            # フォームは compression が有効だと書き出し時にフィルタを rl_config から設定し直すため無効にする
+            form.compression = 0
+
+
+def _flate_stream(content: str, comment: str) -> "pdfdoc.PDFStream":
+    """Flate圧縮のみのストリーム
+
+    ASCII85はサイズが約25%増えるため、この出力では使わない。
+    rl_config.useA85 を書き換えると他のスレッドの出力にも影響するため、ストリームごとにフィルタを指定する。
+    """
+    stream = pdfdoc.PDFStream(content=content, filters=[pdfdoc.PDFZCompress])
+    stream.__Comment__ = comment
+    return stream
+
+
+def _logo_form_code(asset: "LogoAsset", cmyk: bool) -> List[str]:
+    """ロゴのフォームの中身（描画先のPDFに依存しないよう、別のCanvasで1回だけ生成する）"""
+    from reportlab.graphics.renderPDF import draw
+
+    key = (asset.path, asset.mtime, cmyk)
+    with _logo_lock:
+        code = _logo_code.get(key)
+        if code is None:
+            # CMYKのフォームでは描画の初期状態の色（RGBの黒）もCMYKにする
+            scratch = canvas.Canvas(io.BytesIO(), enforceColorSpace='cmyk' if cmyk else None)
+            scratch.beginForm("logo")
+            draw(asset.cmyk_drawing if cmyk else asset.drawing, scratch, 0, 0)
+            code = minify_operators(scratch._code)
+            _logo_code[key] = code
+    return code
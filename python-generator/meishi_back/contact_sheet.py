@@ -0,0 +1,240 @@
+"""裏面パターンの一覧（デザインを選ぶためのコンタクトシート）
+
+1人分の名刺データから、グリッドの種類 × ロゴのサイズ × ロゴの位置 の組み合わせを
+1つのPDF（グリッドの種類ごとに1ページ）またはSVGにまとめて描画する。
+各ページはロゴのサイズを行、位置を列とした表になり、各名刺の下にラベルを付ける。
+
+PDFは1つの CompactCanvas に全ての組み合わせを描くため、ロゴのフォームXObjectやフォントなどの
+リソースは1回だけ書き出され、1枚ずつPDFを生成するより大幅に速く小さくなる。
+SVGもロゴの定義は1回だけ書き、各名刺からは <use> で参照する。
+"""
+import io
+from html import escape
+from typing import Dict, List, Optional, Sequence, Tuple, Union, TYPE_CHECKING
+from . import DESIGN_CLASSES, create_back_design, metrics
+from .colors import DEFAULT_COLOR_MODE, get_palette, palette_color
+from .compact import CompactCanvas, DEFAULT_PRECISION
+from .impose import CARD_HEIGHT_MM, CARD_WIDTH_MM, MM, draw_back_in_slot
+from .preview import SvgCanvas, _hex, _logo_body, _num
+from .spec import SIZE_FACTORS, CardSpec, as_card_spec
+
+if TYPE_CHECKING:
+    from reportlab.pdfgen import canvas
+    from .assets import LogoAsset
+
+
+# 既定のロゴの位置（左上・中央・右下）
+DEFAULT_POSITIONS = ((0, 0), (50, 50), (100, 100))
+
+# 1回に描画する組み合わせの上限（APIから巨大なシートを要求されても描画時間とメモリが一定に収まるようにする）
+MAX_POSITIONS = 25
+MAX_VARIANTS = 300  # グリッドの種類 × サイズ × 位置
+
+# シートの余白と間隔（mm）
+PAGE_MARGIN_MM = 10
+TITLE_HEIGHT_MM = 10
+LABEL_HEIGHT_MM = 5
+GAP_MM = 6
+
+TITLE_FONT_SIZE = 10
+LABEL_FONT_SIZE = 6
+FONT_NAME = "Helvetica"
+SVG_FONT_FAMILY = "Helvetica, Arial, sans-serif"
+SVG_LOGO_ID = "meishi-logo"
+SVG_CLIP_ID = "meishi-card"
+
+Variant = Tuple[str, CardSpec]
+
+
+def parse_position(text: str) -> Tuple[float, float]:
+    """"x,y" 形式の位置（CLIとAPIの指定用）"""
+    try:
+        x, y = (float(value) for value in text.split(","))
+    except ValueError:
+        raise ValueError(f"位置は \"x,y\" 形式で指定してください: {text!r}")
+    return x, y
+
+
+def build_variants(card: Union[dict, CardSpec], grid_types: Optional[Sequence[str]] = None,
+                   sizes: Optional[Sequence[str]] = None,
+                   positions: Sequence[Tuple[float, float]] = DEFAULT_POSITIONS) -> Dict[str, List[Variant]]:
+    """グリッドの種類ごとに、(ラベル, CardSpec) をサイズ → 位置の順に並べたものを返す
+
+    grid_types と sizes を省略すると全ての種類とサイズを使う。細かさ（detailedness）は元の名刺のものを使う。
+    位置が MAX_POSITIONS 個、組み合わせが MAX_VARIANTS 個を超える場合は ValueError。
+    """
+    spec = as_card_spec(card)
+    grid_types = list(grid_types or DESIGN_CLASSES)
+    sizes = list(sizes or SIZE_FACTORS)
+    for grid_type in grid_types:
+        if grid_type not in DESIGN_CLASSES:
+            raise ValueError(f"Unknown grid type: {grid_type}")
+    for size in sizes:
+        if size not in SIZE_FACTORS:
+            raise ValueError(f"Unknown size: {size}")
+    if not positions:
+        raise ValueError("位置を1つ以上指定してください")
+    if len(positions) > MAX_POSITIONS:
+        raise ValueError(f"位置は {MAX_POSITIONS} 個までです: {len(positions)} 個")
+    for position in positions:
+        if len(position) != 2 or not all(0 <= value <= 100 for value in position):
+            raise ValueError(f"位置は 0〜100 の (x, y) である必要があります: {position!r}")
+    total = len(grid_types) * len(sizes) * len(positions)
+    if total > MAX_VARIANTS:
+        raise ValueError(f"組み合わせ（グリッドの種類 × サイズ × 位置）は {MAX_VARIANTS} 個までです: {total} 個")
+
+    variants = {}
+    for grid_type in grid_types:
+        variants[grid_type] = []
+        for size in sizes:
+            for x, y in positions:
+                data = {"pattern": {"grid": {"type": grid_type, "detailedness": spec.detailedness}, "size": size,
+                                    "position": {"x": x, "y": y}}}
+                variants[grid_type].append((f"{size} / x{_num(x)} y{_num(y)}", CardSpec.from_dict(data)))
+    return variants
+
+
+class ContactSheetLayout:
+    """1ページの並び（行 = サイズ、列 = 位置）"""
+
+    def __init__(self, rows: int, columns: int):
+        self.rows = rows
+        self.columns = columns
+        self.card_size = (CARD_WIDTH_MM * MM, CARD_HEIGHT_MM * MM)
+        self.page_size = (
+            (PAGE_MARGIN_MM * 2 + CARD_WIDTH_MM * columns + GAP_MM * (columns - 1)) * MM,
+            (PAGE_MARGIN_MM * 2 + TITLE_HEIGHT_MM + (CARD_HEIGHT_MM + LABEL_HEIGHT_MM) * rows
+             + GAP_MM * (rows - 1)) * MM,
+        )
+
+    def title_position(self) -> Tuple[float, float]:
+        """ページの見出しのベースライン（左下基準）"""
+        return PAGE_MARGIN_MM * MM, self.page_size[1] - (PAGE_MARGIN_MM + TITLE_HEIGHT_MM / 2) * MM
+
+    def slot_position(self, slot: int) -> Tuple[float, float]:
+        """slot番目（0始まり、左上から行ごと）の名刺の左下の座標"""
+        row, column = divmod(slot, self.columns)
+        x = (PAGE_MARGIN_MM + column * (CARD_WIDTH_MM + GAP_MM)) * MM
+        top = (PAGE_MARGIN_MM + TITLE_HEIGHT_MM + row * (CARD_HEIGHT_MM + LABEL_HEIGHT_MM + GAP_MM)) * MM
+        return x, self.page_size[1] - top - self.card_size[1]
+
+    def label_position(self, slot: int) -> Tuple[float, float]:
+        """slot番目の名刺の下のラベルのベースライン"""
+        x, y = self.slot_position(slot)
+        return x, y - (LABEL_HEIGHT_MM - 1.5) * MM
+
+
+def _draw_text(c: "canvas.Canvas", x: float, y: float, size: float, color: str, text: str):
+    """1行のテキストを描画（CompactCanvas は単独の setFont を空のテキストとして削るため、テキストオブジェクトで描く）"""
+    c.setFillColor(palette_color(c, color))
+    text_object = c.beginText(x, y)
+    text_object.setFont(FONT_NAME, size)
+    text_object.textOut(text)
+    c.drawText(text_object)
+
+
+def _draw_failed_slot(c: "canvas.Canvas", x: float, y: float, width: float, height: float):
+    """描画できなかった組み合わせ（枠だけ描く）"""
+    c.setStrokeColor(palette_color(c, "line"))
+    c.setLineWidth(0.5)
+    c.rect(x, y, width, height, stroke=1, fill=0)
+
+
+def render_contact_sheet_pdf(card: Union[dict, CardSpec], grid_types: Optional[Sequence[str]] = None,
+                             sizes: Optional[Sequence[str]] = None,
+                             positions: Sequence[Tuple[float, float]] = DEFAULT_POSITIONS,
+                             color_mode: str = DEFAULT_COLOR_MODE) -> bytes:
+    """組み合わせの一覧をPDF（グリッドの種類ごとに1ページ）で返す"""
+    variants = build_variants(card, grid_types, sizes, positions)
+    layout = ContactSheetLayout(len(sizes or SIZE_FACTORS), len(positions))
+    width, height = layout.card_size
+
+    with metrics.trace("contact_sheet", format="pdf", variants=sum(map(len, variants.values()))):
+        buffer = io.BytesIO()
+        c = CompactCanvas(
+            buffer,
+            pagesize=layout.page_size,
+            precision=DEFAULT_PRECISION,
+            pageCompression=1,
+            invariant=True,
+            enforceColorSpace=color_mode,
+            pdfVersion=(1, 4)
+        )
+        for grid_type, page in variants.items():
+            _draw_text(c, *layout.title_position(), TITLE_FONT_SIZE, "text", grid_type)
+            for slot, (label, spec) in enumerate(page):
+                x, y = layout.slot_position(slot)
+                try:
+                    draw_back_in_slot(c, spec, x, y, width, height)
+                except Exception:
+                    _draw_failed_slot(c, x, y, width, height)
+                    label += " (failed)"
+                _draw_text(c, *layout.label_position(slot), LABEL_FONT_SIZE, "label", label)
+            c.showPage()
+        with metrics.stage("save"):
+            c.save()
+    return buffer.getvalue()
+
+
+class _SheetSvgCanvas(SvgCanvas):
+    """ロゴを共有の定義への参照として描くSvgCanvas"""
+
+    def __init__(self):
+        super().__init__()
+        self.logo_asset: Optional["LogoAsset"] = None
+
+    def _logo_markup(self, asset: "LogoAsset") -> str:
+        self.logo_asset = asset
+        return f'<use href="#{SVG_LOGO_ID}" xlink:href="#{SVG_LOGO_ID}"/>'
+
+
+def _svg_text(x: float, y: float, size: float, color: str, text: str) -> str:
+    return (f'<text x="{_num(x)}" y="{_num(y)}" font-family="{SVG_FONT_FAMILY}" font-size="{size}" '
+            f'fill="{_hex(get_palette().color(color))}">{escape(text)}</text>')
+
+
+def render_contact_sheet_svg(card: Union[dict, CardSpec], grid_types: Optional[Sequence[str]] = None,
+                             sizes: Optional[Sequence[str]] = None,
+                             positions: Sequence[Tuple[float, float]] = DEFAULT_POSITIONS) -> str:
+    """組み合わせの一覧をSVG（PDFのページを縦に並べたもの）で返す"""
+    variants = build_variants(card, grid_types, sizes, positions)
+    layout = ContactSheetLayout(len(sizes or SIZE_FACTORS), len(positions))
+    page_width, page_height = layout.page_size
+    width, height = layout.card_size
+
+    with metrics.trace("contact_sheet", format="svg", variants=sum(map(len, variants.values()))):
+        elements: List[str] = []
+        logo_asset = None
+        for index, (grid_type, page) in enumerate(variants.items()):
+            # SVGの座標は上端基準のため、PDFの座標（左下基準）を反転してページの位置までずらす
+            bottom = page_height * (index + 1)
+            title_x, title_y = layout.title_position()
+            elements.append(_svg_text(title_x, bottom - title_y, TITLE_FONT_SIZE, "text", grid_type))
+            for slot, (label, spec) in enumerate(page):
+                x, y = layout.slot_position(slot)
+                top = bottom - y - height
+                c = _SheetSvgCanvas()
+                try:
+                    create_back_design(spec.grid_type)._generate_design(c, spec)
+                except Exception:
+                    label += " (failed)"
+                    elements.append(f'<rect x="{_num(x)}" y="{_num(top)}" width="{_num(width)}" '
+                                    f'height="{_num(height)}" fill="none" '
+                                    f'stroke="{_hex(get_palette().color("line"))}" stroke-width="0.5"/>')
+                else:
+                    logo_asset = logo_asset or c.logo_asset
+                    # 名刺ごとに位置をずらし、枠の外は共有のクリップパスで切り抜く
+                    elements.append(f'<g transform="translate({_num(x)} {_num(top)})" '
+                                    f'clip-path="url(#{SVG_CLIP_ID})">{c.body()}</g>')
+                label_x, label_y = layout.label_position(slot)
+                elements.append(_svg_text(label_x, bottom - label_y, LABEL_FONT_SIZE, "label", label))
+
+        defs = f'<clipPath id="{SVG_CLIP_ID}"><rect width="{_num(width)}" height="{_num(height)}"/></clipPath>'
+        if logo_asset is not None:
+            defs += f'<g id="{SVG_LOGO_ID}">{_logo_body(logo_asset.svg_source or "")}</g>'
+        total_height = page_height * len(variants)
+        header = (f'<svg xmlns="http://www.w3.org/2000/svg" xmlns:xlink="http://www.w3.org/1999/xlink" '
+                  f'width="{_num(page_width / MM)}mm" height="{_num(total_height / MM)}mm" '
+                  f'viewBox="0 0 {_num(page_width)} {_num(total_height)}">')
+        with metrics.stage("serialize"):
+            return header + f"<defs>{defs}</defs>" + "".join(elements) + "</svg>"
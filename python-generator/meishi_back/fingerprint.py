@@ -0,0 +1,46 @@
+"""描画結果に影響するコードとアセットのハッシュ
+
+事前描画パック（pack.py）、描画キャッシュ（cache.py）、差分生成のマニフェスト（manifest.py）で共有する。
+ロゴは更新時刻ではなく内容のハッシュを使うため、チェックアウトや touch では変わらない。
+"""
+import hashlib
+import os
+from functools import lru_cache
+from typing import List
+
+
+_PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# 描画結果に影響するモジュール（デザインのクラスは DESIGN_CLASSES から加える）。
+# ここに無いモジュール（CLIやサーバー、キャッシュなど）を変えても指紋は変わらない。
+# main.py のページ設定（_create_canvas）を変えた場合は pack.PACK_VERSION を上げること。
+RENDER_MODULES = ("__init__", "base", "utils", "geometry", "spec", "assets", "colors", "compact")
+
+
+def render_sources() -> List[str]:
+    """描画に使うソースファイル"""
+    from . import DESIGN_CLASSES
+
+    modules = set(RENDER_MODULES) | {module_name for module_name, _ in DESIGN_CLASSES.values()}
+    return [os.path.join(_PACKAGE_DIR, f"{name}.py") for name in sorted(modules)]
+
+
+@lru_cache(maxsize=None)
+def code_digest() -> str:
+    """描画に使うソースと reportlab のバージョンのハッシュ（プロセスごとに1回だけ求める）"""
+    from reportlab import Version
+
+    digest = hashlib.sha256(f"reportlab:{Version}".encode("utf-8"))
+    for path in render_sources():
+        if not os.path.exists(path):
+            continue
+        with open(path, 'rb') as f:
+            digest.update(os.path.basename(path).encode("utf-8") + b"\0" + hashlib.sha256(f.read()).digest())
+    return digest.hexdigest()
+
+
+def logo_digest() -> str:
+    """ロゴのSVGの内容のハッシュ"""
+    from .assets import get_logo_asset
+
+    return get_logo_asset().digest
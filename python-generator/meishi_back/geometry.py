@@ -0,0 +1,156 @@
+import numpy as np
+from reportlab.pdfgen import canvas
+
+
+# 線分配列は最後の次元が [x0, y0, x1, y1] の形状 (..., 本数, 4)
+# 引数に配列を渡すと先頭の次元を名刺の枚数として複数枚分を一度に計算する
+# 本数が名刺ごとに異なるグリッドは NaN で埋めて形状を揃える
+
+
+def _broadcast(*values):
+    """引数を浮動小数点の配列にして形状（名刺の枚数）を揃える"""
+    return np.broadcast_arrays(*(np.asarray(v, dtype=float) for v in values))
+
+
+def _segments(*columns) -> np.ndarray:
+    """x0, y0, x1, y1 の列から線分配列を組み立てる"""
+    return np.stack(np.broadcast_arrays(*columns), axis=-1)
+
+
+def _steps(limit: np.ndarray, unit_size: np.ndarray) -> np.ndarray:
+    """step * unit_size < limit を満たす step（1始まり）を求め、満たさない要素はNaNにする"""
+    limit = np.asarray(limit, dtype=float)
+    unit_size = np.asarray(unit_size, dtype=float)
+    count = int(np.max(np.ceil(limit / unit_size), initial=0)) + 1
+    steps = np.arange(1, max(count, 1) + 1, dtype=float)
+    offsets = steps * unit_size[..., None]
+    return np.where(offsets < limit[..., None], offsets, np.nan)
+
+
+def grid_segments(x: float, y: float, width: float, height: float, unit_size: float) -> np.ndarray:
+    """等間隔グリッドの線分を計算"""
+    rows = np.arange(int(height / unit_size) + 1) * unit_size + y
+    cols = np.arange(int(width / unit_size) + 1) * unit_size + x
+    horizontal = _segments(x, rows, x + width, rows)
+    vertical = _segments(cols, y, cols, y + height)
+    return np.concatenate([horizontal, vertical], axis=0)
+
+
+def perspective_segments(x, y, width, height, logo_x, logo_y, logo_width, logo_height, canvas_width) -> np.ndarray:
+    """パースペクティブグリッドの線分を計算"""
+    x, y, width, height, logo_x, logo_y, logo_width, logo_height, canvas_width = _broadcast(
+        x, y, width, height, logo_x, logo_y, logo_width, logo_height, canvas_width)
+
+    # ロゴの四隅（x, yからの相対位置）
+    left = logo_x - x
+    right = left + logo_width
+    top = logo_y - y
+    bottom = top + logo_height
+    logo_right = logo_x + logo_width
+    logo_bottom = logo_y + logo_height
+    right_run = canvas_width - (x + width)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # 左側の線（上端・下端）：キャンバスの左端まで延長
+        start_y_lt = y - top / left * x
+        start_y_lb = (y + height) - (bottom - height) / left * x
+        # 右側の線（上端・下端）：キャンバスの右端まで延長
+        end_y_rt = y + top / (right - width) * right_run
+        end_y_rb = (y + height) + (bottom - height) / (right - width) * right_run
+
+        # ロゴの位置に応じた追加の線
+        end_y_lt2 = y + top / (left - width) * right_run
+        start_y_rt2 = y - top / right * x
+        start_y_rb2 = (y + height) - (bottom - height) / right * x
+        end_y_lb2 = (y + height) + (bottom - height) / (left - width) * right_run
+
+    upper = height / 2 < logo_y + logo_height / 2
+    zero = np.zeros_like(x)
+    segments = np.stack([
+        _segments(zero, start_y_lt, logo_x, logo_y),
+        _segments(zero, start_y_lb, logo_x, logo_bottom),
+        _segments(logo_right, logo_y, canvas_width, end_y_rt),
+        _segments(logo_right, logo_bottom, canvas_width, end_y_rb),
+        np.where(upper[..., None],
+                 _segments(logo_x, logo_y, canvas_width, end_y_lt2),
+                 _segments(zero, start_y_rb2, logo_right, logo_bottom)),
+        np.where(upper[..., None],
+                 _segments(zero, start_y_rt2, logo_right, logo_y),
+                 _segments(logo_x, logo_bottom, canvas_width, end_y_lb2)),
+    ], axis=-2)
+
+    if not np.all(np.isfinite(segments)):
+        raise ZeroDivisionError("ロゴの位置がグリッドの端と重なっているため傾きを計算できません")
+    return segments
+
+
+# アイソレーショングリッドの線のオフセット（image_scale倍して使う）
+ISOLATION_OFFSETS = np.array([0.3, 4.7, 9.1])
+ISOLATION_RIGHT_OFFSETS = np.array([-9.1, -4.7])
+
+
+def isolation_segments(logo_x, logo_y, logo_width, logo_height, image_scale, canvas_width, canvas_height) -> np.ndarray:
+    """アイソレーショングリッドの線分を計算"""
+    logo_x, logo_y, logo_width, logo_height, image_scale, canvas_width, canvas_height = (
+        v[..., None] for v in _broadcast(
+            logo_x, logo_y, logo_width, logo_height, image_scale, canvas_width, canvas_height))
+
+    # 水平線（下部・上部）
+    below = logo_y + logo_height + image_scale * -ISOLATION_OFFSETS
+    above = logo_y + image_scale * ISOLATION_OFFSETS
+    # 垂直線（左部・右部）
+    left = logo_x + image_scale * ISOLATION_OFFSETS
+    right = logo_x + logo_width + image_scale * ISOLATION_RIGHT_OFFSETS
+
+    rows = np.concatenate([below, above], axis=-1)
+    cols = np.concatenate([left, right], axis=-1)
+    return np.concatenate([_segments(0.0, rows, canvas_width, rows),
+                           _segments(cols, 0.0, cols, canvas_height)], axis=-2)
+
+
+def hybrid_segments(x, width, logo_x, logo_y, logo_width, logo_height, unit_size, canvas_width, canvas_height) -> np.ndarray:
+    """ハイブリッドグリッドの線分を計算（本数の差はNaNで埋める）"""
+    x, width, logo_x, logo_y, logo_width, logo_height, unit_size, canvas_width, canvas_height = _broadcast(
+        x, width, logo_x, logo_y, logo_width, logo_height, unit_size, canvas_width, canvas_height)
+
+    right = logo_x + logo_width
+    top = logo_y + logo_height
+    zero = np.zeros_like(logo_x)
+
+    frame = np.stack([
+        _segments(logo_x, zero, logo_x, canvas_height),  # 左側の垂直線
+        _segments(right, zero, right, canvas_height),  # 右側の垂直線
+        _segments(zero, top, canvas_width, top),  # 上部の水平線
+        _segments(zero, logo_y, right, logo_y),  # 下部の水平線
+    ], axis=-2)
+
+    # ロゴの右側に並ぶ垂直線
+    x_steps = _steps(canvas_width - (right - x), unit_size)
+    current_x = right[..., None] + x_steps
+    vertical = _segments(current_x, zero[..., None], current_x, top[..., None])
+
+    # ロゴの上端から下に並ぶ水平線
+    y_steps = _steps(top, unit_size)
+    current_y = top[..., None] - y_steps
+    horizontal = _segments(right[..., None], current_y, right[..., None] + width[..., None], current_y)
+
+    return np.concatenate([frame, vertical, horizontal], axis=-2)
+
+
+def draw_segments(c: canvas.Canvas, segments: np.ndarray):
+    """線分配列を1つのパスとしてまとめて描画（NaNを含む線分は無視する）
+
+    線分の座標は1本ずつ line で描く場合と同じだが、ピクセル単位では同一にならない。
+    1回の stroke では交点や重なった線のアンチエイリアスが1回分になるため、ラスタライズすると
+    交点付近の濃さが変わる（元の描画との比較で最大 35/255）。線のベクターとしての形は変わらないため、
+    この差は意図したものとして扱う。
+    """
+    segments = np.asarray(segments, dtype=float).reshape(-1, 4)
+    segments = segments[~np.isnan(segments).any(axis=1)]
+    if not len(segments):
+        return
+    path = c.beginPath()
+    for x0, y0, x1, y1 in segments.tolist():
+        path.moveTo(x0, y0)
+        path.lineTo(x1, y1)
+    c.drawPath(path, stroke=1, fill=0)
@@ -0,0 +1,253 @@
+"""裏面の面付け（SRA3/A3のシートに複数枚の名刺を並べ、トンボを付ける）
+
+各名刺は塗り足し込みの 97×61mm（BaseBackDesign と同じ大きさ）で、名刺の間に gutter_mm の隙間を空けて並べる。
+塗り足しは隣の名刺と重ならないため、背景が端まで届く裏面も仕上がり線で断裁できる。
+トンボは仕上がり線の延長上、シートの余白と名刺の間の隙間に描く。
+gutter_mm=0 では隙間なく並べ（隣り合う名刺の塗り足しの間を2回断裁する）、トンボはシートの余白にだけ描く。
+ロゴはファイルごとに1つのフォームXObjectとして定義し、すべての名刺から参照する（CompactCanvas）。
+
+reportlab はページをファイルの保存時にまとめて書き出すため、1ページずつ逐次出力することはできない。
+代わりに sheets_per_file 枚ごとに別ファイルへ分けて保存し、メモリとファイルサイズを一定以下に保つ。
+"""
+import os
+from typing import Dict, List, Optional, Tuple, Union, TYPE_CHECKING
+from . import create_back_design, metrics
+from .colors import DEFAULT_COLOR_MODE, palette_color
+from .compact import CompactCanvas, DEFAULT_PRECISION
+from .spec import CardSpec, as_card_spec
+
+if TYPE_CHECKING:
+    from reportlab.pdfgen import canvas
+
+
+MM = 2.8346  # 1mm = 2.8346pt（裏面デザインと同じ値）
+
+# シートの大きさ（mm、縦向き）
+SHEET_SIZES = {
+    "SRA3": (320, 450),
+    "A3": (297, 420),
+}
+
+# 名刺1枚の大きさ（塗り足し3mmを含む）
+CARD_WIDTH_MM = 91 + 6
+CARD_HEIGHT_MM = 55 + 6
+BLEED_MM = 3
+
+# シートの余白（トンボを描く領域）
+SHEET_MARGIN_MM = 10
+CROP_MARK_OFFSET_MM = 2  # 名刺の並びの外周からトンボまでの距離
+# 名刺の間の隙間（塗り足しの外側。この隙間に内側のトンボを描く）
+GUTTER_MM = 4
+CROP_MARK_LENGTH_MM = 5
+CROP_MARK_WIDTH = 0.25  # pt
+
+# 1ファイルに入れるシート数の既定値
+DEFAULT_SHEETS_PER_FILE = 50
+
+
+class SheetLayout:
+    """シート上の名刺の並び（縦向き・横向きのうち多く並ぶ方を選ぶ）"""
+
+    def __init__(self, sheet: str = "SRA3", margin_mm: float = SHEET_MARGIN_MM, gutter_mm: float = GUTTER_MM):
+        if sheet not in SHEET_SIZES:
+            raise ValueError(f"Unknown sheet size: {sheet}")
+        if gutter_mm < 0:
+            raise ValueError("gutter_mm は0以上である必要があります")
+        self.sheet = sheet
+        short_mm, long_mm = SHEET_SIZES[sheet]
+
+        # n枚並べた幅は n * 名刺 + (n - 1) * 隙間
+        candidates = []
+        for width_mm, height_mm in ((short_mm, long_mm), (long_mm, short_mm)):
+            columns = int((width_mm - margin_mm * 2 + gutter_mm) // (CARD_WIDTH_MM + gutter_mm))
+            rows = int((height_mm - margin_mm * 2 + gutter_mm) // (CARD_HEIGHT_MM + gutter_mm))
+            candidates.append((columns * rows, width_mm, height_mm, columns, rows))
+        count, width_mm, height_mm, self.columns, self.rows = max(candidates)
+        if count == 0:
+            raise ValueError(f"{sheet} に名刺が1枚も並びません（余白 {margin_mm}mm）")
+
+        self.page_size = (width_mm * MM, height_mm * MM)
+        self.card_size = (CARD_WIDTH_MM * MM, CARD_HEIGHT_MM * MM)
+        self.gutter = gutter_mm * MM
+        # 名刺の並びをシートの中央に置く
+        self.origin = ((self.page_size[0] - self.grid_size[0]) / 2,
+                       (self.page_size[1] - self.grid_size[1]) / 2)
+
+    @property
+    def per_sheet(self) -> int:
+        return self.columns * self.rows
+
+    @property
+    def pitch(self) -> Tuple[float, float]:
+        """隣の名刺までの距離（名刺の大きさ + 隙間、pt）"""
+        return self.card_size[0] + self.gutter, self.card_size[1] + self.gutter
+
+    @property
+    def grid_size(self) -> Tuple[float, float]:
+        """名刺の並び全体の幅と高さ（pt）"""
+        return (self.columns * self.pitch[0] - self.gutter,
+                self.rows * self.pitch[1] - self.gutter)
+
+    def slot_position(self, slot: int) -> Tuple[float, float]:
+        """スロット番号（左上から行ごと）→ 名刺の左下の座標（pt）"""
+        row, column = divmod(slot, self.columns)
+        x = self.origin[0] + column * self.pitch[0]
+        y = self.origin[1] + (self.rows - 1 - row) * self.pitch[1]
+        return x, y
+
+    def trim_lines(self) -> Tuple[List[float], List[float]]:
+        """仕上がり線の x 座標と y 座標の一覧（pt）"""
+        bleed = BLEED_MM * MM
+        xs, ys = [], []
+        for column in range(self.columns):
+            x = self.origin[0] + column * self.pitch[0]
+            xs += [x + bleed, x + self.card_size[0] - bleed]
+        for row in range(self.rows):
+            y = self.origin[1] + row * self.pitch[1]
+            ys += [y + bleed, y + self.card_size[1] - bleed]
+        return xs, ys
+
+
+def draw_crop_marks(c: "canvas.Canvas", layout: SheetLayout):
+    """仕上がり線の延長上、名刺の並びの外側と名刺の間の隙間にトンボを描く"""
+    offset = CROP_MARK_OFFSET_MM * MM
+    length = CROP_MARK_LENGTH_MM * MM
+    left, bottom = layout.origin
+    right = left + layout.grid_size[0]
+    top = bottom + layout.grid_size[1]
+    xs, ys = layout.trim_lines()
+
+    lines = []
+    for x in xs:
+        lines.append((x, bottom - offset, x, bottom - offset - length))
+        lines.append((x, top + offset, x, top + offset + length))
+    for y in ys:
+        lines.append((left - offset, y, left - offset - length, y))
+        lines.append((right + offset, y, right + offset + length, y))
+
+    # 内側のトンボは隙間の幅いっぱいに描く（塗り足しの外側なので名刺の絵柄には重ならない）
+    if layout.gutter > 0:
+        pitch_x, pitch_y = layout.pitch
+        for row in range(1, layout.rows):
+            gap_bottom = bottom + row * pitch_y - layout.gutter
+            for x in xs:
+                lines.append((x, gap_bottom, x, gap_bottom + layout.gutter))
+        for column in range(1, layout.columns):
+            gap_left = left + column * pitch_x - layout.gutter
+            for y in ys:
+                lines.append((gap_left, y, gap_left + layout.gutter, y))
+
+    c.saveState()
+    c.setStrokeColor(palette_color(c, "crop_mark"))
+    c.setLineWidth(CROP_MARK_WIDTH)
+    c.lines(lines)
+    c.restoreState()
+
+
+def draw_back_in_slot(c: "canvas.Canvas", spec: CardSpec, x: float, y: float, width: float, height: float):
+    """(x, y) を左下とする枠に裏面を1枚描画（枠の外は切り抜く）
+
+    描画の途中で失敗した場合は、その枠の描画内容を取り消してから例外を送出する。
+    """
+    design = create_back_design(spec.grid_type)
+    code_length = len(c._code)
+    state_depth = len(c.state_stack)
+    # グリッドは c._pagesize を名刺の大きさとして線の長さを決めるため、描画中は枠の大きさにする
+    # （シート全体の大きさのままだと、枠の外で切り抜かれるだけの長い線を描いてしまう）
+    page_size = c._pagesize
+    c._pagesize = (width, height)
+    c.saveState()
+    try:
+        c.translate(x, y)
+        clip = c.beginPath()
+        clip.rect(0, 0, width, height)
+        c.clipPath(clip, stroke=0, fill=0)
+        design._generate_design(c, spec)
+    except Exception:
+        del c._code[code_length:]
+        while len(c.state_stack) > state_depth:
+            c.pop_state_stack()
+        raise
+    finally:
+        c._pagesize = page_size
+    c.restoreState()
+
+
+class ImpositionWriter:
+    """名刺を1枚ずつ受け取って面付けし、sheets_per_file 枚ごとに別ファイルへ保存する
+
+        writer = ImpositionWriter("out/sheets", SheetLayout("SRA3"))
+        for data in records:
+            writer.add(data)
+        files = writer.close()   # ["out/sheets_001.pdf", ...]
+    """
+
+    def __init__(self, output_prefix: str, layout: SheetLayout, sheets_per_file: int = DEFAULT_SHEETS_PER_FILE,
+                 precision: int = DEFAULT_PRECISION, color_mode: str = DEFAULT_COLOR_MODE):
+        if sheets_per_file < 1:
+            raise ValueError("sheets_per_file は1以上である必要があります")
+        self.output_prefix = output_prefix
+        self.layout = layout
+        self.sheets_per_file = sheets_per_file
+        self.precision = precision
+        self.color_mode = color_mode
+        self.files: List[str] = []
+        self._canvas: Optional[CompactCanvas] = None
+        self._sheets_in_file = 0
+        self._slot = 0
+
+    def _open_file(self):
+        path = f"{self.output_prefix}_{len(self.files) + 1:03d}.pdf"
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.files.append(path)
+        self._canvas = CompactCanvas(
+            path,
+            pagesize=self.layout.page_size,
+            precision=self.precision,
+            pageCompression=1,
+            invariant=True,
+            enforceColorSpace=self.color_mode,
+            pdfVersion=(1, 4)
+        )
+        self._sheets_in_file = 0
+
+    def _finish_sheet(self):
+        draw_crop_marks(self._canvas, self.layout)
+        self._canvas.showPage()
+        self._sheets_in_file += 1
+        self._slot = 0
+        if self._sheets_in_file >= self.sheets_per_file:
+            self._save_file()
+
+    def _save_file(self):
+        with metrics.stage("save"):
+            self._canvas.save()
+        self._canvas = None
+
+    def add(self, card: Union[dict, CardSpec]) -> Dict[str, object]:
+        """名刺を次のスロットに描画し、配置（ファイル・シート・スロット）を返す（失敗時は例外を送出）"""
+        spec = as_card_spec(card)
+
+        if self._canvas is None:
+            self._open_file()
+        x, y = self.layout.slot_position(self._slot)
+        draw_back_in_slot(self._canvas, spec, x, y, *self.layout.card_size)
+
+        placement = {"file": self.files[-1], "sheet": self._sheets_in_file + 1, "slot": self._slot + 1}
+        self._slot += 1
+        if self._slot >= self.layout.per_sheet:
+            self._finish_sheet()
+        return placement
+
+    def close(self) -> List[str]:
+        """描画途中のシートを確定してファイルを保存し、出力したファイルの一覧を返す"""
+        if self._canvas is not None:
+            if self._slot:
+                self._finish_sheet()
+            if self._canvas is not None and self._sheets_in_file:
+                self._save_file()
+            elif self._canvas is not None:
+                # 1枚も描画できなかったファイルは作らない
+                self._canvas = None
+                self.files.pop()
+        return self.files
@@ -1,45 +1,32 @@
 from .base import BaseBackDesign
+from .spec import BLEED_MARGIN, GRID_BASE_SCALE, MEISHI_HEIGHT, MEISHI_WIDTH, MINIMUM_GRID_SIZE, CardSpec
 from reportlab.pdfgen import canvas
-from reportlab.lib.colors import Color
 import os
 from .utils import draw_isolation_grid
-import xml.etree.ElementTree as ET
 
 
 class IsolationBackDesign(BaseBackDesign):
-    def _generate_design(self, c: canvas.Canvas, data: dict):
+    def _generate_design(self, c: canvas.Canvas, spec: CardSpec):
         """Isolationタイプの裏面デザインを生成"""
         # ロゴのパスを取得
         logo_path = os.path.join(os.path.dirname(__file__), "..", "assets", "DL_LOGO_HorizontalStacked_Black_CMYK.svg")
         
-        # SVGファイルから元のロゴ画像の高さを取得
-        tree = ET.parse(logo_path)
-        root = tree.getroot()
-        view_box = root.get('viewBox')
-        if view_box:
-            _, _, _, original_height = map(float, view_box.split())
-            original_logo_height = original_height
-        else:
-            original_logo_height = 100  # デフォルト値
+        # キャッシュ済みのロゴから元のロゴ画像の高さを取得
+        original_logo_height = self._load_logo(logo_path).view_box_height
         
-        # ロゴのサイズと位置を計算
-        logo_width, logo_height = self.calculate_logo_size(data)
-        logo_x, logo_y = self.calculate_logo_position(data, logo_width, logo_height)
+        # ロゴのサイズとグリッドに吸着した位置（CardSpecで計算済み）
+        logo_width, logo_height = spec.logo_width, spec.logo_height
+        logo_x, logo_y = spec.logo_x, spec.logo_y
         
-        # 背景色を設定
-        c.setFillColor(Color(1, 1, 1))  # 白
-        c.rect(0, 0, self.width_mm * 2.8346, self.height_mm * 2.8346, fill=1)  # 1mm = 2.8346pt
+        # 背景を描画
+        self.draw_background(c)
         
-        # 名刺のサイズを計算（px単位）
-        meishi_width = 257.95
-        meishi_height = 155.91
-        
-        # 3mmをpx単位に変換（1mm = 2.8346px）
-        margin_px = 3 * 2.8346
+        # 名刺のサイズと塗り足し（px単位）
+        meishi_width, meishi_height = MEISHI_WIDTH, MEISHI_HEIGHT
+        margin_px = BLEED_MARGIN
         
         # グリッドの描画に使用するスケールを計算（フロントエンドと同じ計算方法）
-        base_scale = 2
-        minimum_grid_size = 4.96 * base_scale
+        minimum_grid_size = MINIMUM_GRID_SIZE * GRID_BASE_SCALE
         max_grid_size = minimum_grid_size * 4
         
         # サイズリスト（ロゴサイズの定義）
@@ -50,8 +37,8 @@ class IsolationBackDesign(BaseBackDesign):
             'xs': max_grid_size * 2
         }
         
-        # patternオブジェクトからsizeを取得
-        target_size = size_list.get(data.get("pattern", {}).get("size", "m"), size_list["m"])
+        # 正規化済みのサイズ（サイズリストに無い値は "m"）
+        target_size = size_list[spec.size]
         
         # imageScaleを計算
         image_scale = (target_size / original_logo_height)*5
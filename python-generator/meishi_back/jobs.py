@@ -0,0 +1,267 @@
+"""SQLiteによる永続的なジョブキュー（大量の名刺の生成用）
+
+ジョブは main.py と同じ名刺データ（JSON）と出力先、生成オプション（compact など）を持ち、1つのSQLiteファイルに保存する。
+ワーカーはジョブをリース（期限付きで確保）してから生成し、終わったら完了にする。
+途中でワーカーやマシンが落ちてもリースの期限が切れたジョブは再び取り出されるため、
+再起動後は未完了のジョブだけを続きから処理する（完了したジョブは生成し直さない）。
+
+- 優先度（priority）が大きいジョブから、同じ優先度なら登録順に取り出す
+- 失敗したジョブは max_attempts 回まで、指数的に間隔を空けて再試行する
+- 同じ出力先（key）のジョブは重複して登録しない（内容が変わっていれば置き換えてやり直す）
+"""
+import json
+import os
+import random
+import sqlite3
+import time
+import uuid
+from typing import Dict, Iterator, List, Optional
+from . import metrics
+
+
+# ジョブの状態
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+STATES = (QUEUED, RUNNING, DONE, FAILED)
+
+DEFAULT_MAX_ATTEMPTS = 3
+DEFAULT_LEASE_SECONDS = 60.0
+# 再試行までの待ち時間（BACKOFF_BASE × 2^(試行回数-1) 秒、BACKOFF_MAX まで）
+BACKOFF_BASE = 1.0
+BACKOFF_MAX = 300.0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    key TEXT NOT NULL UNIQUE,
+    priority INTEGER NOT NULL DEFAULT 0,
+    payload TEXT NOT NULL,
+    output TEXT NOT NULL,
+    front_output TEXT,
+    options TEXT NOT NULL DEFAULT '{}',
+    state TEXT NOT NULL DEFAULT 'queued',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL,
+    available_at REAL NOT NULL,
+    lease_owner TEXT,
+    lease_expires_at REAL,
+    last_error TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_ready ON jobs (state, priority DESC, id);
+"""
+
+
+def backoff_seconds(attempts: int) -> float:
+    """attempts 回目の失敗の後、次の試行まで待つ秒数（同時に再試行が集中しないよう揺らぎを加える）"""
+    delay = min(BACKOFF_MAX, BACKOFF_BASE * 2 ** max(0, attempts - 1))
+    return delay * random.uniform(0.5, 1.0)
+
+
+class Job:
+    """リース中のジョブ"""
+
+    def __init__(self, row: sqlite3.Row):
+        self.id = row["id"]
+        self.key = row["key"]
+        self.priority = row["priority"]
+        self.data = json.loads(row["payload"])
+        self.output = row["output"]
+        self.front_output = row["front_output"]
+        self.options = json.loads(row["options"])
+        self.attempts = row["attempts"]
+        self.max_attempts = row["max_attempts"]
+        self.lease_owner = row["lease_owner"]
+
+
+class JobQueue:
+    """ジョブキュー（プロセスごとに1つ作る。接続はスレッド間で共有しない）
+
+        queue = JobQueue("jobs.sqlite")
+        queue.enqueue(data, "out/1_taro_back.pdf", priority=10)
+        job = queue.claim()
+        ...
+        queue.complete(job)   # 失敗した場合は queue.fail(job, "エラー内容")
+    """
+
+    def __init__(self, path: str, lease_seconds: float = DEFAULT_LEASE_SECONDS, owner: Optional[str] = None):
+        self.path = path
+        self.lease_seconds = lease_seconds
+        # リースの持ち主（期限切れ後に別のワーカーが取り直したジョブを上書きしないために使う）
+        self.owner = owner or f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=30, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        # WALにして、ワーカーの書き込み中も他のワーカーが読めるようにする
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+
+    def close(self):
+        self._conn.close()
+
+    def _transaction(self):
+        # BEGIN IMMEDIATE で書き込みロックを先に取り、取り出しが他のワーカーと競合しないようにする
+        self._conn.execute("BEGIN IMMEDIATE")
+        return self._conn
+
+    def enqueue(self, data: dict, output: str, front_output: Optional[str] = None, options: Optional[dict] = None,
+                priority: int = 0, max_attempts: int = DEFAULT_MAX_ATTEMPTS, key: Optional[str] = None) -> str:
+        """ジョブを登録し、added / updated / skipped のいずれかを返す
+
+        key の既定値は出力先の絶対パス。同じ key のジョブが既にある場合、名刺データ・出力先・オプションが
+        同じなら何もしない（skipped）。異なれば内容を置き換えて待ち状態に戻す（updated）。
+        実行中のジョブを置き換えた場合、そのワーカーはリースを失うため古い内容では完了にならない。
+        """
+        if max_attempts < 1:
+            raise ValueError("max_attempts は1以上である必要があります")
+        output = os.path.abspath(output)
+        front_output = os.path.abspath(front_output) if front_output else None
+        payload = json.dumps(data, ensure_ascii=False, sort_keys=True)
+        options_json = json.dumps(options or {}, sort_keys=True)
+        now = time.time()
+        key = key or output
+
+        row = self._conn.execute("SELECT id, payload, output, front_output, options FROM jobs WHERE key = ?",
+                                 (key,)).fetchone()
+        if row is None:
+            self._conn.execute(
+                "INSERT INTO jobs (key, priority, payload, output, front_output, options, max_attempts,"
+                " available_at, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, priority, payload, output, front_output, options_json, max_attempts, now, now, now))
+            return "added"
+        if (row["payload"], row["output"], row["front_output"], row["options"]) == (
+                payload, output, front_output, options_json):
+            return "skipped"
+        self._conn.execute(
+            "UPDATE jobs SET priority = ?, payload = ?, output = ?, front_output = ?, options = ?, state = ?,"
+            " attempts = 0, max_attempts = ?, available_at = ?, lease_owner = NULL, lease_expires_at = NULL,"
+            " last_error = NULL, updated_at = ? WHERE id = ?",
+            (priority, payload, output, front_output, options_json, QUEUED, max_attempts, now, now, row["id"]))
+        metrics.incr("jobs_updated")
+        return "updated"
+
+    def enqueue_many(self, jobs: Iterator[dict]) -> Dict[str, int]:
+        """enqueue の引数の dict を順に登録（1つのトランザクションでまとめて書き込む）"""
+        counts = {"added": 0, "updated": 0, "skipped": 0}
+        conn = self._transaction()
+        try:
+            for job in jobs:
+                counts[self.enqueue(**job)] += 1
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return counts
+
+    def _expire_leases(self, conn: sqlite3.Connection, now: float):
+        """リースの期限が切れたジョブ（ワーカーが落ちた）を待ち状態に戻す（試行回数を使い切っていれば失敗にする）"""
+        conn.execute(
+            "UPDATE jobs SET state = ?, lease_owner = NULL, lease_expires_at = NULL, updated_at = ?,"
+            " last_error = 'リースの期限切れ（ワーカーが停止した可能性があります）'"
+            " WHERE state = ? AND lease_expires_at < ? AND attempts >= max_attempts",
+            (FAILED, now, RUNNING, now))
+        expired = conn.execute(
+            "UPDATE jobs SET state = ?, lease_owner = NULL, lease_expires_at = NULL, available_at = ?, updated_at = ?"
+            " WHERE state = ? AND lease_expires_at < ?",
+            (QUEUED, now, now, RUNNING, now)).rowcount
+        if expired:
+            metrics.incr("jobs_lease_expired", expired)
+
+    def claim(self) -> Optional[Job]:
+        """実行できるジョブを1件リースして返す（無ければ None）"""
+        now = time.time()
+        conn = self._transaction()
+        try:
+            self._expire_leases(conn, now)
+            row = conn.execute(
+                "SELECT id FROM jobs WHERE state = ? AND available_at <= ? ORDER BY priority DESC, id LIMIT 1",
+                (QUEUED, now)).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+            conn.execute(
+                "UPDATE jobs SET state = ?, attempts = attempts + 1, lease_owner = ?, lease_expires_at = ?,"
+                " updated_at = ? WHERE id = ?",
+                (RUNNING, self.owner, now + self.lease_seconds, now, row["id"]))
+            job = Job(conn.execute("SELECT * FROM jobs WHERE id = ?", (row["id"],)).fetchone())
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        metrics.incr("jobs_claimed")
+        return job
+
+    def _finish(self, job: Job, sql: str, params: tuple) -> bool:
+        """リースを持っている場合のみ状態を更新（期限切れで取り直されていれば False）"""
+        cursor = self._conn.execute(f"{sql} WHERE id = ? AND state = ? AND lease_owner = ?",
+                                    params + (job.id, RUNNING, self.owner))
+        return cursor.rowcount == 1
+
+    def complete(self, job: Job) -> bool:
+        """ジョブを完了にする"""
+        now = time.time()
+        done = self._finish(job, "UPDATE jobs SET state = ?, lease_owner = NULL, lease_expires_at = NULL,"
+                                 " last_error = NULL, updated_at = ?", (DONE, now))
+        if done:
+            metrics.incr("jobs_done")
+        return done
+
+    def fail(self, job: Job, error: str) -> bool:
+        """ジョブの失敗を記録（試行回数が残っていれば間隔を空けて再試行、無ければ失敗にする）"""
+        now = time.time()
+        if job.attempts >= job.max_attempts:
+            metrics.incr("jobs_failed")
+            return self._finish(job, "UPDATE jobs SET state = ?, lease_owner = NULL, lease_expires_at = NULL,"
+                                     " last_error = ?, updated_at = ?", (FAILED, error, now))
+        metrics.incr("jobs_retried")
+        return self._finish(job, "UPDATE jobs SET state = ?, lease_owner = NULL, lease_expires_at = NULL,"
+                                 " last_error = ?, available_at = ?, updated_at = ?",
+                            (QUEUED, error, now + backoff_seconds(job.attempts), now))
+
+    def release(self, job: Job) -> bool:
+        """リースを手放して待ち状態に戻す（中断したワーカー用。試行回数には数えない）"""
+        now = time.time()
+        return self._finish(job, "UPDATE jobs SET state = ?, attempts = attempts - 1, lease_owner = NULL,"
+                                 " lease_expires_at = NULL, available_at = ?, updated_at = ?", (QUEUED, now, now))
+
+    def extend_lease(self, job: Job) -> bool:
+        """リースの期限を延ばす（時間のかかるジョブ用）"""
+        now = time.time()
+        return self._finish(job, "UPDATE jobs SET lease_expires_at = ?, updated_at = ?",
+                            (now + self.lease_seconds, now))
+
+    def requeue_failed(self) -> int:
+        """失敗したジョブを試行回数をリセットして待ち状態に戻し、件数を返す"""
+        now = time.time()
+        return self._conn.execute(
+            "UPDATE jobs SET state = ?, attempts = 0, available_at = ?, updated_at = ? WHERE state = ?",
+            (QUEUED, now, now, FAILED)).rowcount
+
+    def counts(self) -> Dict[str, int]:
+        """状態ごとの件数"""
+        counts = dict.fromkeys(STATES, 0)
+        for row in self._conn.execute("SELECT state, COUNT(*) AS n FROM jobs GROUP BY state"):
+            counts[row["state"]] = row["n"]
+        return counts
+
+    def pending(self) -> int:
+        """未完了（待ち・実行中）のジョブ数"""
+        return self._conn.execute("SELECT COUNT(*) FROM jobs WHERE state IN (?, ?)", (QUEUED, RUNNING)).fetchone()[0]
+
+    def next_available_in(self) -> Optional[float]:
+        """待ち状態のジョブが次に実行できるようになるまでの秒数（無ければ None）"""
+        row = self._conn.execute("SELECT MIN(available_at) FROM jobs WHERE state = ?", (QUEUED,)).fetchone()
+        if row[0] is None:
+            return None
+        return max(0.0, row[0] - time.time())
+
+    def failures(self, limit: int = 20) -> List[dict]:
+        """失敗したジョブ（出力先とエラー内容）"""
+        rows = self._conn.execute(
+            "SELECT id, output, attempts, last_error FROM jobs WHERE state = ? ORDER BY id LIMIT ?", (FAILED, limit))
+        return [dict(row) for row in rows]
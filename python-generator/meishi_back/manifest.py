@@ -0,0 +1,97 @@
+"""差分生成用のマニフェスト
+
+出力PDFごとに、入力レコードのハッシュ（CardSpec.canonical_hash）、アセット（ロゴ、パレット）の
+ハッシュ、デザインのコードのバージョンを記録する。全員分を再実行しても、これらが前回と同じで
+出力PDFも残っているものは生成を飛ばし、変わったものだけを生成し直す。
+
+    {"version": 1, "entries": {"out/1_taro_back.pdf": {"record": "...", "assets": {...}, "design": "...", "size": 12345}}}
+"""
+import json
+import os
+from typing import Dict, Optional, Union
+from .colors import get_palette
+from .fingerprint import code_digest, logo_digest
+from .spec import CardSpec, as_card_spec
+
+
+# マニフェストの形式や判定方法を変えたときに上げる（全件を生成し直す）
+MANIFEST_VERSION = 1
+
+def design_version() -> str:
+    """描画に使うコードと reportlab のバージョンのハッシュ（pack.py の指紋と同じもの）"""
+    return f"{MANIFEST_VERSION}:{code_digest()}"
+
+
+def asset_hashes() -> Dict[str, str]:
+    """描画に使うアセットの内容のハッシュ（パレットは MEISHI_PALETTE で上書きしている場合のみ）"""
+    hashes = {"logo": logo_digest()}
+    palette = get_palette()
+    if palette.digest is not None:
+        hashes["palette"] = palette.digest
+    return hashes
+
+
+class Manifest:
+    """出力PDFごとの入力のハッシュ（読み込みと保存は1回の実行につき1回ずつ）"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.entries: Dict[str, dict] = {}
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                try:
+                    manifest = json.load(f)
+                except ValueError as e:
+                    raise ValueError(f"マニフェストのJSONが不正です: {path}: {e}")
+            # 形式の異なるマニフェストは使わない（全件を生成し直す）
+            if isinstance(manifest, dict) and manifest.get("version") == MANIFEST_VERSION:
+                self.entries = manifest.get("entries", {})
+        # コードとアセットのハッシュは実行ごとに1回だけ求める
+        self.design = design_version()
+        self.assets = asset_hashes()
+
+    def entry(self, card: Union[dict, CardSpec]) -> dict:
+        """名刺データに対応するエントリ（出力のサイズは record で記録する）
+
+        レコードのハッシュは名刺データのフィールドだけから求め、ファイルの更新時刻には依存しない。
+        """
+        return {"record": as_card_spec(card).canonical_hash(), "assets": self.assets, "design": self.design}
+
+    def stale_reason(self, output: str, entry: dict) -> Optional[str]:
+        """生成し直す理由（new / record / assets / design / output）。前回から変わっていなければ None"""
+        previous = self.entries.get(output)
+        if previous is None:
+            return "new"
+        if previous.get("record") != entry["record"]:
+            return "record"
+        if previous.get("assets") != entry["assets"]:
+            return "assets"
+        if previous.get("design") != entry["design"]:
+            return "design"
+        # 出力PDFが消されたり、書きかけで残ったりしている場合
+        try:
+            size = os.path.getsize(output)
+        except OSError:
+            return "output"
+        if size != previous.get("size"):
+            return "output"
+        return None
+
+    def record(self, output: str, entry: dict):
+        """生成した出力PDFのエントリを記録"""
+        self.entries[output] = dict(entry, size=os.path.getsize(output))
+
+    def save(self):
+        """一時ファイルに書き出してから置き換える（途中で止まっても前回のマニフェストは壊れない）"""
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({"version": MANIFEST_VERSION, "entries": self.entries}, f, ensure_ascii=False,
+                          separators=(",", ":"))
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
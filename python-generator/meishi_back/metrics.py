@@ -0,0 +1,141 @@
+"""描画処理の計測（オプトイン）
+
+MEISHI_METRICS=1（または enable()）で有効になり、stage() で囲んだ区間の時間を
+trace() ごとにJSONのレコードとしてシンクへ送る。累積カウンタは snapshot() で取得できる。
+無効時の stage() / trace() は共有の nullcontext を返すだけで、計測は一切行わない。
+"""
+import contextlib
+import json
+import os
+import sys
+import threading
+import time
+from collections import defaultdict
+from typing import Callable, Optional
+
+
+_NULL = contextlib.nullcontext()
+
+_enabled = os.environ.get("MEISHI_METRICS", "").lower() in ("1", "true", "yes")
+_lock = threading.Lock()
+_local = threading.local()
+_counters = defaultdict(int)
+_stage_totals = defaultdict(float)
+
+
+def _stderr_sink(record: dict):
+    """既定のシンク（標準エラー出力にJSON Linesで書き出す）"""
+    print(json.dumps(record, ensure_ascii=False), file=sys.stderr, flush=True)
+
+
+_sink: Optional[Callable[[dict], None]] = _stderr_sink
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def enable(sink: Optional[Callable[[dict], None]] = None):
+    """計測を有効にする（sinkを指定するとレコードの送り先を差し替える）"""
+    global _enabled
+    if sink is not None:
+        set_sink(sink)
+    _enabled = True
+
+
+def disable():
+    """計測を無効にする"""
+    global _enabled
+    _enabled = False
+
+
+def set_sink(sink: Optional[Callable[[dict], None]]):
+    """レコードの送り先を差し替える（Noneでレコードを捨て、カウンタのみ集計）"""
+    global _sink
+    _sink = sink
+
+
+def incr(name: str, value: int = 1):
+    """累積カウンタを加算"""
+    if not _enabled:
+        return
+    with _lock:
+        _counters[name] += value
+
+
+def snapshot() -> dict:
+    """累積カウンタと区間ごとの累積時間を取得"""
+    with _lock:
+        return {
+            "counters": dict(_counters),
+            "stage_ms": {name: round(ms, 3) for name, ms in _stage_totals.items()},
+        }
+
+
+def reset():
+    """累積値をリセット"""
+    with _lock:
+        _counters.clear()
+        _stage_totals.clear()
+
+
+class _Trace:
+    def __init__(self, name: str, fields: dict):
+        self.name = name
+        self.fields = fields
+        self.stages = defaultdict(float)
+
+
+@contextlib.contextmanager
+def _stage(name: str):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = (time.perf_counter() - started) * 1000
+        current = getattr(_local, "trace", None)
+        if current is not None:
+            current.stages[name] += elapsed
+        with _lock:
+            _stage_totals[name] += elapsed
+
+
+@contextlib.contextmanager
+def _trace(name: str, fields: dict):
+    parent = getattr(_local, "trace", None)
+    current = _Trace(name, fields)
+    _local.trace = current
+    started = time.perf_counter()
+    ok = False
+    try:
+        yield current
+        ok = True
+    finally:
+        _local.trace = parent
+        record = {
+            "event": name,
+            "ok": ok,
+            "total_ms": round((time.perf_counter() - started) * 1000, 3),
+            "stages": {stage: round(ms, 3) for stage, ms in current.stages.items()},
+        }
+        record.update(current.fields)
+        sink = _sink
+        if sink is not None:
+            try:
+                sink(record)
+            except Exception:
+                pass
+
+
+def stage(name: str):
+    """区間の時間を計測するコンテキストマネージャ"""
+    if not _enabled:
+        return _NULL
+    return _stage(name)
+
+
+def trace(name: str, **fields):
+    """1回分の処理（区間の集まり）を1レコードとしてまとめるコンテキストマネージャ"""
+    if not _enabled:
+        return _NULL
+    return _trace(name, fields)
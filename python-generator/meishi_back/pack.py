@@ -0,0 +1,263 @@
+"""裏面PDFの事前描画パック
+
+CardSpec はロゴの位置を minimum_grid_size * detailedness の格子に吸着させるため、
+裏面のデザインは (グリッドの種類, サイズ, detailedness, 吸着後のx/y) の有限な組み合わせで決まる。
+その全組み合わせを事前に描画して1つのファイルにまとめ、描画時は mmap した索引を
+二分探索してPDFのバイト列を切り出すだけで返す。
+
+ファイル形式（数値はリトルエンディアン）:
+    ヘッダ   magic(8) + version(u32) + 件数(u32) + デザインの指紋(32)
+    索引     [キー(32) + オフセット(u64) + 長さ(u32)] × 件数（キーの昇順）
+    本体     PDFのバイト列を連結したもの
+
+デザインの指紋（描画に使うモジュールのソース、ロゴの内容、reportlab のバージョンのハッシュ）が
+現在のものと異なるパックは使わない。再生成は一時ファイルに書き出してから置き換える。
+"""
+import hashlib
+import json
+import mmap
+import os
+import shutil
+import struct
+import sys
+import tempfile
+import threading
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple, Union
+from .colors import get_palette
+from .fingerprint import code_digest, logo_digest
+from .spec import LOGO_OFFSET, MEISHI_HEIGHT, MEISHI_WIDTH, MINIMUM_GRID_SIZE, CardSpec, as_card_spec
+
+
+PACK_MAGIC = b"MSHPACK\0"
+# パックの形式を変えたときに上げる
+PACK_VERSION = 1
+
+HEADER = struct.Struct("<8sII32s")
+INDEX_ENTRY = struct.Struct("<32sQI")
+
+DEFAULT_PACK_PATH = os.path.join(os.path.dirname(__file__), "..", "assets", "back_lattice.pack")
+# フロントエンドのスライダーで選べる細かさ
+DEFAULT_DETAILEDNESS = (0.5, 1.0, 2.0)
+SIZES = ("l", "m", "s", "xs")
+
+def design_fingerprint() -> bytes:
+    """描画結果に影響するソースとアセットのハッシュ"""
+    digest = hashlib.sha256()
+    digest.update(f"pack:{PACK_VERSION}|code:{code_digest()}|logo:{logo_digest()}".encode("utf-8"))
+    # MEISHI_PALETTE でパレットを上書きしている場合はその内容も含める
+    palette = get_palette()
+    if palette.digest is not None:
+        digest.update(f"|palette:{palette.digest}".encode("utf-8"))
+    return digest.digest()
+
+
+def lattice_key(card: Union[dict, CardSpec]) -> bytes:
+    """パック内のキー（正規化したパターンのハッシュ。ロゴの内容は指紋で管理するため含めない）"""
+    pattern = as_card_spec(card).pattern()
+    canonical = json.dumps(pattern, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).digest()
+
+
+def _axis_positions(start: float, end: float, unit_size: float) -> List[float]:
+    """位置0〜100の範囲で取りうる吸着後の格子点ごとに、その格子点になる位置（0〜100）を1つずつ求める"""
+    if start == end:
+        return [0.0]
+    low, high = min(start, end), max(start, end)
+    positions = []
+    for k in range(int(low / unit_size), int(high / unit_size) + 1):
+        # int() は0方向への切り捨てのため、kに吸着する区間は符号で異なる
+        if k > 0:
+            cell = (k * unit_size, (k + 1) * unit_size)
+        elif k < 0:
+            cell = ((k - 1) * unit_size, k * unit_size)
+        else:
+            cell = (-unit_size, unit_size)
+        lo, hi = max(cell[0], low), min(cell[1], high)
+        if lo > hi:
+            continue
+        value = (lo + hi) / 2
+        positions.append(min(100.0, max(0.0, (value - start) / (end - start) * 100)))
+    return positions
+
+
+def iter_lattice(detailedness_values: Iterable[float] = DEFAULT_DETAILEDNESS) -> Iterator[dict]:
+    """全ての組み合わせについて、描画に使う名刺データを1件ずつ返す"""
+    from . import DESIGN_CLASSES
+
+    seen = set()
+    for grid_type in DESIGN_CLASSES:
+        for size in SIZES:
+            for detailedness in detailedness_values:
+                base = {"pattern": {"grid": {"type": grid_type, "detailedness": detailedness}, "size": size}}
+                spec = CardSpec.from_dict(base)
+                unit_size = MINIMUM_GRID_SIZE * detailedness
+                x_positions = _axis_positions(LOGO_OFFSET, MEISHI_WIDTH - LOGO_OFFSET - spec.logo_width, unit_size)
+                y_positions = _axis_positions(MEISHI_HEIGHT - LOGO_OFFSET - spec.logo_height, LOGO_OFFSET, unit_size)
+                for x in x_positions:
+                    for y in y_positions:
+                        data = {"pattern": dict(base["pattern"], position={"x": x, "y": y})}
+                        key = lattice_key(data)
+                        if key not in seen:
+                            seen.add(key)
+                            yield data
+
+
+def build_pack(path: str, render: Callable[[dict], bytes], records: Iterable[Tuple[dict, Optional[bytes]]] = None,
+               detailedness_values: Iterable[float] = DEFAULT_DETAILEDNESS) -> dict:
+    """全ての組み合わせを描画してパックを書き出す（書き出し中のファイルは読み手から見えない）
+
+    records に (名刺データ, PDF) の組を渡すと、renderを呼ばずにそのPDFを使う（並列描画用）。
+    PDFがNoneの組み合わせ（描画できない位置）は含めない。
+    """
+    if records is None:
+        records = ((data, try_render(render, data)) for data in iter_lattice(detailedness_values))
+
+    path = os.path.abspath(path)
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fingerprint = design_fingerprint()
+    entries = []
+    skipped = 0
+
+    # 本体を先に一時ファイルへ書き、件数が確定してからヘッダと索引を前に付ける
+    with tempfile.TemporaryFile(dir=directory) as body:
+        offset = 0
+        for data, pdf in records:
+            if pdf is None:
+                skipped += 1
+                continue
+            entries.append((lattice_key(data), offset, len(pdf)))
+            body.write(pdf)
+            offset += len(pdf)
+        entries.sort()
+
+        data_start = HEADER.size + INDEX_ENTRY.size * len(entries)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, 'wb') as f:
+                f.write(HEADER.pack(PACK_MAGIC, PACK_VERSION, len(entries), fingerprint))
+                for key, entry_offset, length in entries:
+                    f.write(INDEX_ENTRY.pack(key, data_start + entry_offset, length))
+                body.seek(0)
+                shutil.copyfileobj(body, f)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+    return {"path": path, "entries": len(entries), "skipped": skipped, "bytes": os.path.getsize(path)}
+
+
+def try_render(render: Callable[[dict], bytes], data: dict) -> Optional[bytes]:
+    """描画できない組み合わせ（ロゴがグリッドの端と重なる位置など）はNoneを返す"""
+    try:
+        return render(data)
+    except Exception:
+        return None
+
+
+class LatticePack:
+    """mmap したパック（索引を二分探索してPDFを切り出す）"""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, 'rb') as f:
+            stat = os.fstat(f.fileno())
+            self.identity = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+            if stat.st_size < HEADER.size:
+                raise ValueError(f"パックのヘッダが不正です: {path}")
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, count, fingerprint = HEADER.unpack_from(self._map, 0)
+        if magic != PACK_MAGIC or version != PACK_VERSION:
+            self.close()
+            raise ValueError(f"パックの形式が異なります: {path}")
+        data_start = HEADER.size + INDEX_ENTRY.size * count
+        if data_start > stat.st_size:
+            self.close()
+            raise ValueError(f"パックの索引が不正です（ファイルが途中で切れている可能性があります）: {path}")
+        # 索引の全てのエントリが本体の範囲に収まり、キーの昇順に並んでいることを開くときに1回だけ確かめる
+        previous = b""
+        for index, (key, offset, length) in enumerate(INDEX_ENTRY.iter_unpack(self._map[HEADER.size:data_start])):
+            if offset < data_start or offset + length > stat.st_size or key <= previous:
+                self.close()
+                raise ValueError(f"パックの索引 {index} 件目が不正です（壊れているか途中で切れています）: {path}")
+            previous = key
+        self.count = count
+        self.fingerprint = fingerprint
+
+    def get(self, key: bytes) -> Optional[bytes]:
+        """キーに対応するPDFを返す（無ければNone）"""
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            position = HEADER.size + INDEX_ENTRY.size * middle
+            entry_key = self._map[position:position + 32]
+            if entry_key < key:
+                low = middle + 1
+            elif entry_key > key:
+                high = middle
+            else:
+                _, offset, length = INDEX_ENTRY.unpack_from(self._map, position)
+                return self._map[offset:offset + length]
+        return None
+
+    def lookup(self, card: Union[dict, CardSpec]) -> Optional[bytes]:
+        """名刺データに対応するPDFを返す（無ければNone）"""
+        return self.get(lattice_key(card))
+
+    def close(self):
+        self._map.close()
+
+
+_pack: Optional[LatticePack] = None
+_pack_lock = threading.Lock()
+_fingerprint: Optional[bytes] = None
+_warned = set()
+
+
+def pack_path() -> Optional[str]:
+    """使用するパックのパス（MEISHI_PACK で指定、MEISHI_PACK=0 で無効）"""
+    path = os.environ.get("MEISHI_PACK", DEFAULT_PACK_PATH)
+    if path == "0":
+        return None
+    return os.path.abspath(path)
+
+
+def get_lattice_pack() -> Optional[LatticePack]:
+    """現在のデザインと一致するパックを返す（無い・古い場合はNone）
+
+    パックが置き換えられた場合は開き直す。
+    """
+    global _pack, _fingerprint
+    path = pack_path()
+    if not path:
+        return None
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    identity = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+    with _pack_lock:
+        if _pack is not None and _pack.path == path and _pack.identity == identity:
+            return _pack if _pack.fingerprint == _fingerprint else None
+        # 置き換え前のパックは他のスレッドが参照中の可能性があるため閉じずに手放す
+        _pack = None
+        try:
+            _pack = LatticePack(path)
+        except (OSError, ValueError) as e:
+            _warn_once(identity, f"⚠️ パックを読み込めません: {e}")
+            return None
+        if _fingerprint is None:
+            _fingerprint = design_fingerprint()
+        if _pack.fingerprint != _fingerprint:
+            _warn_once(identity, f"⚠️ パックがデザインの変更前に作られたため使用しません（再生成してください）: {path}")
+            return None
+        return _pack
+
+
+def _warn_once(identity, message: str):
+    if identity not in _warned:
+        _warned.add(identity)
+        print(message, file=sys.stderr)
@@ -0,0 +1,204 @@
+"""裏面デザインのSVGプレビュー
+
+PDFと同じ _generate_design を、reportlab の Canvas の代わりに軽量な SvgCanvas に対して実行する。
+PDFの生成（フォント・リソース・圧縮）を行わないため、スライダーやドラッグのたびに
+呼び出せる速さで描画でき、グリッドの計算はPDFと完全に同じものになる。
+"""
+import functools
+import re
+from typing import List, Optional, Tuple, Union, TYPE_CHECKING
+from . import create_back_design
+from . import metrics
+from .spec import CardSpec, as_card_spec
+
+if TYPE_CHECKING:
+    from reportlab.lib.colors import Color
+    from .assets import LogoAsset
+
+
+# main.py の裏面PDFと同じページサイズ（名刺 91mm × 55mm + 周囲3mm）
+MM = 72 / 25.4
+PAGE_WIDTH_MM = 91 + 6
+PAGE_HEIGHT_MM = 55 + 6
+PAGE_SIZE = (PAGE_WIDTH_MM * MM, PAGE_HEIGHT_MM * MM)
+
+_XML_DECLARATION = re.compile(r'<\?xml[^>]*\?>\s*')
+_SVG_OPEN_TAG = re.compile(r'<svg\b[^>]*>')
+_SVG_CLOSE_TAG = re.compile(r'</svg>\s*$')
+
+
+def _num(value: float) -> str:
+    """座標を小数点以下2桁の文字列にする（プレビューの表示には十分な精度）"""
+    text = f"{value:.2f}".rstrip("0").rstrip(".")
+    return "0" if text == "-0" else text
+
+
+def _hex(color: Optional["Color"]) -> str:
+    """reportlabの色（RGB / CMYK）をSVGの色にする"""
+    if color is None:
+        return "none"
+    r, g, b = color.rgb()
+    return "#%02x%02x%02x" % (round(r * 255), round(g * 255), round(b * 255))
+
+
+@functools.lru_cache(maxsize=8)
+def _logo_body(svg_source: str) -> str:
+    """ロゴのSVGから外側の<svg>を外した中身（グループに埋め込む部分）"""
+    body = _SVG_OPEN_TAG.sub("", _XML_DECLARATION.sub("", svg_source), count=1)
+    return _SVG_CLOSE_TAG.sub("", body).strip()
+
+
+class SvgPath:
+    """Canvas.beginPath() が返すパスの代わり（デザインが使う操作のみ）"""
+
+    def __init__(self, canvas: "SvgCanvas"):
+        self._canvas = canvas
+        self._parts: List[str] = []
+
+    def moveTo(self, x: float, y: float):
+        self._parts.append("M" + self._canvas._point(x, y))
+
+    def lineTo(self, x: float, y: float):
+        self._parts.append("L" + self._canvas._point(x, y))
+
+    def rect(self, x: float, y: float, width: float, height: float):
+        self.moveTo(x, y)
+        self.lineTo(x + width, y)
+        self.lineTo(x + width, y + height)
+        self.lineTo(x, y + height)
+        self.close()
+
+    def close(self):
+        self._parts.append("Z")
+
+    @property
+    def d(self) -> str:
+        return "".join(self._parts)
+
+
+class SvgCanvas:
+    """裏面デザインが使うCanvasの操作だけを実装したSVG出力用のキャンバス
+
+    座標はPDFと同じ（原点が左下、単位はpt）で受け取り、出力時に上下を反転する。
+    """
+
+    def __init__(self, pagesize: Tuple[float, float] = PAGE_SIZE):
+        from reportlab.lib.colors import black
+
+        self._pagesize = pagesize
+        self._elements: List[str] = []
+        # reportlabのCanvasと同じ初期状態
+        self._fill_color = black
+        self._stroke_color = black
+        self._line_width = 1
+        self._transform = (1.0, 1.0, 0.0, 0.0)  # (sx, sy, tx, ty)
+        self._stack = []
+
+    # --- 座標変換 ---
+
+    def _apply(self, x: float, y: float) -> Tuple[float, float]:
+        sx, sy, tx, ty = self._transform
+        return sx * x + tx, self._pagesize[1] - (sy * y + ty)
+
+    def _point(self, x: float, y: float) -> str:
+        x, y = self._apply(x, y)
+        return f"{_num(x)} {_num(y)}"
+
+    def saveState(self):
+        self._stack.append((self._fill_color, self._stroke_color, self._line_width, self._transform))
+
+    def restoreState(self):
+        self._fill_color, self._stroke_color, self._line_width, self._transform = self._stack.pop()
+
+    def translate(self, dx: float, dy: float):
+        sx, sy, tx, ty = self._transform
+        self._transform = (sx, sy, tx + sx * dx, ty + sy * dy)
+
+    def scale(self, x: float, y: float):
+        sx, sy, tx, ty = self._transform
+        self._transform = (sx * x, sy * y, tx, ty)
+
+    # --- 描画状態 ---
+
+    def setFillColor(self, color: "Color"):
+        self._fill_color = color
+
+    def setStrokeColor(self, color: "Color"):
+        self._stroke_color = color
+
+    def setStrokeColorRGB(self, r: float, g: float, b: float):
+        from reportlab.lib.colors import Color
+
+        self._stroke_color = Color(r, g, b)
+
+    def setLineWidth(self, width: float):
+        self._line_width = width
+
+    # --- 描画 ---
+
+    def _paint(self, stroke: int, fill: int) -> str:
+        attrs = f' fill="{_hex(self._fill_color) if fill else "none"}"'
+        if stroke:
+            attrs += f' stroke="{_hex(self._stroke_color)}" stroke-width="{_num(self._line_width * self._transform[0])}"'
+        return attrs
+
+    def beginPath(self) -> SvgPath:
+        return SvgPath(self)
+
+    def drawPath(self, path: SvgPath, stroke: int = 1, fill: int = 0):
+        if path.d:
+            self._elements.append(f'<path d="{path.d}"{self._paint(stroke, fill)}/>')
+
+    def rect(self, x: float, y: float, width: float, height: float, stroke: int = 1, fill: int = 0):
+        path = self.beginPath()
+        path.rect(x, y, width, height)
+        self.drawPath(path, stroke, fill)
+
+    def line(self, x1: float, y1: float, x2: float, y2: float):
+        path = self.beginPath()
+        path.moveTo(x1, y1)
+        path.lineTo(x2, y2)
+        self.drawPath(path, stroke=1, fill=0)
+
+    def draw_logo_svg(self, asset: "LogoAsset", x: float, y: float, width: float, height: float):
+        """ロゴはDrawingを経由せず、元のSVGをそのまま埋め込む（LogoAsset.drawから呼ばれる）"""
+        if asset.view_box:
+            view_box = asset.view_box
+        else:
+            view_box = (0, 0, asset.drawing.width, asset.drawing.height)
+        # PDFと同じく、縦横の小さい方の倍率で左下を基準に配置する
+        scale = min(width / view_box[2], height / view_box[3])
+        w, h = view_box[2] * scale * self._transform[0], view_box[3] * scale * self._transform[1]
+        left, bottom = self._apply(x, y)
+
+        # ロゴの座標系へ変換するグループで包む
+        transform = (f"translate({_num(left)} {_num(bottom - h)}) scale({scale * self._transform[0]:.6g}) "
+                     f"translate({_num(-view_box[0])} {_num(-view_box[1])})")
+        self._elements.append(f'<g transform="{transform}">{self._logo_markup(asset)}</g>')
+
+    def _logo_markup(self, asset: "LogoAsset") -> str:
+        """ロゴの座標系で描くロゴの中身（複数枚を並べる場合は共有の定義を参照するよう上書きする）"""
+        return _logo_body(asset.svg_source or "")
+
+    def body(self) -> str:
+        """描画した要素（<svg>で包む前のもの）"""
+        return "".join(self._elements)
+
+    def to_svg(self) -> str:
+        """SVG文書として書き出す"""
+        width, height = self._pagesize
+        header = (f'<svg xmlns="http://www.w3.org/2000/svg" width="{PAGE_WIDTH_MM}mm" height="{PAGE_HEIGHT_MM}mm" '
+                  f'viewBox="0 0 {_num(width)} {_num(height)}">')
+        return header + self.body() + "</svg>"
+
+
+def render_back_svg(card: Union[dict, CardSpec]) -> str:
+    """名刺の裏面をPDFと同じ描画処理でSVGとして返す（プレビュー用）"""
+    spec = as_card_spec(card)
+    metrics.incr("previews")
+    with metrics.trace("preview", grid_type=spec.grid_type):
+        back_design = create_back_design(spec.grid_type)
+        c = SvgCanvas()
+        back_design._generate_design(c, spec)
+        with metrics.stage("serialize"):
+            return c.to_svg()
@@ -0,0 +1,171 @@
+"""名刺データ（JSON）の型付きモデル
+
+JSONは受け取った時点で1回だけ解析・検証し、既定値の補完とロゴ位置のグリッドへの吸着まで済ませる。
+デザインのクラスやキャッシュ・パックは dict を辿り直さずにこのモデルを使う。
+"""
+import hashlib
+import json
+import math
+from dataclasses import asdict, dataclass
+from typing import Any, Union
+
+
+# ロゴのサイズ（最大グリッドサイズの何倍か）
+SIZE_FACTORS = {"l": 5, "m": 4, "s": 3, "xs": 2}
+DEFAULT_SIZE = "m"
+DEFAULT_GRID_TYPE = "isolation"
+DEFAULT_DETAILEDNESS = 1.0
+DEFAULT_POSITION = 50  # 中央
+
+# 裏面のレイアウト（px単位、フロントエンドと同じ値）
+MINIMUM_GRID_SIZE = 4.96
+MAX_GRID_SIZE = MINIMUM_GRID_SIZE * 4
+LOGO_OFFSET = 22.5922
+MEISHI_WIDTH = 257.95
+MEISHI_HEIGHT = 155.91
+# 仕上がりの周囲の塗り足し（3mm、1mm = 2.8346px）
+BLEED_MARGIN = 3 * 2.8346
+# グリッドの描画に使用するスケール（フロントエンドと同じ計算方法）
+GRID_BASE_SCALE = 2
+
+# 表面に使う項目（JSONのキー → フィールド名）
+PROFILE_FIELDS = {
+    "employeeNumber": "employee_number",
+    "name": "name",
+    "nameJa": "name_ja",
+    "office": "office",
+    "roll": "roll",
+    "secondRoll": "second_roll",
+    "tel": "tel",
+    "email": "email",
+}
+
+
+def _number(value: Any, label: str) -> float:
+    """有限の数値であることを確認する（bool や数字の文字列は受け付けない）"""
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or not math.isfinite(value):
+        raise ValueError(f"{label} は数値である必要があります: {value!r}")
+    return value
+
+
+def _mapping(value: Any, label: str) -> dict:
+    if value is None:
+        return {}
+    if not isinstance(value, dict):
+        raise ValueError(f"{label} はオブジェクトである必要があります: {value!r}")
+    return value
+
+
+@dataclass(frozen=True, slots=True)
+class CardSpec:
+    """検証・正規化済みの名刺データ"""
+
+    # 裏面のパターン
+    grid_type: str
+    size: str
+    detailedness: float
+    position_x: float
+    position_y: float
+    # ロゴのサイズとグリッドに吸着した位置（px、塗り足しを含まない名刺の左下基準）
+    logo_width: float
+    logo_height: float
+    logo_x: float
+    logo_y: float
+    # 表面の項目
+    employee_number: str = ""
+    name: str = ""
+    name_ja: str = ""
+    office: str = ""
+    roll: str = ""
+    second_roll: str = ""
+    tel: str = ""
+    email: str = ""
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "CardSpec":
+        """名刺データのJSONを検証して生成（不正な値は ValueError）"""
+        from . import DESIGN_CLASSES
+        from .assets import get_logo_asset
+
+        if not isinstance(data, dict):
+            raise ValueError("名刺データはJSONオブジェクトである必要があります")
+        pattern = _mapping(data.get("pattern"), "pattern")
+        grid = _mapping(pattern.get("grid"), "pattern.grid")
+
+        grid_type = grid.get("type", DEFAULT_GRID_TYPE)
+        if grid_type not in DESIGN_CLASSES:
+            raise ValueError(f"Unknown grid type: {grid_type}")
+
+        # サイズリストに無い値は "m" として描画する
+        size = pattern.get("size", DEFAULT_SIZE)
+        if size not in SIZE_FACTORS:
+            size = DEFAULT_SIZE
+
+        detailedness = _number(grid.get("detailedness", DEFAULT_DETAILEDNESS), "pattern.grid.detailedness")
+        if detailedness <= 0:
+            raise ValueError(f"pattern.grid.detailedness は正の数である必要があります: {detailedness!r}")
+
+        position = _mapping(pattern.get("position", {"x": DEFAULT_POSITION, "y": DEFAULT_POSITION}),
+                            "pattern.position")
+        for axis in ("x", "y"):
+            if axis not in position:
+                raise ValueError(f"pattern.position.{axis} がありません")
+        position_x = _number(position["x"], "pattern.position.x")
+        position_y = _number(position["y"], "pattern.position.y")
+
+        # ロゴのサイズ（アスペクト比を維持）
+        logo = get_logo_asset()
+        logo_height = MAX_GRID_SIZE * SIZE_FACTORS[size]
+        logo_width = logo_height * logo.aspect_ratio
+
+        # 位置を計算（フロントエンドと同じ計算式、Y座標は反転）
+        x = LOGO_OFFSET + (MEISHI_WIDTH - LOGO_OFFSET * 2 - logo_width) * position_x / 100
+        y = MEISHI_HEIGHT - (LOGO_OFFSET + (MEISHI_HEIGHT - LOGO_OFFSET * 2 - logo_height) * position_y / 100) \
+            - logo_height
+
+        # グリッドに合わせて位置を調整
+        unit_size = MINIMUM_GRID_SIZE * detailedness
+        logo_x = int(x / unit_size) * unit_size
+        logo_y = int(y / unit_size) * unit_size
+
+        profile = {}
+        for key, field in PROFILE_FIELDS.items():
+            value = data.get(key)
+            profile[field] = "" if value is None else str(value)
+
+        return cls(grid_type, size, float(detailedness), float(position_x), float(position_y),
+                   logo_width, logo_height, logo_x, logo_y, **profile)
+
+    @property
+    def business_title(self) -> str:
+        """役職の表示文字列（roll / secondRoll）"""
+        return f"{self.roll} / {self.second_roll}" if self.second_roll else self.roll
+
+    def pattern(self) -> dict:
+        """裏面デザインに影響する値（氏名や社員番号は含めない）"""
+        return {
+            "type": self.grid_type,
+            "size": self.size,
+            "detailedness": self.detailedness,
+            # 吸着前の位置が違っても同じ裏面になるため、吸着後の位置を使う
+            "x": round(self.logo_x, 6),
+            "y": round(self.logo_y, 6),
+        }
+
+    def pattern_key(self, version: str, **options) -> str:
+        """裏面のパターン（と出力オプション）の正準ハッシュ（version はデザインの指紋など）"""
+        payload = {"version": version, "pattern": self.pattern(), "options": options}
+        canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"))
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+    def canonical_hash(self) -> str:
+        """全項目（表面の項目を含む）の正準ハッシュ"""
+        canonical = json.dumps(asdict(self), sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def as_card_spec(card: Union[dict, CardSpec]) -> CardSpec:
+    """dict なら検証して CardSpec に変換（既に CardSpec ならそのまま返す）"""
+    if isinstance(card, CardSpec):
+        return card
+    return CardSpec.from_dict(card)
@@ -0,0 +1,7 @@
+from .design import FrontDesign
+from .fonts import font_for_text, ja_font, register_fonts, string_width
+
+
+def create_front_design() -> FrontDesign:
+    """表面デザインのインスタンスを生成"""
+    return FrontDesign()
@@ -0,0 +1,162 @@
+from typing import TYPE_CHECKING
+from meishi_back.colors import palette_color
+from .fonts import font_for_text, ja_font, register_fonts, string_width
+
+if TYPE_CHECKING:
+    from reportlab.pdfgen import canvas
+    from meishi_back.spec import CardSpec
+
+
+# ページの高さ（pt）。レイアウトの座標は front_template.ai と同じく上端からの距離で持つ
+PAGE_HEIGHT = 61 * 2.8346
+
+# 色はパレット（meishi_back.colors）の名前で指定する
+TEXT_COLOR = "text"
+NAME_EN_COLOR = "name_en"
+LABEL_COLOR = "label"
+
+# 区切り線（上端基準の座標）
+LINE_WIDTH = 0.198
+DIVIDER_LINES = [
+    (0, 99.52, 274.96, 99.52),
+    (168.84, 99.52, 168.84, 172.91),
+    (214.3, 99.52, 214.3, 0),
+    (214.3, 99.52, 271.33, 0),
+    (209.55, 0, 274.96, 114.39),
+]
+
+# 名前（和文と英文を並べた幅がこれを超える場合は縮小する）
+NAME_MAX_WIDTH = 160
+NAME_GAP = 9.5
+
+# テンプレートのQRコード（25×25モジュール、1が黒）
+QR_MATRIX = (
+    "1111111000100111101111111",
+    "1000001011100111101000001",
+    "1011101010000001101011101",
+    "1011101001001011001011101",
+    "1011101011101101101011101",
+    "1000001010101101101000001",
+    "1111111010101010101111111",
+    "0000000010110001100000000",
+    "1101001100011110101110110",
+    "1101010101011000111000001",
+    "0010111110011000011110011",
+    "0001110111111101110010000",
+    "1100111100110101111001011",
+    "0001010010010100011101101",
+    "1011011110110100000110101",
+    "0100110000110111111010010",
+    "1101111001001000111111100",
+    "0000000011001000100011001",
+    "1111111011011011101011011",
+    "1000001001101010100011110",
+    "1011101001101110111111010",
+    "1011101011010000100111100",
+    "1011101000000000010110101",
+    "1000001010111100110001000",
+    "1111111011011111101100011",
+)
+QR_BACKGROUND = (203.48, 117.79, 231.82, 146.14)
+QR_ORIGIN = (206.2191, 120.5342)
+QR_MODULE_SIZE = 0.9144
+
+
+class FrontDesign:
+    def __init__(self, width_mm=91, height_mm=55):
+        # 名刺のサイズに周囲3mmを足した大きさ（裏面と同じ）
+        self.width_mm = width_mm + 6
+        self.height_mm = height_mm + 6
+
+    def _generate_design(self, c: "canvas.Canvas", spec: "CardSpec"):
+        """表面デザインを生成（front_template.ai と generate_front.jsx のレイアウトを再現）"""
+        fonts = register_fonts()
+
+        # 背景を描画
+        c.setFillColor(palette_color(c, "paper"))
+        c.rect(0, 0, self.width_mm * 2.8346, self.height_mm * 2.8346, stroke=0, fill=1)
+
+        self.draw_lines(c)
+        self.draw_name(c, spec, fonts)
+
+        # 役職と所属
+        self.draw_text(c, spec.business_title, fonts["mono"], 6, LABEL_COLOR, 32.82, 68.11)
+        self.draw_text(c, spec.office, fonts["mono"], 6, LABEL_COLOR, 32.82, 76.61)
+
+        # 連絡先
+        self.draw_text(c, "E-MAIL:", fonts["mono"], 4.5, LABEL_COLOR, 32.05, 116.88)
+        self.draw_text(c, spec.email, fonts["bold"], 6.5, TEXT_COLOR, 32.42, 125.81)
+        self.draw_text(c, "PHONE:", fonts["mono"], 4.5, LABEL_COLOR, 32.05, 138.43)
+        self.draw_text(c, spec.tel, fonts["bold"], 6.5, TEXT_COLOR, 32.27, 147.36)
+
+        self.draw_qr_code(c)
+
+    def draw_text(self, c: "canvas.Canvas", text: str, font_name: str, font_size: float, color: str,
+                  x: float, top: float):
+        """上端基準のベースライン位置に1行のテキストを描画（color はパレットの名前）
+
+        欧文フォントに無い文字（和文の役職や所属など）を含む場合は和文フォントで描く。
+        """
+        if not text:
+            return
+        c.setFillColor(palette_color(c, color))
+        c.setFont(font_for_text(text, font_name), font_size)
+        c.drawString(x, PAGE_HEIGHT - top, text)
+
+    def draw_name(self, c: "canvas.Canvas", spec: "CardSpec", fonts: dict):
+        """和文の名前の右に英文の名前を並べ、幅が収まらない場合は左端を基準に縮小"""
+        name_ja = spec.name_ja
+        name_en = spec.name
+        x, top = 32.55, 55.65
+        en_font = font_for_text(name_en, fonts["bold"])
+        # 和文の名前は埋め込める和文フォントが無ければ描かずにエラーにする
+        ja_bold = ja_font("ja_bold") if name_ja else None
+
+        ja_width = string_width(name_ja, ja_bold, 9.5) if name_ja else 0
+        en_x = ja_width + NAME_GAP if name_ja else 0
+        total_width = en_x + string_width(name_en, en_font, 7)
+        scale = NAME_MAX_WIDTH / total_width if total_width > NAME_MAX_WIDTH else 1
+
+        c.saveState()
+        c.translate(x, PAGE_HEIGHT - top)
+        c.scale(scale, scale)
+        if name_ja:
+            c.setFillColor(palette_color(c, TEXT_COLOR))
+            c.setFont(ja_bold, 9.5)
+            c.drawString(0, 0, name_ja)
+        if name_en:
+            c.setFillColor(palette_color(c, NAME_EN_COLOR))
+            c.setFont(en_font, 7)
+            c.drawString(en_x, 0, name_en)
+        c.restoreState()
+
+    def draw_lines(self, c: "canvas.Canvas"):
+        """区切り線を描画"""
+        c.setStrokeColor(palette_color(c, "line"))
+        c.setLineWidth(LINE_WIDTH)
+        for x1, top1, x2, top2 in DIVIDER_LINES:
+            c.line(x1, PAGE_HEIGHT - top1, x2, PAGE_HEIGHT - top2)
+
+    def draw_qr_code(self, c: "canvas.Canvas"):
+        """QRコードを描画（横に連続する黒モジュールは1つの矩形にまとめる）"""
+        left, top, right, bottom = QR_BACKGROUND
+        c.setFillColor(palette_color(c, "paper"))
+        c.rect(left, PAGE_HEIGHT - bottom, right - left, bottom - top, stroke=0, fill=1)
+
+        origin_x, origin_top = QR_ORIGIN
+        size = QR_MODULE_SIZE
+        path = c.beginPath()
+        for row, modules in enumerate(QR_MATRIX):
+            y = PAGE_HEIGHT - origin_top - (row + 1) * size
+            col = 0
+            while col < len(modules):
+                if modules[col] == "1":
+                    end = col
+                    while end < len(modules) and modules[end] == "1":
+                        end += 1
+                    path.rect(origin_x + col * size, y, (end - col) * size, size)
+                    col = end
+                else:
+                    col += 1
+        c.setFillColor(palette_color(c, NAME_EN_COLOR))
+        c.drawPath(path, stroke=0, fill=1)
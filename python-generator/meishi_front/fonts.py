@@ -0,0 +1,146 @@
+"""表面で使うフォントの登録と文字幅の計算
+
+フォントの登録（TTFの解析）はプロセス内で1回だけ行い、文字幅の計算結果もキャッシュする。
+和文フォントはTTFをPDFに埋め込む。fonts/ に NotoSansJP が無い場合は MEISHI_JA_FONT で指定したTTF、
+それも無ければ fonts/ 配下で和文の字形を持つTTFを探して使う。どれも無い場合、和文を含む表面の描画は
+ValueError になる（MEISHI_ALLOW_UNEMBEDDED_FONT=1 の時だけ埋め込まれないCIDフォントで代用する）。
+"""
+import glob
+import os
+import sys
+import threading
+from functools import lru_cache
+from typing import Dict, Optional
+
+FONT_DIR = os.path.normpath(os.path.join(os.path.dirname(__file__), "..", "fonts"))
+
+# 役割 → (登録名, fonts/ 配下のファイル名)
+FONT_FILES = {
+    "bold": ("Inter-Bold", "Inter_18pt-Bold.ttf"),
+    "mono": ("IBMPlexMono", "IBMPlexMono-Regular.ttf"),
+    "ja_bold": ("NotoSansJP-Bold", "NotoSansJP-Bold.ttf"),
+    "ja": ("NotoSansJP-Regular", "NotoSansJP-Regular.ttf"),
+}
+# 和文フォントの役割（ファイルが無くても別のTTFで代用する）
+JA_ROLES = ("ja_bold", "ja")
+# 欧文フォントに無い文字（和文など）を含むテキストを描く和文フォントの役割
+JA_SUBSTITUTES = {"bold": "ja_bold", "mono": "ja"}
+
+# 和文フォントのTTFがどこにも無い場合に使うreportlab組み込みのCIDフォント（PDFには埋め込まれない）
+JA_FALLBACK_FONT = "HeiseiKakuGo-W5"
+# 埋め込まれないフォントでの代用を許可する環境変数（入稿に使わない確認用の出力のみ）
+ALLOW_UNEMBEDDED_ENV = "MEISHI_ALLOW_UNEMBEDDED_FONT"
+# 和文フォントを探すときに字形の有無を確かめる文字
+_JA_PROBE = "あ"
+
+_fonts: Dict[str, Optional[str]] = {}
+_fonts_lock = threading.Lock()
+
+
+def _has_ja_glyphs(font) -> bool:
+    return ord(_JA_PROBE) in font.face.charToGlyph
+
+
+def find_ja_font() -> Optional[str]:
+    """埋め込みに使う和文フォントのTTF（MEISHI_JA_FONT、無ければ fonts/ 配下で和文の字形を持つもの）"""
+    from reportlab.pdfbase.ttfonts import TTFont
+
+    path = os.environ.get("MEISHI_JA_FONT")
+    if path:
+        if not os.path.exists(path):
+            raise ValueError(f"MEISHI_JA_FONT のフォントが見つかりません: {path}")
+        return path
+    for path in sorted(glob.glob(os.path.join(FONT_DIR, "*.ttf")) + glob.glob(os.path.join(FONT_DIR, "*.ttc"))):
+        try:
+            if _has_ja_glyphs(TTFont("_probe", path)):
+                return path
+        except Exception:
+            # TrueType以外（CFFのOTFなど）はreportlabで埋め込めないため使わない
+            continue
+    return None
+
+
+def register_fonts() -> Dict[str, Optional[str]]:
+    """フォントを登録して 役割 → フォント名 を返す（2回目以降は登録済みの結果を返す）
+
+    埋め込める和文フォントが無い場合、和文の役割は None になる（和文を描く時に ja_font で ValueError）。
+    """
+    if _fonts:
+        return _fonts
+
+    from reportlab.pdfbase import pdfmetrics
+    from reportlab.pdfbase.ttfonts import TTFont
+
+    with _fonts_lock:
+        if _fonts:
+            return _fonts
+        fonts = {}
+        for role, (font_name, filename) in FONT_FILES.items():
+            path = os.path.join(FONT_DIR, filename)
+            if os.path.exists(path):
+                pdfmetrics.registerFont(TTFont(font_name, path))
+                fonts[role] = font_name
+            elif role not in JA_ROLES:
+                raise ValueError(f"フォントが見つかりません: {path}")
+            elif "ja_bold" in fonts:
+                # 太さ違いのファイルが無い場合は登録済みの和文フォントを使う
+                fonts[role] = fonts["ja_bold"]
+            else:
+                fonts[role] = _register_ja_font()
+        _fonts.update(fonts)
+    return _fonts
+
+
+def _register_ja_font() -> Optional[str]:
+    """NotoSansJP が無い場合の和文フォントを登録してフォント名を返す（埋め込めるものが無ければ None）"""
+    from reportlab.pdfbase import pdfmetrics
+    from reportlab.pdfbase.ttfonts import TTFont
+
+    path = find_ja_font()
+    if path:
+        font_name = "JA-" + os.path.splitext(os.path.basename(path))[0]
+        pdfmetrics.registerFont(TTFont(font_name, path))
+        return font_name
+
+    if os.environ.get(ALLOW_UNEMBEDDED_ENV) != "1":
+        return None
+
+    from reportlab.pdfbase.cidfonts import UnicodeCIDFont
+    print(f"⚠️ 和文フォントのTTFが見つからないため、PDFに埋め込まれない {JA_FALLBACK_FONT} で代用します"
+          f"（入稿用には {FONT_DIR} に {FONT_FILES['ja_bold'][1]} を置くか MEISHI_JA_FONT を指定してください）",
+          file=sys.stderr)
+    pdfmetrics.registerFont(UnicodeCIDFont(JA_FALLBACK_FONT))
+    return JA_FALLBACK_FONT
+
+
+def ja_font(role: str = "ja_bold") -> str:
+    """和文フォントの登録名（埋め込める和文フォントが無い場合は ValueError）"""
+    font_name = register_fonts()[role]
+    if font_name is None:
+        raise ValueError(f"和文を描くためのフォントのTTFが見つかりません（{FONT_DIR} に {FONT_FILES[role][1]} を置くか "
+                         f"MEISHI_JA_FONT を指定してください。埋め込まれない {JA_FALLBACK_FONT} で代用する場合は "
+                         f"{ALLOW_UNEMBEDDED_ENV}=1）")
+    return font_name
+
+
+@lru_cache(maxsize=4096)
+def font_for_text(text: str, font_name: str) -> str:
+    """テキストを描くフォント（欧文フォントに無い文字を含む場合は対応する和文フォント）"""
+    from reportlab.pdfbase import pdfmetrics
+
+    fonts = register_fonts()
+    substitutes = {fonts[role]: ja_role for role, ja_role in JA_SUBSTITUTES.items()}
+    if font_name not in substitutes:
+        return font_name
+    glyphs = pdfmetrics.getFont(font_name).face.charToGlyph
+    if all(ord(char) in glyphs for char in text):
+        return font_name
+    return ja_font(substitutes[font_name])
+
+
+@lru_cache(maxsize=4096)
+def string_width(text: str, font_name: str, font_size: float) -> float:
+    """文字列の幅（pt）"""
+    from reportlab.pdfbase import pdfmetrics
+
+    return pdfmetrics.stringWidth(text, font_name, font_size)
@@ -0,0 +1,412 @@
+"""ローカルHTTPレンダリングサービス（asyncio）
+
+リクエストごとに `python3 main.py` を起動する代わりに、常駐するワーカープールで裏面PDFを生成する。
+同時に描画する件数は --workers、待ち行列の長さは --max-queue までに制限し、
+待ち行列が埋まっている間は 429 を返す（大量の申込みでプロセスが増え続けてメモリが溢れないようにする）。
+同じパターン（正規化後）の同時リクエストは1回の描画結果を共有する。
+
+    python server.py --port 5001 --workers 2 --max-queue 16
+
+エンドポイント:
+    POST /render               名刺データ（JSON）→ 裏面PDF（application/pdf）
+    POST /render?format=svg    名刺データ（JSON）→ プレビュー用SVG（image/svg+xml）
+    POST /render?side=front    名刺データ（JSON）→ 表面PDF（application/pdf）
+    POST /render?format=zip    名刺データ（JSON）→ 入稿用フォルダのZIP（application/zip、name でフォルダ名を指定）
+    POST /contact-sheet        名刺データ（JSON）→ 裏面のパターンの一覧PDF（グリッドの種類ごとに1ページ）
+                               grids=isolation,hybrid / sizes=l,m / position=x,y（複数可）で組み合わせを指定、
+                               format=svg でSVG
+    （PDF・ZIPは ?color=cmyk を付けると印刷用のCMYKで出力）
+    GET  /metrics              処理件数・待ち行列の状態（JSON）
+    GET  /healthz              死活確認
+"""
+import argparse
+import asyncio
+import io
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+from typing import Dict, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from daemon import init_worker
+from main import render_back, render_front, render_options
+from meishi_back.cache import pattern_key
+from meishi_back.colors import COLOR_MODES, DEFAULT_COLOR_MODE
+from meishi_back.spec import CardSpec
+
+
+# リクエストボディの上限（名刺データ1件分には十分な大きさ）
+MAX_BODY_BYTES = 1024 * 1024
+
+REASONS = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    413: "Payload Too Large",
+    429: "Too Many Requests",
+    500: "Internal Server Error",
+}
+
+
+class HttpError(Exception):
+    """ステータスコード付きのエラー（レスポンスにJSONで返す）"""
+
+    def __init__(self, status: int, kind: str, message: str):
+        super().__init__(message)
+        self.status = status
+        self.kind = kind
+
+
+def build_bundle(data: dict, back_pdf: bytes, front_pdf: bytes, folder_name: Optional[str]) -> bytes:
+    """入稿用フォルダのZIPをメモリ上で作る"""
+    from meishi_back.bundle import write_bundle
+
+    buffer = io.BytesIO()
+    write_bundle(buffer, data, back_pdf, front_pdf, folder_name)
+    return buffer.getvalue()
+
+
+class SharedRender:
+    """同じパターンのリクエストが共有する描画（待っているリクエストが1つでも残っていれば取り消さない）"""
+
+    def __init__(self, task: "asyncio.Task"):
+        self.task = task
+        self.waiters = 0
+
+
+class RenderService:
+    """描画の同時実行数と待ち行列を管理し、同じパターンの描画をまとめる"""
+
+    def __init__(self, workers: int, max_queue: int, enable_metrics: bool = False):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.enable_metrics = enable_metrics
+        self.executor = self._create_executor()
+        self.semaphore = asyncio.Semaphore(workers)
+        # パターンのキー → 描画中の SharedRender
+        self.inflight: Dict[str, SharedRender] = {}
+        self.waiting = 0
+        self.running = 0
+        self.counters = {"requests": 0, "rendered": 0, "coalesced": 0, "rejected": 0, "failed": 0, "previews": 0,
+                         "fronts": 0, "contact_sheets": 0}
+        self.started_at = time.time()
+
+    def _create_executor(self) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(max_workers=self.workers, initializer=init_worker,
+                                   initargs=(self.enable_metrics,))
+
+    async def render(self, spec: CardSpec, color_mode: str = DEFAULT_COLOR_MODE) -> bytes:
+        """裏面PDFを生成（同じパターンの描画中のリクエストがあれば結果を共有する）
+
+        描画はリクエストとは別のタスクで行うため、1つのリクエストが取り消されても
+        同じ描画を待っている他のリクエストには影響しない。
+        """
+        key = pattern_key(spec, **render_options(color_mode=color_mode))
+
+        shared = self.inflight.get(key)
+        if shared is not None:
+            self.counters["coalesced"] += 1
+        else:
+            if self.waiting + self.running >= self.workers + self.max_queue:
+                self.counters["rejected"] += 1
+                raise HttpError(429, "queue_full", "描画の待ち行列が埋まっています。しばらくしてから再試行してください")
+            task = asyncio.create_task(self._render_in_pool(partial(render_back, color_mode=color_mode), spec))
+            shared = self.inflight[key] = SharedRender(task)
+            task.add_done_callback(partial(self._finish_shared, key))
+
+        shared.waiters += 1
+        try:
+            return await asyncio.shield(shared.task)
+        except asyncio.CancelledError:
+            # このリクエストではなく共有の描画が取り消された場合（サーバーの停止など）はエラーとして返す
+            if shared.task.cancelled() and not asyncio.current_task().cancelling():
+                raise HttpError(500, "render_cancelled", "描画が取り消されました。再試行してください")
+            raise
+        finally:
+            shared.waiters -= 1
+            if shared.waiters == 0 and not shared.task.done():
+                # 待っているリクエストが無くなった描画だけを取り消す
+                shared.task.cancel()
+
+    def _finish_shared(self, key: str, task: "asyncio.Task"):
+        if key in self.inflight and self.inflight[key].task is task:
+            del self.inflight[key]
+        # 待っているリクエストが無い場合に「取得されなかった例外」の警告を出さない
+        if not task.cancelled():
+            task.exception()
+
+    async def render_front(self, spec: CardSpec, color_mode: str = DEFAULT_COLOR_MODE) -> bytes:
+        """表面PDFを生成（名前や連絡先ごとに異なるため描画はまとめない）"""
+        if self.waiting + self.running >= self.workers + self.max_queue:
+            self.counters["rejected"] += 1
+            raise HttpError(429, "queue_full", "描画の待ち行列が埋まっています。しばらくしてから再試行してください")
+        self.counters["fronts"] += 1
+        return await self._render_in_pool(partial(render_front, color_mode=color_mode), spec)
+
+    async def render_bundle(self, data: dict, spec: CardSpec, folder_name: Optional[str] = None,
+                            color_mode: str = DEFAULT_COLOR_MODE) -> bytes:
+        """裏面と表面を並行して生成し、入稿用フォルダのZIPにまとめる"""
+        tasks = (asyncio.create_task(self.render(spec, color_mode)),
+                 asyncio.create_task(self.render_front(spec, color_mode)))
+        try:
+            back_pdf, front_pdf = await asyncio.gather(*tasks)
+        except BaseException:
+            # 片方が失敗したらもう片方も取り消す（裏面の描画を他のリクエストと共有している場合、その描画は続く）
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+        # 表面のテンプレートの初回の圧縮（事前圧縮ファイルが無い場合）はCPUを使うため、イベントループの外で行う
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, build_bundle, data, back_pdf, front_pdf, folder_name)
+
+    async def render_contact_sheet(self, spec: CardSpec, variants: dict, svg: bool = False,
+                                   color_mode: str = DEFAULT_COLOR_MODE) -> bytes:
+        """裏面のパターンの一覧（全ての組み合わせを1回の呼び出しでまとめて描画する）"""
+        from meishi_back.contact_sheet import render_contact_sheet_pdf, render_contact_sheet_svg
+
+        if self.waiting + self.running >= self.workers + self.max_queue:
+            self.counters["rejected"] += 1
+            raise HttpError(429, "queue_full", "描画の待ち行列が埋まっています。しばらくしてから再試行してください")
+        self.counters["contact_sheets"] += 1
+        if svg:
+            sheet = await self._render_in_pool(partial(render_contact_sheet_svg, **variants), spec)
+            return sheet.encode("utf-8")
+        return await self._render_in_pool(partial(render_contact_sheet_pdf, color_mode=color_mode, **variants), spec)
+
+    async def _render_in_pool(self, render, spec: CardSpec) -> bytes:
+        self.waiting += 1
+        try:
+            await self.semaphore.acquire()
+        finally:
+            self.waiting -= 1
+        self.running += 1
+        try:
+            job = self.executor.submit(render, spec)
+            pdf = await asyncio.wrap_future(job)
+        except asyncio.CancelledError:
+            # プロセスで実行中の描画は止められないため、終わるまで枠を空けない（--workers を超えて描画しない）
+            if job.cancel() or job.done():
+                self._release_slot()
+            else:
+                loop = asyncio.get_running_loop()
+                job.add_done_callback(lambda _: loop.call_soon_threadsafe(self._release_slot))
+            raise
+        except BrokenProcessPool:
+            # ワーカーが異常終了した場合はプールを作り直す（このリクエストは失敗とする）
+            self.counters["failed"] += 1
+            self._release_slot()
+            self.executor.shutdown(wait=False)
+            self.executor = self._create_executor()
+            raise
+        except Exception:
+            self.counters["failed"] += 1
+            self._release_slot()
+            raise
+        self.counters["rendered"] += 1
+        self._release_slot()
+        return pdf
+
+    def _release_slot(self):
+        self.running -= 1
+        self.semaphore.release()
+
+    def render_preview(self, spec: CardSpec) -> str:
+        """プレビュー用SVG（1ms未満で描画できるためイベントループ上で直接描画する）"""
+        from meishi_back.preview import render_back_svg
+
+        self.counters["previews"] += 1
+        return render_back_svg(spec)
+
+    def snapshot(self) -> dict:
+        return {
+            "workers": self.workers,
+            "max_queue": self.max_queue,
+            "running": self.running,
+            "waiting": self.waiting,
+            "inflight_patterns": len(self.inflight),
+            "uptime_s": round(time.time() - self.started_at, 1),
+            **self.counters,
+        }
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+
+
+async def read_request(reader: asyncio.StreamReader) -> Optional[Tuple[str, str, dict, bytes]]:
+    """HTTP/1.1のリクエストを1件読み込む（接続が閉じられた場合はNone）"""
+    request_line = await reader.readline()
+    if not request_line.strip():
+        return None
+    try:
+        method, target, _ = request_line.decode("latin-1").split(" ", 2)
+    except ValueError:
+        raise HttpError(400, "bad_request", "リクエスト行が不正です")
+
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+
+    try:
+        length = int(headers.get("content-length") or 0)
+    except ValueError:
+        raise HttpError(400, "bad_request", "Content-Length が不正です")
+    if length < 0:
+        raise HttpError(400, "bad_request", "Content-Length が不正です")
+    if length > MAX_BODY_BYTES:
+        raise HttpError(413, "payload_too_large", f"リクエストボディが大きすぎます（上限 {MAX_BODY_BYTES} バイト）")
+    body = await reader.readexactly(length) if length else b""
+    return method.upper(), target, headers, body
+
+
+def build_response(status: int, body: bytes, content_type: str, keep_alive: bool, extra_headers: dict = None) -> bytes:
+    headers = {
+        "Content-Type": content_type,
+        "Content-Length": str(len(body)),
+        "Connection": "keep-alive" if keep_alive else "close",
+    }
+    if extra_headers:
+        headers.update(extra_headers)
+    head = f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\n"
+    head += "".join(f"{name}: {value}\r\n" for name, value in headers.items())
+    return (head + "\r\n").encode("latin-1") + body
+
+
+def json_body(payload: dict) -> bytes:
+    return json.dumps(payload, ensure_ascii=False).encode("utf-8")
+
+
+def parse_sheet_variants(spec: CardSpec, query: dict) -> dict:
+    """コンタクトシートの組み合わせの指定（render_contact_sheet_* の引数）を検証して返す"""
+    from meishi_back.contact_sheet import DEFAULT_POSITIONS, build_variants, parse_position
+
+    try:
+        variants = {
+            "grid_types": query["grids"][0].split(",") if "grids" in query else None,
+            "sizes": query["sizes"][0].split(",") if "sizes" in query else None,
+            "positions": [parse_position(p) for p in query["position"]] if "position" in query else DEFAULT_POSITIONS,
+        }
+        build_variants(spec, **variants)
+    except ValueError as e:
+        raise HttpError(400, "invalid_option", str(e))
+    return variants
+
+
+async def dispatch(service: RenderService, method: str, target: str, body: bytes) -> Tuple[int, bytes, str]:
+    """パスに応じて処理し、(ステータス, ボディ, Content-Type) を返す"""
+    url = urlsplit(target)
+    if url.path == "/healthz":
+        return 200, json_body({"ok": True}), "application/json"
+    if url.path == "/metrics":
+        return 200, json_body(service.snapshot()), "application/json"
+    if url.path not in ("/render", "/contact-sheet"):
+        raise HttpError(404, "not_found", f"{url.path} は存在しません")
+    if method != "POST":
+        raise HttpError(405, "method_not_allowed", "POSTで送信してください")
+
+    try:
+        data = json.loads(body)
+    except ValueError as e:
+        raise HttpError(400, "invalid_json", str(e))
+    if not isinstance(data, dict):
+        raise HttpError(400, "invalid_json", "名刺データはJSONオブジェクトである必要があります")
+
+    # 名刺データはここで1回だけ検証し、以降は CardSpec を渡す
+    try:
+        spec = CardSpec.from_dict(data)
+    except ValueError as e:
+        raise HttpError(400, "invalid_card", str(e))
+
+    service.counters["requests"] += 1
+    query = parse_qs(url.query)
+    fmt = query.get("format", ["pdf"])[0]
+    color_mode = query.get("color", [DEFAULT_COLOR_MODE])[0]
+    if color_mode not in COLOR_MODES:
+        raise HttpError(400, "invalid_option", f"color は {' / '.join(COLOR_MODES)} のいずれかです: {color_mode}")
+    if url.path == "/contact-sheet":
+        variants = parse_sheet_variants(spec, query)
+        if fmt == "svg":
+            return 200, await service.render_contact_sheet(spec, variants, svg=True), "image/svg+xml"
+        return 200, await service.render_contact_sheet(spec, variants, color_mode=color_mode), "application/pdf"
+    if fmt == "svg":
+        return 200, service.render_preview(spec).encode("utf-8"), "image/svg+xml"
+    if fmt == "zip":
+        return 200, await service.render_bundle(data, spec, query.get("name", [None])[0], color_mode), \
+            "application/zip"
+    if query.get("side", ["back"])[0] == "front":
+        return 200, await service.render_front(spec, color_mode), "application/pdf"
+    return 200, await service.render(spec, color_mode), "application/pdf"
+
+
+async def handle_connection(service: RenderService, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+    try:
+        while True:
+            keep_alive = False
+            extra_headers = None
+            try:
+                request = await read_request(reader)
+                if request is None:
+                    break
+                method, target, headers, body = request
+                keep_alive = headers.get("connection", "").lower() != "close"
+                status, payload, content_type = await dispatch(service, method, target, body)
+            except HttpError as e:
+                status, content_type = e.status, "application/json"
+                payload = json_body({"ok": False, "error": e.kind, "message": str(e)})
+                if e.status == 429:
+                    extra_headers = {"Retry-After": "1"}
+            except (asyncio.IncompleteReadError, ConnectionError):
+                break
+            except Exception as e:
+                status, content_type = 500, "application/json"
+                payload = json_body({"ok": False, "error": "render_failed", "message": f"{type(e).__name__}: {e}"})
+
+            writer.write(build_response(status, payload, content_type, keep_alive, extra_headers))
+            await writer.drain()
+            if not keep_alive:
+                break
+    except ConnectionError:
+        pass
+    finally:
+        writer.close()
+
+
+async def serve(host: str, port: int, workers: int, max_queue: int, enable_metrics: bool):
+    service = RenderService(workers, max_queue, enable_metrics)
+    server = await asyncio.start_server(lambda r, w: handle_connection(service, r, w), host, port)
+    print(f"✅ レンダリングサービス起動中: http://{host}:{port} (workers={workers}, max_queue={max_queue})",
+          file=sys.stderr)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        service.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="名刺レンダリングサービス（HTTP）")
+    parser.add_argument("--host", default="127.0.0.1", help="待ち受けるアドレス")
+    parser.add_argument("--port", type=int, default=5001, help="待ち受けるポート")
+    parser.add_argument("--workers", type=int, default=None, help="同時に描画するワーカープロセス数（既定: CPU数）")
+    parser.add_argument("--max-queue", type=int, default=16, help="描画待ちにできるリクエスト数（超えると429）")
+    parser.add_argument("--metrics", action="store_true", help="ワーカーの計測結果を標準エラー出力にJSONで書き出す")
+    args = parser.parse_args()
+
+    workers = args.workers or os.cpu_count() or 1
+    try:
+        asyncio.run(serve(args.host, args.port, workers, args.max_queue, args.metrics))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
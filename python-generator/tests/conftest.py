@@ -0,0 +1,29 @@
+"""テスト共通の設定
+
+python-generator 直下のモジュール（main.py など）を読み込めるようにし、
+事前描画パックと描画キャッシュは各テストで明示的に使う場合を除いて無効にする。
+"""
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+
+@pytest.fixture(autouse=True)
+def isolated_env(monkeypatch):
+    monkeypatch.setenv("MEISHI_PACK", "0")
+    monkeypatch.setenv("MEISHI_CACHE", "0")
+    monkeypatch.delenv("MEISHI_PALETTE", raising=False)
+    monkeypatch.delenv("MEISHI_JA_FONT", raising=False)
+    monkeypatch.delenv("MEISHI_ALLOW_UNEMBEDDED_FONT", raising=False)
+
+
+def card(grid_type: str = "isolation", size: str = "m", detailedness: float = 1.0, x: float = 50, y: float = 50,
+         **profile) -> dict:
+    """テスト用の名刺データ"""
+    return dict({"pattern": {"grid": {"type": grid_type, "detailedness": detailedness}, "size": size,
+                             "position": {"x": x, "y": y}}}, **profile)
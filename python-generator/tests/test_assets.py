@@ -0,0 +1,54 @@
+import os
+import shutil
+
+import pytest
+
+from meishi_back import assets
+from meishi_back.assets import build_precompiled_logo, clear_logo_cache, get_logo_asset
+
+
+@pytest.fixture
+def logo(tmp_path):
+    path = str(tmp_path / "logo.svg")
+    shutil.copyfile(assets.DEFAULT_LOGO_PATH, path)
+    yield path
+    clear_logo_cache()
+
+
+def test_logo_is_parsed_once_per_process(logo, monkeypatch):
+    first = get_logo_asset(logo)
+    # 2回目以降は解析し直さない
+    monkeypatch.setattr(assets, "_parse_svg", lambda path: pytest.fail("ロゴを解析し直しました"))
+    assert get_logo_asset(logo) is first
+
+
+def test_updated_logo_is_reloaded(logo):
+    first = get_logo_asset(logo)
+    with open(logo, 'a', encoding='utf-8') as f:
+        f.write("<!-- updated -->\n")
+    stat = os.stat(logo)
+    os.utime(logo, (stat.st_atime + 3600, stat.st_mtime + 3600))
+    second = get_logo_asset(logo)
+    assert second is not first
+    assert second.digest != first.digest
+    # 同じパスの古い版はキャッシュから消える
+    assert [key for key in assets._cache if key[0] == os.path.abspath(logo)] == [(second.path, second.mtime)]
+
+
+def test_precompiled_logo_skips_svglib(logo, monkeypatch):
+    build_precompiled_logo(logo)
+    monkeypatch.setattr(assets, "_parse_svg", lambda path: pytest.fail("svglib で解析しました"))
+    asset = get_logo_asset(logo)
+    assert asset.drawing.width > 0
+    assert asset.aspect_ratio == get_logo_asset().aspect_ratio
+
+
+def test_stale_precompiled_logo_is_ignored(logo, monkeypatch):
+    build_precompiled_logo(logo)
+    with open(logo, 'a', encoding='utf-8') as f:
+        f.write("<!-- updated -->\n")
+    parsed = []
+    parse_svg = assets._parse_svg
+    monkeypatch.setattr(assets, "_parse_svg", lambda path: parsed.append(path) or parse_svg(path))
+    get_logo_asset(logo)
+    assert parsed == [os.path.abspath(logo)]
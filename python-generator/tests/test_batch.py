@@ -0,0 +1,55 @@
+import io
+import json
+
+from batch import InvalidRecord, iter_csv, iter_jsonl, iter_records, run_batch, run_batch_parallel
+from conftest import card
+
+
+def records(count: int) -> list:
+    """社員番号と名前の異なる名刺データ（3件目ごとに不正なグリッドを混ぜる）"""
+    return [card("spiral" if i % 3 == 2 else "isolation", x=i * 10, employeeNumber=str(i), name=f"Member {i}")
+            for i in range(count)]
+
+
+def test_iter_jsonl_reports_bad_lines():
+    lines = io.StringIO('{"name": "a"}\n\nnot json\n[1, 2]\n{"name": "b"}\n')
+    result = list(iter_jsonl(lines))
+    assert [r["name"] for r in result if isinstance(r, dict)] == ["a", "b"]
+    errors = [str(r) for r in result if isinstance(r, InvalidRecord)]
+    assert len(errors) == 2 and errors[0].startswith("3行目")
+
+
+def test_iter_csv_splits_business_title():
+    rows = io.StringIO("employeeNumber,name,businessTitle\n1,Taro,Engineer / Lead\n2,Hanako,Designer\n")
+    first, second = iter_csv(rows)
+    assert (first["roll"], first["secondRoll"]) == ("Engineer", "Lead")
+    assert second["roll"] == "Designer" and "secondRoll" not in second
+
+
+def test_iter_records_detects_format(tmp_path):
+    path = tmp_path / "members.csv"
+    path.write_text("employeeNumber,name\n1,Taro\n", encoding="utf-8")
+    assert list(iter_records(str(path))) == [{"employeeNumber": "1", "name": "Taro"}]
+
+
+def test_run_batch_reports_each_record_in_order(tmp_path):
+    report = io.StringIO()
+    summary = run_batch(iter(records(5) + [InvalidRecord("6行目のJSONが不正です")]), str(tmp_path), report)
+    assert summary == {"total": 6, "succeeded": 4, "failed": 2, "skipped": 0}
+    results = [json.loads(line) for line in report.getvalue().splitlines()]
+    assert [r["index"] for r in results] == list(range(6))
+    assert [r["ok"] for r in results] == [True, True, False, True, True, False]
+    assert (tmp_path / "0_member_0_back.pdf").read_bytes().startswith(b"%PDF-")
+    assert not (tmp_path / "2_member_2_back.pdf").exists()
+
+
+def test_parallel_batch_matches_sequential(tmp_path):
+    sequential, parallel = io.StringIO(), io.StringIO()
+    run_batch(iter(records(9)), str(tmp_path / "seq"), sequential)
+    summary = run_batch_parallel(iter(records(9)), str(tmp_path / "par"), parallel, workers=2, chunk_size=2)
+    assert summary == {"total": 9, "succeeded": 6, "failed": 3, "skipped": 0}
+    # 結果は入力順に書き出され、出力先のディレクトリ以外は同じ
+    assert parallel.getvalue().replace("/par/", "/seq/") == sequential.getvalue()
+    for i in (0, 4, 7):
+        name = f"{i}_member_{i}_back.pdf"
+        assert (tmp_path / "par" / name).read_bytes() == (tmp_path / "seq" / name).read_bytes()
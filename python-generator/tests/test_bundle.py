@@ -0,0 +1,92 @@
+import io
+import json
+import zipfile
+from datetime import datetime, timezone
+
+from conftest import card
+from meishi_back.bundle import (CSV_HEADER, FRONT_TEMPLATE_PATH, ZipStreamWriter, build_csv, default_folder_name,
+                                write_bundle)
+
+DATE = datetime(2025, 4, 1, 9, 30, tzinfo=timezone.utc)
+
+
+class WriteOnly:
+    """シークも読み出しもできない出力先（標準出力やソケットの代わり）"""
+
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data: bytes):
+        self.chunks.append(bytes(data))
+
+    def getvalue(self) -> bytes:
+        return b"".join(self.chunks)
+
+
+def bundle(data: dict, front_pdf=b"%PDF-front", **kwargs) -> zipfile.ZipFile:
+    out = WriteOnly()
+    size = write_bundle(out, data, b"%PDF-back", front_pdf, date_time=DATE, **kwargs)
+    content = out.getvalue()
+    assert size == len(content)
+    return zipfile.ZipFile(io.BytesIO(content))
+
+
+def test_bundle_is_valid_zip_with_expected_entries():
+    data = card(employeeNumber=7, name="Taro Yamada", nameJa="山田 太郎", office="Tokyo", roll="Engineer",
+                secondRoll="Designer", tel="03-0000-0000", email="taro@example.com")
+    folder = "250401_7_taro_yamada_Tokyo"
+    assert default_folder_name(data, DATE) == folder
+    with bundle(data, folder_name=folder) as archive:
+        assert archive.testzip() is None
+        assert archive.namelist() == [
+            f"{folder}/", f"{folder}/7_taro_yamada.json", f"{folder}/ai/", f"{folder}/ai/front_template.ai",
+            f"{folder}/ai/links/", f"{folder}/ai/scripts/", f"{folder}/ai/scripts/generate_front.jsx",
+            f"{folder}/ai/variables/", f"{folder}/ai/variables/data.csv", f"{folder}/pdf/",
+            f"{folder}/pdf/7_taro_yamada_back.pdf", f"{folder}/pdf/7_taro_yamada_front.pdf",
+        ]
+        assert json.loads(archive.read(f"{folder}/7_taro_yamada.json")) == data
+        assert archive.read(f"{folder}/pdf/7_taro_yamada_back.pdf") == b"%PDF-back"
+        # PDFは無圧縮、テンプレートは事前に圧縮したエントリ
+        assert archive.getinfo(f"{folder}/pdf/7_taro_yamada_back.pdf").compress_type == zipfile.ZIP_STORED
+        assert archive.getinfo(f"{folder}/ai/front_template.ai").compress_type == zipfile.ZIP_DEFLATED
+        with open(FRONT_TEMPLATE_PATH, 'rb') as f:
+            assert archive.read(f"{folder}/ai/front_template.ai") == f.read()
+        assert archive.read(f"{folder}/ai/variables/data.csv").decode("utf-8") == (
+            f"{CSV_HEADER}\n7,山田 太郎,Taro Yamada,Engineer / Designer,03-0000-0000,taro@example.com,Tokyo")
+
+
+def test_bundle_without_front_and_with_folder_name():
+    with bundle(card(employeeNumber=1, name="A"), front_pdf=None, folder_name="custom") as archive:
+        assert archive.testzip() is None
+        names = archive.namelist()
+        assert "custom/pdf/1_a_back.pdf" in names
+        assert not any(name.endswith("_front.pdf") for name in names)
+
+
+def test_null_fields_are_empty_in_names():
+    data = card(employeeNumber=None, name=None, office=None)
+    assert default_folder_name(data, DATE) == "250401___"
+    with bundle(data, folder_name="folder") as archive:
+        assert archive.testzip() is None
+        assert "folder/pdf/__back.pdf" in archive.namelist()
+        assert not any("None" in name for name in archive.namelist())
+    assert build_csv(data).splitlines()[1] == ",,,,,,"
+
+
+def test_zip_writer_round_trips_utf8_names():
+    out = io.BytesIO()
+    writer = ZipStreamWriter(out, DATE)
+    writer.add_directory("フォルダ")
+    writer.add_bytes("フォルダ/a.txt", "名刺".encode("utf-8") * 100)
+    writer.add_bytes("フォルダ/b.bin", bytes(range(256)), compress=False)
+    assert writer.close() == len(out.getvalue())
+    with zipfile.ZipFile(out) as archive:
+        assert archive.testzip() is None
+        assert archive.namelist() == ["フォルダ/", "フォルダ/a.txt", "フォルダ/b.bin"]
+        assert archive.getinfo("フォルダ/").is_dir()
+        assert archive.read("フォルダ/a.txt") == "名刺".encode("utf-8") * 100
+        assert archive.getinfo("フォルダ/b.bin").date_time == (2025, 4, 1, 9, 30, 0)
+
+
+def test_zero_employee_number_is_kept():
+    assert default_folder_name(card(employeeNumber=0, name="Zero"), DATE).startswith("250401_0_zero_")
@@ -0,0 +1,50 @@
+import pytest
+
+import main
+from conftest import card
+from meishi_back import cache, pack
+from meishi_back.cache import RenderCache, pattern_key
+
+
+def test_memory_cache_evicts_least_recently_used():
+    render_cache = RenderCache(memory_entries=2)
+    render_cache.put("a", b"A")
+    render_cache.put("b", b"B")
+    assert render_cache.get("a") == b"A"
+    render_cache.put("c", b"C")
+    assert render_cache.get("b") is None
+    assert (render_cache.get("a"), render_cache.get("c")) == (b"A", b"C")
+
+
+def test_disk_cache_is_shared_between_instances(tmp_path):
+    RenderCache(memory_entries=0, disk_dir=str(tmp_path)).put("ab" * 32, b"%PDF-1")
+    assert RenderCache(disk_dir=str(tmp_path)).get("ab" * 32) == b"%PDF-1"
+
+
+def test_disk_cache_stays_under_limit(tmp_path):
+    render_cache = RenderCache(memory_entries=0, disk_dir=str(tmp_path), disk_max_bytes=1000)
+    for i in range(10):
+        render_cache.put(f"{i:02d}" * 32, b"x" * 300)
+    assert render_cache._scan_disk_bytes() <= 1000
+    # 最後に書いたものは残る
+    assert render_cache.get("09" * 32) == b"x" * 300
+
+
+def test_pattern_key_ignores_profile_and_snapped_position():
+    assert pattern_key(card(x=50, y=50, name="Taro")) == pattern_key(card(x=50.5, y=50.2, name="Hanako"))
+    assert pattern_key(card()) != pattern_key(card(size="s"))
+    assert pattern_key(card()) != pattern_key(card(), compact=True)
+
+
+def test_pattern_key_changes_with_logo(monkeypatch):
+    before = pattern_key(card())
+    monkeypatch.setattr(pack, "logo_digest", lambda: "other logo")
+    assert pattern_key(card()) != before
+
+
+def test_render_back_reuses_cached_pdf(monkeypatch):
+    monkeypatch.setenv("MEISHI_CACHE", "1")
+    monkeypatch.setattr(cache, "_render_cache", None)
+    first = main.render_back(card(name="Taro"))
+    monkeypatch.setattr(main, "_render_back_pdf", lambda *args: pytest.fail("キャッシュを使わずに描画しました"))
+    assert main.render_back(card(x=50.5, name="Hanako")) == first
@@ -0,0 +1,95 @@
+import io
+import json
+import re
+
+import pytest
+
+from conftest import card
+from main import _create_canvas, render_back, render_options
+from meishi_back import create_back_design
+from meishi_back.colors import DEFAULT_PALETTE, Palette, get_palette, palette_color, rgb_to_cmyk
+from meishi_back.spec import CardSpec
+from meishi_front import create_front_design
+
+
+def operators(code: list) -> set:
+    """コンテンツストリームの色の演算子"""
+    return set(re.findall(r"(?<![A-Za-z])(rg|RG|g|G|k|K)(?![A-Za-z])", "\n".join(code)))
+
+
+@pytest.mark.parametrize("rgb, cmyk", [
+    ((0, 0, 0), (0, 0, 0, 1)),
+    ((1, 1, 1), (0, 0, 0, 0)),
+    ((1, 0, 0), (0, 1, 1, 0)),
+    ((0.4, 0.4, 0.4), (0, 0, 0, 0.6)),
+])
+def test_rgb_to_cmyk(rgb, cmyk):
+    assert rgb_to_cmyk(*rgb) == pytest.approx(cmyk)
+
+
+@pytest.mark.parametrize("grid_type", ["isolation", "perspective", "hybrid"])
+def test_cmyk_back_uses_only_cmyk_operators(grid_type):
+    c = _create_canvas(io.BytesIO(), color_mode="cmyk")
+    create_back_design(grid_type)._generate_design(c, CardSpec.from_dict(card(grid_type)))
+    used = operators(c._code)
+    assert used & {"k", "K"}
+    assert not used & {"rg", "RG", "g", "G"}
+
+
+def test_cmyk_front_uses_only_cmyk_operators():
+    c = _create_canvas(io.BytesIO(), color_mode="cmyk")
+    create_front_design()._generate_design(c, CardSpec.from_dict(card(name="Taro", roll="Engineer", tel="03")))
+    used = operators(c._code)
+    assert "k" in used and not used & {"rg", "RG", "g", "G"}
+
+
+def test_palette_cmyk_values_are_used_as_is():
+    c = _create_canvas(io.BytesIO(), color_mode="cmyk")
+    assert palette_color(c, "grid").cmyk() == DEFAULT_PALETTE["grid"][1]
+    c = _create_canvas(io.BytesIO())
+    assert palette_color(c, "grid").rgb() == DEFAULT_PALETTE["grid"][0]
+
+
+def test_cmyk_render_is_cached_separately():
+    assert render_options(color_mode="cmyk") == {"color": "cmyk"}
+    assert render_options() == {}
+    assert render_back(card(), color_mode="cmyk") != render_back(card())
+
+
+def test_unknown_color_mode_raises_value_error():
+    with pytest.raises(ValueError):
+        render_back(card(), color_mode="lab")
+
+
+def test_palette_file_overrides_colors(tmp_path, monkeypatch):
+    path = tmp_path / "palette.json"
+    path.write_text(json.dumps({"grid": {"rgb": "#ff0000"}, "text": {"rgb": [0, 0, 1], "cmyk": [1, 1, 0, 0]}}))
+    monkeypatch.setenv("MEISHI_PALETTE", str(path))
+    palette = get_palette()
+    assert palette.digest is not None
+    # CMYKを指定していない色はRGBから変換する
+    assert palette.color("grid", "cmyk").cmyk() == pytest.approx((0, 1, 1, 0))
+    assert palette.color("text", "cmyk").cmyk() == (1, 1, 0, 0)
+    assert palette.color("background", "rgb").rgb() == (1, 1, 1)
+    monkeypatch.delenv("MEISHI_PALETTE")
+    assert get_palette().digest is None
+
+
+@pytest.mark.parametrize("content", [
+    "[",
+    "[]",
+    '{"grid": {"cmyk": [0, 0, 0, 1]}}',
+    '{"grid": {"rgb": "#fff"}}',
+    '{"grid": {"rgb": [0, 0, 2]}}',
+    '{"grid": {"rgb": [0, 0, 0], "cmyk": [0, 0, 0]}}',
+])
+def test_invalid_palette_raises_value_error(tmp_path, content):
+    path = tmp_path / "palette.json"
+    path.write_text(content)
+    with pytest.raises(ValueError):
+        Palette.load(str(path))
+
+
+def test_unknown_palette_color_raises_value_error():
+    with pytest.raises(ValueError):
+        Palette(DEFAULT_PALETTE).color("unknown")
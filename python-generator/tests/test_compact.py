@@ -0,0 +1,72 @@
+import json
+import sys
+
+import pytest
+from reportlab import rl_config
+
+from conftest import card
+from main import _render_back_pdf
+from meishi_back.compact import minify_operators
+
+
+@pytest.mark.parametrize("code, expected", [
+    # 同じ値の再設定は削る
+    (["0.198 w", "0 0 m 1 1 l S", "0.198 w", "1 1 m 2 2 l S"], ["0.198 w", "0 0 m 1 1 l S", "1 1 m 2 2 l S"]),
+    # 別の演算子で塗りの色を変えた後に元の色へ戻す場合は削らない
+    (["1 0 0 rg", "0 g", "1 0 0 rg"], ["1 0 0 rg", "0 g", "1 0 0 rg"]),
+    (["0 0 0 1 k", "1 0 0 rg", "0 0 0 1 k"], ["0 0 0 1 k", "1 0 0 rg", "0 0 0 1 k"]),
+    (["0 G", "1 0 0 RG", "0 G"], ["0 G", "1 0 0 RG", "0 G"]),
+    # 塗りと線の色は別の枠
+    (["0 g", "0 G", "0 g"], ["0 g", "0 G"]),
+    # カラースペースの設定で色は初期値に戻る
+    (["0 g", "/DeviceGray cs", "0 g"], ["0 g", "/DeviceGray cs", "0 g"]),
+    # 状態を変えない q/Q は対ごと外す
+    (["q", "0 0 m 1 1 l S", "Q"], ["0 0 m 1 1 l S"]),
+    (["q", "1 0 0 1 5 5 cm", "0 0 m 1 1 l S", "Q"], ["q", "1 0 0 1 5 5 cm", "0 0 m 1 1 l S", "Q"]),
+    # Q の後は q の前の状態に戻る
+    (["1 0 0 rg", "q", "0 g", "f", "Q", "1 0 0 rg"], ["1 0 0 rg", "q", "0 g", "f", "Q"]),
+    (["q", "0 g", "Q", "0 g"], ["q", "0 g", "Q", "0 g"]),
+    # 何もしない演算子と空のテキストブロック
+    (["1 0 0 1 0 0 cm", "BT /F1 12 Tf 14.4 TL ET", "0 0 m 1 1 l S"], ["0 0 m 1 1 l S"]),
+])
+def test_minify_operators(code, expected):
+    assert minify_operators(code) == expected
+
+
+def test_minify_splits_chunks():
+    assert minify_operators(["0 g\n0 0 1 1 re f", "0 g\n1 1 1 1 re f"]) == ["0 g", "0 0 1 1 re f", "1 1 1 1 re f"]
+
+
+@pytest.mark.parametrize("grid_type", ["isolation", "perspective", "hybrid"])
+def test_compact_pdf_is_smaller_and_flate_only(grid_type):
+    use_a85 = rl_config.useA85
+    data = card(grid_type, x=30, y=60)
+    normal = _render_back_pdf(data)
+    compact = _render_back_pdf(data, compact=True)
+    assert len(compact) < len(normal)
+    assert b"ASCII85Decode" not in compact
+    # 他のスレッドの出力に影響しないよう、グローバルな設定は書き換えない
+    assert rl_config.useA85 == use_a85
+    assert b"ASCII85Decode" in normal or not use_a85
+
+
+@pytest.mark.parametrize("flags, reported", [([], False), (["--report-size"], True)])
+def test_compact_cli_renders_normal_pdf_only_for_report(tmp_path, monkeypatch, capsys, flags, reported):
+    import main
+
+    json_path = tmp_path / "card.json"
+    json_path.write_text(json.dumps(card()))
+    renders = []
+    render_back = main.render_back
+
+    def counting_render_back(*args, **kwargs):
+        renders.append(args)
+        return render_back(*args, **kwargs)
+
+    monkeypatch.setattr(main, "render_back", counting_render_back)
+    monkeypatch.setattr(sys, "argv", ["main.py", "--json", str(json_path), "--output", str(tmp_path / "a.pdf"),
+                                      "--compact", *flags])
+    main.main()
+    # 比較用の通常のPDFは --report-size の時だけ描画する
+    assert len(renders) == (2 if reported else 1)
+    assert ("コンパクト出力" in capsys.readouterr().err) == reported
@@ -0,0 +1,74 @@
+import re
+import xml.etree.ElementTree as ET
+
+import pytest
+
+from conftest import card
+from meishi_back import DESIGN_CLASSES
+from meishi_back.contact_sheet import (MAX_POSITIONS, MAX_VARIANTS, SVG_LOGO_ID, build_variants, parse_position,
+                                       render_contact_sheet_pdf, render_contact_sheet_svg)
+from meishi_back.spec import SIZE_FACTORS
+
+SVG = "{http://www.w3.org/2000/svg}"
+
+
+def test_variants_are_grouped_by_grid_type():
+    variants = build_variants(card(detailedness=2.0), sizes=["s", "l"], positions=[(0, 0), (100, 50)])
+    assert list(variants) == list(DESIGN_CLASSES)
+    labels = [label for label, _ in variants["hybrid"]]
+    assert labels == ["s / x0 y0", "s / x100 y50", "l / x0 y0", "l / x100 y50"]
+    # 細かさは元の名刺のものを使う
+    assert {spec.detailedness for page in variants.values() for _, spec in page} == {2.0}
+    assert {spec.grid_type for _, spec in variants["hybrid"]} == {"hybrid"}
+
+
+@pytest.mark.parametrize("kwargs", [
+    {"grid_types": ["spiral"]},
+    {"sizes": ["xxl"]},
+    {"positions": []},
+    {"positions": [(0, 101)]},
+    {"positions": [(i * 4, 0) for i in range(MAX_POSITIONS + 1)]},
+])
+def test_invalid_variants_raise_value_error(kwargs):
+    with pytest.raises(ValueError):
+        build_variants(card(), **kwargs)
+
+
+def test_too_many_variants_raise_value_error():
+    # 全ての種類とサイズでは上限ちょうどになるため、同じサイズの重複指定で超える
+    positions = [(i * 4, i * 4) for i in range(MAX_POSITIONS)]
+    assert len(build_variants(card(), positions=positions)["hybrid"]) * len(DESIGN_CLASSES) == MAX_VARIANTS
+    with pytest.raises(ValueError, match=str(MAX_VARIANTS)):
+        build_variants(card(), sizes=list(SIZE_FACTORS) + ["m"], positions=positions)
+
+
+@pytest.mark.parametrize("text, expected", [("0,0", (0, 0)), ("12.5, 80", (12.5, 80))])
+def test_parse_position(text, expected):
+    assert parse_position(text) == expected
+
+
+@pytest.mark.parametrize("text", ["50", "a,b", "1,2,3"])
+def test_parse_position_rejects_bad_text(text):
+    with pytest.raises(ValueError):
+        parse_position(text)
+
+
+def test_pdf_has_one_page_per_grid_type():
+    pdf = render_contact_sheet_pdf(card(), grid_types=["isolation", "hybrid"], sizes=["m"])
+    assert pdf.startswith(b"%PDF-")
+    assert len(re.findall(rb"/Type /Page(?!s)", pdf)) == 2
+
+
+def test_svg_shares_logo_and_draws_every_variant():
+    sizes, positions = ["s", "m"], [(0, 0), (50, 50), (100, 100)]
+    svg = render_contact_sheet_svg(card(), sizes=sizes, positions=positions)
+    root = ET.fromstring(svg)
+    assert root.tag == f"{SVG}svg"
+    # ロゴの定義は1つだけで、各名刺からは参照する
+    assert len(root.findall(f".//{SVG}g[@id='{SVG_LOGO_ID}']")) == 1
+    cards = root.findall(f"{SVG}g[@clip-path]")
+    failed = [text for text in root.iter(f"{SVG}text") if text.text.endswith("(failed)")]
+    assert len(cards) + len(failed) == len(DESIGN_CLASSES) * len(sizes) * len(positions)
+    assert len(root.findall(f".//{SVG}use")) == len(cards)
+    titles = [text.text for text in root.iter(f"{SVG}text") if text.text in DESIGN_CLASSES]
+    assert titles == list(DESIGN_CLASSES)
@@ -0,0 +1,39 @@
+import json
+import os
+import subprocess
+import sys
+
+from conftest import ROOT, card
+from daemon import run_job
+
+
+def test_run_job_writes_pdf(tmp_path):
+    output = str(tmp_path / "out" / "back.pdf")
+    result = run_job({"id": "a", "data": card(), "output": output})
+    assert result == {"id": "a", "ok": True, "output": output}
+    with open(output, 'rb') as f:
+        assert f.read(5) == b"%PDF-"
+
+
+def test_run_job_reports_errors(tmp_path):
+    assert run_job({"id": "a"})["ok"] is False
+    result = run_job({"id": "b", "data": card("spiral"), "output": str(tmp_path / "back.pdf")})
+    assert result["ok"] is False and result["id"] == "b"
+
+
+def test_stdio_daemon_answers_every_line(tmp_path):
+    jobs = [
+        {"id": "back", "data": card(), "output": str(tmp_path / "back.pdf")},
+        {"id": "svg", "data": card("hybrid"), "format": "svg"},
+        {"id": "bad", "data": card("spiral"), "output": str(tmp_path / "bad.pdf")},
+    ]
+    stdin = "\n".join(json.dumps(job) for job in jobs) + "\nnot json\n"
+    process = subprocess.run([sys.executable, "daemon.py", "--workers", "2"], cwd=ROOT, input=stdin,
+                             capture_output=True, text=True, timeout=120)
+    assert process.returncode == 0, process.stderr
+    # 応答は完了した順に返るため id で突き合わせる
+    responses = {response["id"]: response for response in map(json.loads, process.stdout.splitlines())}
+    assert responses["back"]["ok"] and os.path.getsize(tmp_path / "back.pdf") > 0
+    assert responses["svg"]["ok"] and responses["svg"]["svg"].lstrip().startswith("<")
+    assert responses["bad"]["ok"] is False
+    assert responses[None]["ok"] is False
@@ -0,0 +1,64 @@
+import shutil
+
+import pytest
+
+from conftest import ROOT, card
+from main import render_front
+from meishi_front import fonts
+from meishi_front.fonts import ALLOW_UNEMBEDDED_ENV, JA_FALLBACK_FONT, font_for_text, ja_font
+
+
+@pytest.fixture(autouse=True)
+def fresh_fonts(monkeypatch):
+    """フォントの登録結果を各テストで作り直す（和文フォントの探索は環境変数に依存するため）"""
+    monkeypatch.setattr(fonts, "_fonts", {})
+    font_for_text.cache_clear()
+    yield
+    font_for_text.cache_clear()
+
+
+def profile(**fields) -> dict:
+    return card(**dict({"name": "Taro Yamada", "roll": "Engineer", "office": "Tokyo", "email": "taro@example.com",
+                        "tel": "03-0000-0000"}, **fields))
+
+
+def test_latin_card_embeds_latin_fonts():
+    pdf = render_front(profile())
+    assert pdf.startswith(b"%PDF-")
+    assert b"Inter" in pdf and b"FontFile2" in pdf
+    assert JA_FALLBACK_FONT.encode() not in pdf
+
+
+def test_latin_text_keeps_latin_font():
+    bold = fonts.register_fonts()["bold"]
+    assert font_for_text("Taro Yamada", bold) == bold
+
+
+@pytest.mark.parametrize("fields", [{"nameJa": "山田 太郎"}, {"office": "東京オフィス"}])
+def test_japanese_text_without_embeddable_font_fails(fields):
+    # 埋め込まれないフォントで入稿データを作らない
+    with pytest.raises(ValueError, match="NotoSansJP"):
+        render_front(profile(**fields))
+
+
+def test_unembedded_fallback_is_opt_in(monkeypatch, capsys):
+    monkeypatch.setenv(ALLOW_UNEMBEDDED_ENV, "1")
+    pdf = render_front(profile(nameJa="山田 太郎", office="東京オフィス"))
+    assert JA_FALLBACK_FONT.encode() in pdf
+    assert "埋め込まれない" in capsys.readouterr().err
+
+
+def test_ja_font_from_environment_is_embedded(tmp_path, monkeypatch):
+    # 和文の字形の有無にかかわらず MEISHI_JA_FONT のTTFを使う（ここでは同梱の欧文TTFで代用）
+    path = tmp_path / "custom.ttf"
+    shutil.copyfile(f"{ROOT}/fonts/IBMPlexMono-Regular.ttf", path)
+    monkeypatch.setenv("MEISHI_JA_FONT", str(path))
+    assert ja_font() == "JA-custom"
+    pdf = render_front(profile(nameJa="山田 太郎"))
+    assert b"FontFile2" in pdf and JA_FALLBACK_FONT.encode() not in pdf
+
+
+def test_missing_ja_font_from_environment_fails(tmp_path, monkeypatch):
+    monkeypatch.setenv("MEISHI_JA_FONT", str(tmp_path / "missing.ttf"))
+    with pytest.raises(ValueError, match="MEISHI_JA_FONT"):
+        fonts.register_fonts()
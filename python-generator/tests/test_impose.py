@@ -0,0 +1,79 @@
+import io
+import re
+
+import pytest
+from reportlab.pdfgen import canvas
+
+from conftest import card
+from meishi_back import create_back_design
+from meishi_back.impose import ImpositionWriter, SheetLayout, draw_back_in_slot, draw_crop_marks
+from meishi_back.spec import CardSpec
+
+
+def segments(code: list) -> int:
+    """コンテンツストリームの線分（l 演算子）の数"""
+    return len(re.findall(r"(?<![A-Za-z])l(?![A-Za-z])", "\n".join(code)))
+
+
+@pytest.mark.parametrize("sheet, gutter_mm, columns, rows", [
+    ("SRA3", 4, 3, 6),
+    ("SRA3", 0, 3, 7),
+    ("A3", 4, 4, 4),
+])
+def test_layout_counts(sheet, gutter_mm, columns, rows):
+    layout = SheetLayout(sheet, gutter_mm=gutter_mm)
+    assert (layout.columns, layout.rows) == (columns, rows)
+    # 名刺の並びはシートの余白に収まる
+    assert layout.origin[0] > 0 and layout.origin[1] > 0
+    assert layout.origin[0] + layout.grid_size[0] < layout.page_size[0]
+
+
+def test_layout_rejects_invalid_options():
+    with pytest.raises(ValueError):
+        SheetLayout("B4")
+    with pytest.raises(ValueError):
+        SheetLayout("SRA3", gutter_mm=-1)
+
+
+@pytest.mark.parametrize("gutter_mm", [4, 0])
+def test_interior_crop_marks_only_with_gutter(gutter_mm):
+    layout = SheetLayout("SRA3", gutter_mm=gutter_mm)
+    c = canvas.Canvas(io.BytesIO(), pagesize=layout.page_size)
+    start = len(c._code)
+    draw_crop_marks(c, layout)
+    xs, ys = layout.trim_lines()
+    outer = 2 * (len(xs) + len(ys))
+    interior = (layout.rows - 1) * len(xs) + (layout.columns - 1) * len(ys) if gutter_mm else 0
+    assert segments(c._code[start:]) == outer + interior
+
+
+@pytest.mark.parametrize("grid_type", ["isolation", "perspective", "hybrid"])
+def test_slot_draws_same_lines_as_single_card(grid_type):
+    # グリッドの線の長さはシートではなく名刺の大きさで決まる
+    spec = CardSpec.from_dict(card(grid_type))
+    layout = SheetLayout("SRA3")
+    sheet = canvas.Canvas(io.BytesIO(), pagesize=layout.page_size)
+    start = len(sheet._code)
+    draw_back_in_slot(sheet, spec, *layout.slot_position(0), *layout.card_size)
+    assert sheet._pagesize == layout.page_size
+
+    single = canvas.Canvas(io.BytesIO(), pagesize=layout.card_size)
+    create_back_design(grid_type)._generate_design(single, spec)
+    assert segments(sheet._code[start:]) == segments(single._code)
+
+
+def test_writer_splits_files_and_reports_placements(tmp_path):
+    layout = SheetLayout("SRA3")
+    writer = ImpositionWriter(str(tmp_path / "sheets"), layout, sheets_per_file=1)
+    placements = [writer.add(card(x=i * 5)) for i in range(layout.per_sheet + 2)]
+    files = writer.close()
+    assert [path.rsplit("/", 1)[1] for path in files] == ["sheets_001.pdf", "sheets_002.pdf"]
+    assert placements[0] == {"file": files[0], "sheet": 1, "slot": 1}
+    assert placements[-1] == {"file": files[1], "sheet": 1, "slot": 2}
+    for path in files:
+        with open(path, 'rb') as f:
+            assert f.read(5) == b"%PDF-"
+
+
+def test_writer_without_cards_writes_nothing(tmp_path):
+    assert ImpositionWriter(str(tmp_path / "sheets"), SheetLayout("A3")).close() == []
@@ -0,0 +1,152 @@
+import os
+import time
+
+import pytest
+
+from conftest import card
+from meishi_back import jobs
+from meishi_back.jobs import BACKOFF_BASE, BACKOFF_MAX, DONE, FAILED, QUEUED, RUNNING, JobQueue, backoff_seconds
+
+
+@pytest.fixture
+def db(tmp_path):
+    return str(tmp_path / "queue.sqlite")
+
+
+@pytest.fixture
+def queue(db):
+    queue = JobQueue(db)
+    yield queue
+    queue.close()
+
+
+def state(queue: JobQueue, output: str) -> str:
+    return queue._conn.execute("SELECT state FROM jobs WHERE output = ?", (os.path.abspath(output),)).fetchone()[0]
+
+
+def test_enqueue_stores_absolute_paths(queue, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    assert queue.enqueue(card(), "out/a_back.pdf", front_output="out/a_front.pdf") == "added"
+    job = queue.claim()
+    assert job.output == str(tmp_path / "out" / "a_back.pdf")
+    assert job.front_output == str(tmp_path / "out" / "a_front.pdf")
+
+
+def test_enqueue_dedupes_same_output(queue, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    assert queue.enqueue(card(name="Taro"), "out/a_back.pdf") == "added"
+    # 相対パスと絶対パスで同じ出力先を指定しても1件
+    assert queue.enqueue(card(name="Taro"), str(tmp_path / "out" / "a_back.pdf")) == "skipped"
+    # キーの順序が違うだけの同じデータ
+    assert queue.enqueue(dict(reversed(list(card(name="Taro").items()))), "out/a_back.pdf") == "skipped"
+    assert queue.counts()[QUEUED] == 1
+
+
+def test_enqueue_replaces_changed_job(queue, tmp_path):
+    output = str(tmp_path / "a_back.pdf")
+    queue.enqueue(card(name="Taro"), output)
+    job = queue.claim()
+    queue.complete(job)
+    assert queue.enqueue(card(name="Hanako"), output) == "updated"
+    assert queue.counts()[QUEUED] == 1
+    job = queue.claim()
+    assert job.data["name"] == "Hanako" and job.attempts == 1
+
+
+def test_replaced_running_job_cannot_complete(queue, tmp_path):
+    output = str(tmp_path / "a_back.pdf")
+    queue.enqueue(card(name="Taro"), output)
+    old = queue.claim()
+    assert queue.enqueue(card(name="Hanako"), output) == "updated"
+    # 古い内容で生成していたワーカーはリースを失っている
+    assert queue.complete(old) is False
+    assert state(queue, output) == QUEUED
+
+
+def test_enqueue_many_counts(queue, tmp_path):
+    jobs_ = [{"data": card(name=name), "output": str(tmp_path / f"{name}.pdf")} for name in ("a", "b")]
+    assert queue.enqueue_many(iter(jobs_)) == {"added": 2, "updated": 0, "skipped": 0}
+    jobs_[1]["data"] = card(name="c")
+    assert queue.enqueue_many(iter(jobs_)) == {"added": 0, "updated": 1, "skipped": 1}
+
+
+def test_enqueue_rejects_invalid_max_attempts(queue, tmp_path):
+    with pytest.raises(ValueError):
+        queue.enqueue(card(), str(tmp_path / "a.pdf"), max_attempts=0)
+
+
+def test_claim_order_is_priority_then_insertion(queue, tmp_path):
+    for name, priority in (("low", 0), ("high", 10), ("low2", 0)):
+        queue.enqueue(card(name=name), str(tmp_path / f"{name}.pdf"), priority=priority)
+    assert [queue.claim().data["name"] for _ in range(3)] == ["high", "low", "low2"]
+    assert queue.claim() is None
+
+
+def test_expired_lease_is_claimed_again(db, tmp_path):
+    worker_a = JobQueue(db, lease_seconds=0.05)
+    worker_b = JobQueue(db, lease_seconds=60)
+    try:
+        output = str(tmp_path / "a.pdf")
+        worker_a.enqueue(card(), output)
+        stuck = worker_a.claim()
+        assert worker_b.claim() is None
+        time.sleep(0.1)
+        job = worker_b.claim()
+        assert job is not None and job.id == stuck.id and job.attempts == 2
+        # 期限切れ後に取り直されたジョブは元のワーカーからは完了にできない
+        assert worker_a.complete(stuck) is False
+        assert worker_b.complete(job) is True
+        assert state(worker_b, output) == DONE
+    finally:
+        worker_a.close()
+        worker_b.close()
+
+
+def test_expired_lease_without_attempts_left_fails(db, tmp_path):
+    queue = JobQueue(db, lease_seconds=0.05)
+    try:
+        output = str(tmp_path / "a.pdf")
+        queue.enqueue(card(), output, max_attempts=1)
+        queue.claim()
+        time.sleep(0.1)
+        assert queue.claim() is None
+        assert state(queue, output) == FAILED
+    finally:
+        queue.close()
+
+
+def test_failed_job_is_retried_after_backoff(queue, tmp_path, monkeypatch):
+    output = str(tmp_path / "a.pdf")
+    queue.enqueue(card(), output, max_attempts=2)
+    queue.fail(queue.claim(), "RuntimeError: boom")
+    assert state(queue, output) == QUEUED
+    # 待ち時間が過ぎるまでは取り出さない
+    assert queue.claim() is None
+    assert 0 < queue.next_available_in() <= BACKOFF_BASE
+
+    monkeypatch.setattr(jobs, "backoff_seconds", lambda attempts: 0.0)
+    queue._conn.execute("UPDATE jobs SET available_at = 0")
+    job = queue.claim()
+    assert job.attempts == 2
+    queue.fail(job, "RuntimeError: boom again")
+    assert state(queue, output) == FAILED
+    assert queue.failures() == [{"id": job.id, "output": job.output, "attempts": 2,
+                                 "last_error": "RuntimeError: boom again"}]
+
+    assert queue.requeue_failed() == 1
+    assert queue.claim().attempts == 1
+
+
+def test_release_does_not_count_attempt(queue, tmp_path):
+    output = str(tmp_path / "a.pdf")
+    queue.enqueue(card(), output)
+    assert queue.release(queue.claim())
+    assert queue.claim().attempts == 1
+    assert state(queue, output) == RUNNING
+
+
+@pytest.mark.parametrize("attempts", [1, 2, 5, 20])
+def test_backoff_seconds_bounds(attempts):
+    delay = min(BACKOFF_MAX, BACKOFF_BASE * 2 ** (attempts - 1))
+    for _ in range(20):
+        assert delay * 0.5 <= backoff_seconds(attempts) <= delay
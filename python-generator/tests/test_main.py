@@ -0,0 +1,51 @@
+import json
+import subprocess
+import sys
+
+import pytest
+
+from conftest import ROOT, card
+from main import EXIT_INPUT_ERROR, build_front_pdf_filename, build_pdf_filename, render_back, render_card
+
+
+@pytest.mark.parametrize("data, expected", [
+    ({"employeeNumber": 12, "name": "Taro Yamada"}, "12_taro_yamada_back.pdf"),
+    ({}, "unknown_noname_back.pdf"),
+    ({"employeeNumber": None, "name": None}, "unknown_noname_back.pdf"),
+    ({"employeeNumber": 0, "name": ""}, "0_noname_back.pdf"),
+])
+def test_pdf_filenames(data, expected):
+    assert build_pdf_filename(data) == expected
+    assert build_front_pdf_filename(data) == expected.replace("_back.pdf", "_front.pdf")
+
+
+def test_render_back_returns_pdf_bytes():
+    pdf = render_back(card("perspective", x=30, y=70))
+    assert pdf.startswith(b"%PDF-1.4") and pdf.rstrip().endswith(b"%%EOF")
+    # invariant=True のため同じ入力からは同じバイト列になる
+    assert render_back(card("perspective", x=30, y=70)) == pdf
+
+
+def test_render_card_returns_back_and_front():
+    back, front = render_card(card(name="Taro"))
+    assert back.startswith(b"%PDF-") and front.startswith(b"%PDF-")
+    assert back != front
+
+
+def run_main(*args, stdin: bytes):
+    return subprocess.run([sys.executable, "main.py", "--json", "-", *args], cwd=ROOT, input=stdin,
+                          capture_output=True, timeout=120)
+
+
+def test_cli_streams_pdf_to_stdout():
+    data = card("hybrid", name=None)
+    process = run_main("--stdout", stdin=json.dumps(data).encode("utf-8"))
+    assert process.returncode == 0, process.stderr.decode("utf-8")
+    assert process.stdout == render_back(data)
+
+
+def test_cli_reports_invalid_card():
+    process = run_main("--stdout", stdin=json.dumps(card("spiral")).encode("utf-8"))
+    assert process.returncode == EXIT_INPUT_ERROR
+    assert json.loads(process.stderr.decode("utf-8").splitlines()[-1])["error"] == "invalid_card"
+    assert process.stdout == b""
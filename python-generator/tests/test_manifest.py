@@ -0,0 +1,128 @@
+import functools
+import io
+import json
+import os
+import shutil
+
+import pytest
+
+from conftest import card
+from meishi_back import assets
+from meishi_back.manifest import MANIFEST_VERSION, Manifest
+
+
+@pytest.fixture
+def logo(tmp_path, monkeypatch):
+    """ロゴのSVGの複製（テストから更新時刻や内容を変えるため）"""
+    path = str(tmp_path / "logo.svg")
+    shutil.copyfile(assets.DEFAULT_LOGO_PATH, path)
+    monkeypatch.setattr(assets, "get_logo_asset", functools.partial(assets.get_logo_asset, path))
+    return path
+
+
+@pytest.fixture
+def output(tmp_path):
+    path = str(tmp_path / "1_taro_back.pdf")
+    with open(path, 'wb') as f:
+        f.write(b"%PDF-1.4 test")
+    return path
+
+
+def recorded(manifest_path: str, output: str, data: dict) -> Manifest:
+    """output を data から生成したことを記録して保存し、読み込み直したマニフェストを返す"""
+    manifest = Manifest(manifest_path)
+    manifest.record(output, manifest.entry(data))
+    manifest.save()
+    return Manifest(manifest_path)
+
+
+def test_unchanged_output_is_fresh(tmp_path, logo, output):
+    manifest_path = str(tmp_path / "manifest.json")
+    data = card(name="Taro")
+    assert Manifest(manifest_path).stale_reason(output, Manifest(manifest_path).entry(data)) == "new"
+    manifest = recorded(manifest_path, output, data)
+    assert manifest.stale_reason(output, manifest.entry(data)) is None
+
+
+def test_changed_record_is_stale(tmp_path, logo, output):
+    manifest = recorded(str(tmp_path / "manifest.json"), output, card(name="Taro"))
+    assert manifest.stale_reason(output, manifest.entry(card(name="Hanako"))) == "record"
+
+
+def test_touching_logo_keeps_output_fresh(tmp_path, logo, output):
+    manifest_path = str(tmp_path / "manifest.json")
+    data = card(name="Taro")
+    recorded(manifest_path, output, data)
+    # チェックアウトや touch で更新時刻だけが変わっても生成し直さない
+    stat = os.stat(logo)
+    os.utime(logo, (stat.st_atime + 3600, stat.st_mtime + 3600))
+    manifest = Manifest(manifest_path)
+    assert manifest.stale_reason(output, manifest.entry(data)) is None
+
+
+def test_changing_logo_content_is_stale(tmp_path, logo, output):
+    manifest_path = str(tmp_path / "manifest.json")
+    data = card(name="Taro")
+    recorded(manifest_path, output, data)
+    with open(logo, 'a', encoding='utf-8') as f:
+        f.write("<!-- updated -->\n")
+    stat = os.stat(logo)
+    os.utime(logo, (stat.st_atime + 3600, stat.st_mtime + 3600))
+    manifest = Manifest(manifest_path)
+    assert manifest.stale_reason(output, manifest.entry(data)) == "assets"
+
+
+def test_changed_design_is_stale(tmp_path, logo, output):
+    manifest = recorded(str(tmp_path / "manifest.json"), output, card())
+    manifest.design = "other"
+    assert manifest.stale_reason(output, manifest.entry(card())) == "design"
+
+
+def test_missing_or_modified_output_is_stale(tmp_path, logo, output):
+    manifest = recorded(str(tmp_path / "manifest.json"), output, card())
+    entry = manifest.entry(card())
+    with open(output, 'ab') as f:
+        f.write(b"partial")
+    assert manifest.stale_reason(output, entry) == "output"
+    os.unlink(output)
+    assert manifest.stale_reason(output, entry) == "output"
+
+
+def test_other_manifest_version_is_ignored(tmp_path, logo, output):
+    manifest_path = tmp_path / "manifest.json"
+    recorded(str(manifest_path), output, card())
+    manifest_path.write_text(manifest_path.read_text().replace(
+        f'"version":{MANIFEST_VERSION}', f'"version":{MANIFEST_VERSION + 1}'))
+    manifest = Manifest(str(manifest_path))
+    assert manifest.stale_reason(output, manifest.entry(card())) == "new"
+
+
+def test_broken_manifest_raises_value_error(tmp_path):
+    path = tmp_path / "manifest.json"
+    path.write_text("{")
+    with pytest.raises(ValueError):
+        Manifest(str(path))
+
+
+def test_incremental_batch_skips_unchanged_records(tmp_path):
+    from batch import IncrementalBuild, run_batch
+
+    manifest_path = str(tmp_path / "manifest.json")
+    out_dir = str(tmp_path / "pdf")
+    records = [card(employeeNumber=str(i), name=f"Member {i}") for i in range(3)]
+
+    def build(records):
+        manifest = Manifest(manifest_path)
+        incremental = IncrementalBuild(manifest, out_dir)
+        report = io.StringIO()
+        summary = run_batch(incremental.filter(iter(records)), out_dir, report, incremental=incremental)
+        manifest.save()
+        return summary, [json.loads(line) for line in report.getvalue().splitlines()]
+
+    summary, _ = build(records)
+    assert (summary["succeeded"], summary["skipped"]) == (3, 0)
+    # 2回目は変更したレコードだけを生成し直す
+    records[1] = dict(records[1], pattern={"grid": {"type": "hybrid"}})
+    summary, results = build(records)
+    assert (summary["succeeded"], summary["skipped"]) == (3, 2)
+    assert [r.get("reason") for r in results if not r.get("skipped")] == ["record"]
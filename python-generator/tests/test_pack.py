@@ -0,0 +1,86 @@
+import struct
+
+import pytest
+
+from conftest import card
+from main import _render_back_pdf, render_back
+from meishi_back import pack
+from meishi_back.pack import HEADER, INDEX_ENTRY, LatticePack, build_pack, get_lattice_pack, iter_lattice, lattice_key
+
+RECORDS = [card("isolation", "m", 1.0, 50, 50), card("hybrid", "s", 2.0, 20, 80), card("perspective", "l", 0.5, 70, 30)]
+
+
+@pytest.fixture
+def small_pack(tmp_path):
+    """RECORDS だけを描画した小さなパック（描画できない位置の組も1つ渡す）"""
+    path = str(tmp_path / "small.pack")
+    records = [(data, _render_back_pdf(data)) for data in RECORDS] + [(card("isolation", x=0, y=0), None)]
+    info = build_pack(path, render=None, records=records)
+    assert info["entries"] == len(RECORDS) and info["skipped"] == 1
+    return path
+
+
+def test_pack_returns_rendered_bytes(small_pack):
+    lattice = LatticePack(small_pack)
+    try:
+        assert lattice.count == len(RECORDS)
+        for data in RECORDS:
+            assert lattice.lookup(data) == _render_back_pdf(data)
+        # 同じ格子点に吸着する位置は同じPDFになる
+        assert lattice.lookup(card("isolation", "m", 1.0, 50.5, 50.2)) == _render_back_pdf(RECORDS[0])
+        assert lattice.lookup(card("isolation", "xs")) is None
+    finally:
+        lattice.close()
+
+
+def test_render_back_uses_matching_pack(small_pack, monkeypatch):
+    monkeypatch.setenv("MEISHI_PACK", small_pack)
+    monkeypatch.setattr(pack, "_pack", None)
+    assert get_lattice_pack() is not None
+    for data in RECORDS:
+        assert render_back(data) == _render_back_pdf(data)
+
+
+def test_stale_pack_is_ignored(small_pack, monkeypatch, capsys):
+    monkeypatch.setenv("MEISHI_PACK", small_pack)
+    monkeypatch.setattr(pack, "_pack", None)
+    monkeypatch.setattr(pack, "_fingerprint", b"\0" * 32)
+    monkeypatch.setattr(pack, "_warned", set())
+    assert get_lattice_pack() is None
+    assert "再生成" in capsys.readouterr().err
+
+
+def test_truncated_pack_is_rejected(small_pack):
+    with open(small_pack, 'rb') as f:
+        content = f.read()
+    with open(small_pack, 'wb') as f:
+        f.write(content[:-100])
+    with pytest.raises(ValueError):
+        LatticePack(small_pack)
+
+
+def test_out_of_range_index_entry_is_rejected(small_pack):
+    with open(small_pack, 'r+b') as f:
+        f.seek(HEADER.size)
+        key, offset, length = INDEX_ENTRY.unpack(f.read(INDEX_ENTRY.size))
+        f.seek(HEADER.size)
+        f.write(INDEX_ENTRY.pack(key, 0, length))
+    with pytest.raises(ValueError):
+        LatticePack(small_pack)
+
+
+def test_bad_header_is_rejected(tmp_path):
+    path = tmp_path / "bad.pack"
+    path.write_bytes(struct.pack("<8sII32s", b"NOTAPACK", 1, 0, b"\0" * 32))
+    with pytest.raises(ValueError):
+        LatticePack(str(path))
+
+
+def test_lattice_covers_every_position():
+    # 位置0〜100のどこを選んでも、吸着後のパターンがパックの組み合わせに含まれる
+    keys = {lattice_key(data) for data in iter_lattice((1.0,))}
+    for grid_type in ("isolation", "hybrid"):
+        for size in ("l", "xs"):
+            for x in range(0, 101, 5):
+                for y in range(0, 101, 5):
+                    assert lattice_key(card(grid_type, size, 1.0, x, y)) in keys
@@ -0,0 +1,33 @@
+import re
+import xml.etree.ElementTree as ET
+
+import pytest
+
+from conftest import card
+from main import render_back
+from meishi_back.preview import PAGE_SIZE, render_back_svg
+
+SVG = "{http://www.w3.org/2000/svg}"
+
+
+@pytest.mark.parametrize("grid_type", ["isolation", "perspective", "hybrid"])
+def test_svg_preview_draws_same_grid_as_pdf(grid_type):
+    data = card(grid_type, x=30, y=70)
+    root = ET.fromstring(render_back_svg(data))
+    width, height = (float(v) for v in root.get("viewBox").split()[2:])
+    assert (width, height) == pytest.approx(PAGE_SIZE, abs=0.01)
+    # ロゴは元のSVGを埋め込む
+    assert root.find(f"{SVG}g") is not None
+
+    # PDFの線の数え方は PyMuPDF がある場合のみ確かめる（描画の依存関係には含めない）
+    pymupdf = pytest.importorskip("pymupdf")
+    svg_lines = max(len(re.findall("M", path.get("d"))) for path in root.iter(f"{SVG}path") if path.get("stroke"))
+    with pymupdf.open(stream=render_back(data), filetype="pdf") as doc:
+        pdf_lines = max(sum(1 for item in drawing["items"] if item[0] == "l")
+                        for drawing in doc[0].get_drawings() if drawing.get("color") is not None)
+    assert svg_lines == pdf_lines
+
+
+def test_svg_preview_rejects_invalid_card():
+    with pytest.raises(ValueError):
+        render_back_svg(card("spiral"))
@@ -0,0 +1,189 @@
+import asyncio
+import io
+import json
+import threading
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import server
+from conftest import card
+from meishi_back.spec import CardSpec
+from server import HttpError, RenderService
+
+
+class Renders:
+    """プロセスプールの代わりにスレッドで動く描画（gate を開けるまで終わらない）"""
+
+    def __init__(self):
+        self.gate = threading.Event()
+        self.started = threading.Semaphore(0)
+        self.calls = 0
+
+    def back(self, spec, color_mode=None):
+        self.calls += 1
+        self.started.release()
+        assert self.gate.wait(10)
+        return b"%PDF-back " + spec.grid_type.encode()
+
+    def front(self, spec, color_mode=None):
+        raise RuntimeError("front failed")
+
+
+@pytest.fixture
+def renders(monkeypatch):
+    renders = Renders()
+    monkeypatch.setattr(server, "render_back", renders.back)
+    monkeypatch.setattr(server, "render_front", renders.front)
+    monkeypatch.setattr(RenderService, "_create_executor", lambda self: ThreadPoolExecutor(self.workers))
+    yield renders
+    renders.gate.set()
+
+
+async def started(renders: Renders):
+    """描画がワーカーで始まるまで待つ"""
+    await asyncio.get_running_loop().run_in_executor(None, renders.started.acquire)
+
+
+def run(coroutine):
+    return asyncio.run(asyncio.wait_for(coroutine, 20))
+
+
+def test_cancelled_request_does_not_cancel_shared_render(renders):
+    async def scenario():
+        service = RenderService(workers=1, max_queue=4)
+        spec = CardSpec.from_dict(card())
+        first = asyncio.create_task(service.render(spec))
+        await started(renders)
+        second = asyncio.create_task(service.render(spec))
+        await asyncio.sleep(0)
+        first.cancel()
+        await asyncio.gather(first, return_exceptions=True)
+        renders.gate.set()
+        pdf = await second
+        service.close()
+        return first, pdf, service
+
+    first, pdf, service = run(scenario())
+    assert first.cancelled()
+    assert pdf == b"%PDF-back isolation"
+    assert renders.calls == 1
+    assert (service.counters["rendered"], service.counters["coalesced"]) == (1, 1)
+    assert service.inflight == {}
+
+
+def test_failed_bundle_front_does_not_cancel_coalesced_back(renders):
+    async def scenario():
+        service = RenderService(workers=2, max_queue=4)
+        spec = CardSpec.from_dict(card())
+        back = asyncio.create_task(service.render(spec))
+        await started(renders)
+        with pytest.raises(RuntimeError):
+            await service.render_bundle(card(), spec)
+        renders.gate.set()
+        pdf = await back
+        service.close()
+        return pdf
+
+    assert run(scenario()) == b"%PDF-back isolation"
+
+
+def test_cancelled_render_keeps_worker_slot_until_job_ends(renders):
+    async def scenario():
+        service = RenderService(workers=1, max_queue=4)
+        request = asyncio.create_task(service.render(CardSpec.from_dict(card())))
+        await started(renders)
+        request.cancel()
+        await asyncio.gather(request, return_exceptions=True)
+        await asyncio.sleep(0.05)
+        # ワーカーで描画が続いている間は次の描画を始めない
+        running_after_cancel = service.running
+        renders.gate.set()
+        pdf = await service.render(CardSpec.from_dict(card("hybrid")))
+        service.close()
+        return running_after_cancel, pdf, service.running
+
+    running_after_cancel, pdf, running = run(scenario())
+    assert running_after_cancel == 1
+    assert pdf == b"%PDF-back hybrid"
+    assert running == 0
+
+
+def test_cancelled_shared_render_becomes_http_error(renders):
+    async def scenario():
+        service = RenderService(workers=1, max_queue=4)
+        request = asyncio.create_task(service.render(CardSpec.from_dict(card())))
+        await started(renders)
+        # サーバーの停止などで共有の描画そのものが取り消された場合
+        next(iter(service.inflight.values())).task.cancel()
+        try:
+            return await request
+        finally:
+            renders.gate.set()
+            service.close()
+
+    with pytest.raises(HttpError) as e:
+        run(scenario())
+    assert e.value.status == 500
+
+
+def test_full_queue_is_rejected_with_429(renders):
+    async def scenario():
+        service = RenderService(workers=1, max_queue=0)
+        request = asyncio.create_task(service.render(CardSpec.from_dict(card())))
+        await started(renders)
+        try:
+            await service.render(CardSpec.from_dict(card("hybrid")))
+        finally:
+            renders.gate.set()
+            await request
+            service.close()
+
+    with pytest.raises(HttpError) as e:
+        run(scenario())
+    assert e.value.status == 429
+
+
+async def request(port: int, raw: bytes):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(raw)
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    head, _, body = response.partition(b"\r\n\r\n")
+    return int(head.split(b" ")[1]), body
+
+
+def post(path: str, payload: dict) -> bytes:
+    body = json.dumps(payload).encode("utf-8")
+    return (f"POST {path} HTTP/1.1\r\nContent-Length: {len(body)}\r\nConnection: close\r\n\r\n").encode() + body
+
+
+def test_http_service_renders_bundle_and_rejects_bad_requests():
+    async def scenario():
+        service = RenderService(workers=1, max_queue=4)
+        service.executor.shutdown()
+        service.executor = ThreadPoolExecutor(1)
+        http = await asyncio.start_server(lambda r, w: server.handle_connection(service, r, w), "127.0.0.1", 0)
+        port = http.sockets[0].getsockname()[1]
+        try:
+            return [
+                await request(port, post("/render?format=zip&name=bundle", card(employeeNumber=1, name="Taro"))),
+                await request(port, post("/render", card("spiral"))),
+                await request(port, b"POST /render HTTP/1.1\r\nContent-Length: abc\r\n\r\n"),
+                await request(port, b"GET /healthz HTTP/1.1\r\nConnection: close\r\n\r\n"),
+            ]
+        finally:
+            http.close()
+            await http.wait_closed()
+            service.close()
+
+    (zip_status, bundle), (card_status, error), (length_status, _), (health_status, _) = run(scenario())
+    assert zip_status == 200
+    with zipfile.ZipFile(io.BytesIO(bundle)) as archive:
+        assert archive.testzip() is None
+        assert "bundle/pdf/1_taro_back.pdf" in archive.namelist()
+    assert card_status == 400 and json.loads(error)["error"] == "invalid_card"
+    assert length_status == 400
+    assert health_status == 200
@@ -0,0 +1,84 @@
+import math
+
+import pytest
+
+from conftest import card
+from meishi_back.spec import (DEFAULT_GRID_TYPE, DEFAULT_SIZE, LOGO_OFFSET, MEISHI_HEIGHT, MEISHI_WIDTH,
+                              MINIMUM_GRID_SIZE, CardSpec, as_card_spec)
+
+
+def test_defaults():
+    spec = CardSpec.from_dict({})
+    assert spec.grid_type == DEFAULT_GRID_TYPE
+    assert spec.size == DEFAULT_SIZE
+    assert spec.detailedness == 1.0
+    assert (spec.position_x, spec.position_y) == (50, 50)
+    assert spec.name == "" and spec.business_title == ""
+
+
+@pytest.mark.parametrize("data", [
+    [],
+    {"pattern": "isolation"},
+    {"pattern": {"grid": 1}},
+    {"pattern": {"grid": {"type": "spiral"}}},
+    {"pattern": {"grid": {"detailedness": 0}}},
+    {"pattern": {"grid": {"detailedness": -1}}},
+    {"pattern": {"grid": {"detailedness": "1"}}},
+    {"pattern": {"grid": {"detailedness": True}}},
+    {"pattern": {"grid": {"detailedness": math.nan}}},
+    {"pattern": {"position": {"x": 10}}},
+    {"pattern": {"position": {"x": "10", "y": 10}}},
+    {"pattern": {"position": {"x": 10, "y": math.inf}}},
+    {"pattern": {"position": [10, 10]}},
+])
+def test_invalid_data_raises_value_error(data):
+    with pytest.raises(ValueError):
+        CardSpec.from_dict(data)
+
+
+def test_unknown_size_falls_back_to_default():
+    assert CardSpec.from_dict(card(size="xxl")).size == DEFAULT_SIZE
+
+
+def test_profile_fields_are_strings():
+    spec = CardSpec.from_dict(card(employeeNumber=12, name="Taro", nameJa="太郎", roll="A", secondRoll="B",
+                                   tel=None))
+    assert spec.employee_number == "12"
+    assert spec.tel == ""
+    assert spec.business_title == "A / B"
+
+
+@pytest.mark.parametrize("detailedness", [0.5, 1.0, 2.0])
+@pytest.mark.parametrize("size", ["l", "m", "s", "xs"])
+def test_logo_position_snaps_to_grid(size, detailedness):
+    unit_size = MINIMUM_GRID_SIZE * detailedness
+    for x, y in [(0, 0), (13, 87), (50, 50), (100, 100)]:
+        spec = CardSpec.from_dict(card(size=size, detailedness=detailedness, x=x, y=y))
+        for value in (spec.logo_x, spec.logo_y):
+            assert math.isclose(value / unit_size, round(value / unit_size), abs_tol=1e-9)
+        # 吸着前の位置（フロントエンドと同じ計算式）から1マス以内
+        raw_x = LOGO_OFFSET + (MEISHI_WIDTH - LOGO_OFFSET * 2 - spec.logo_width) * x / 100
+        raw_y = MEISHI_HEIGHT - (LOGO_OFFSET + (MEISHI_HEIGHT - LOGO_OFFSET * 2 - spec.logo_height) * y / 100) \
+            - spec.logo_height
+        assert 0 <= raw_x - spec.logo_x < unit_size
+        assert 0 <= raw_y - spec.logo_y < unit_size
+
+
+def test_positions_in_same_cell_share_pattern():
+    a = CardSpec.from_dict(card(x=50, y=50))
+    b = CardSpec.from_dict(card(x=50.5, y=50.2, name="Other"))
+    assert a.pattern() == b.pattern()
+    assert a.pattern_key("v1") == b.pattern_key("v1")
+    assert a.canonical_hash() != b.canonical_hash()
+
+
+def test_pattern_key_depends_on_version_and_options():
+    spec = CardSpec.from_dict(card())
+    keys = {spec.pattern_key("v1"), spec.pattern_key("v2"), spec.pattern_key("v1", compact=True)}
+    assert len(keys) == 3
+
+
+def test_as_card_spec_passes_specs_through():
+    spec = CardSpec.from_dict(card())
+    assert as_card_spec(spec) is spec
+    assert as_card_spec(card()) == spec